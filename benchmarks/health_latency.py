@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Load test: /api/health latency while a large player upload is in flight.
+
+Starts uvicorn on a throw-away database, polls /api/health from a few client
+threads for a quiet baseline, then again while a large CSV is uploaded (and
+imported, with wait=true), and prints p50/p99/max for both phases. With
+database and pandas work off the event loop, p99 should stay close to the
+baseline.
+
+    python benchmarks/health_latency.py [--rows 200000] [--clients 4]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir, port):
+    env = dict(os.environ, AUCTION_DB_PATH=os.path.join(workdir, "bench.db"))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", ROOT,
+         "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL
+    )
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/api/health", timeout=1)
+            return server, base
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def poll_health(base, stop, samples):
+    with httpx.Client(base_url=base) as client:
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get("/api/health")
+            samples.append((time.perf_counter() - start) * 1000)
+
+
+def measure(base, clients, during):
+    """Poll /api/health from `clients` threads while during() runs"""
+    samples = []
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=poll_health, args=(base, stop, samples))
+        for _ in range(clients)
+    ]
+    for t in threads:
+        t.start()
+    during()
+    stop.set()
+    for t in threads:
+        t.join()
+    return samples
+
+
+def summary(samples):
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"n={len(ordered):6d}  p50={statistics.median(ordered):7.2f}ms  p99={p99:7.2f}ms  max={ordered[-1]:7.2f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--clients", type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    server, base = start_server(workdir, free_port())
+    try:
+        token = httpx.post(
+            f"{base}/api/auth/login", json={"username": "admin", "password": "admin@123"}
+        ).json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        tournament_id = httpx.post(
+            f"{base}/api/tournaments/", headers=headers,
+            json={"name": "Load test", "teams": [{"name": "A", "budget": 1000}]}
+        ).json()["id"]
+
+        body = "emp_id,name,type\n" + "".join(
+            f"E{i},Player {i},Batsman\n" for i in range(args.rows)
+        )
+        upload_seconds = []
+
+        def upload():
+            start = time.perf_counter()
+            response = httpx.post(
+                f"{base}/api/tournaments/{tournament_id}/players/upload",
+                params={"mode": "replace", "wait": "true"},
+                files={"file": ("players.csv", body.encode(), "text/csv")},
+                headers=headers, timeout=600
+            )
+            response.raise_for_status()
+            upload_seconds.append(time.perf_counter() - start)
+
+        baseline = measure(base, args.clients, lambda: time.sleep(3))
+        loaded = measure(base, args.clients, upload)
+
+        print(f"/api/health with {args.clients} clients")
+        print(f"  idle          {summary(baseline)}")
+        print(f"  during upload {summary(loaded)}")
+        print(f"  upload of {args.rows} rows took {upload_seconds[0]:.2f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: building and encoding a tournament's player list.
+
+Compares, at 1k, 10k and 100k players:
+    fastapi   dict per row, jsonable_encoder, then json (FastAPI's default path)
+    json      dict per row encoded with the json module (cached views)
+    orjson    dict per row encoded with orjson (AUCTION_JSON_ENCODER=orjson)
+    columns   tuple per row (format=columns) encoded with orjson
+
+Times include fetching the rows. Runs against a throw-away database file.
+
+    python benchmarks/json_serialization.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+import database  # noqa: E402
+from loaders import load_players  # noqa: E402
+from serializers import get_encoder  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000)
+REPEAT = 3
+
+
+def seed(conn, players):
+    conn.execute("DELETE FROM tournaments")
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO tournaments (name, created_by) VALUES ('Bench', 'admin')")
+    tournament_id = cursor.lastrowid
+    cursor.executemany(
+        "INSERT OR REPLACE INTO people (emp_id, name, type) VALUES (?, ?, ?)",
+        [(f"E{i}", f"Player {i}", ("Batsman", "Bowler", "All-rounder")[i % 3]) for i in range(players)]
+    )
+    cursor.executemany(
+        "INSERT INTO players (tournament_id, emp_id, bid_amount) VALUES (?, ?, ?)",
+        [(tournament_id, f"E{i}", i % 50) for i in range(players)]
+    )
+    conn.commit()
+    return tournament_id
+
+
+def best_of(fn):
+    """Fastest of REPEAT runs, in ms, and the encoded size"""
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000, len(body)
+
+
+def main():
+    json_dumps = get_encoder("json")
+    try:
+        orjson_dumps = get_encoder("orjson")
+    except RuntimeError as e:
+        print(f"{e}; only the json paths are measured")
+        orjson_dumps = None
+
+    paths = {
+        "fastapi": lambda cursor, t: json_dumps(jsonable_encoder(load_players(cursor, t)[0])),
+        "json": lambda cursor, t: json_dumps(load_players(cursor, t)[0]),
+    }
+    if orjson_dumps is not None:
+        paths["orjson"] = lambda cursor, t: orjson_dumps(load_players(cursor, t)[0])
+        paths["columns"] = lambda cursor, t: orjson_dumps(load_players(cursor, t, columnar=True)[0])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_PATH = os.path.join(tmp, "bench.db")
+        database.init_db()
+        conn = database.get_db()
+
+        print(f"{'players':>8} | " + " | ".join(f"{name:>9} ms {'KiB':>6}" for name in paths))
+        for size in SIZES:
+            tournament_id = seed(conn, size)
+            cells = []
+            for path in paths.values():
+                ms, length = best_of(lambda: path(conn.cursor(), tournament_id))
+                cells.append(f"{ms:>12.1f} {length / 1024:>6.0f}")
+            print(f"{size:>8} | " + " | ".join(cells))
+
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
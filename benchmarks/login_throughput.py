@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark: POST /api/auth/login throughput at several scrypt costs.
+
+For each AUCTION_SCRYPT_N value, fires a burst of concurrent logins at the app
+in-process (httpx ASGI transport) and reports logins per second, latency, and
+the longest event loop stall seen meanwhile, which stays small because hashes
+run on the password threads. Runs against a throw-away database file.
+
+    python benchmarks/login_throughput.py [--logins 64] [--concurrency 16]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import database  # noqa: E402
+import passwords  # noqa: E402
+
+COSTS = (2 ** 12, 2 ** 13, 2 ** 14, 2 ** 15)
+
+
+async def burst(app, logins, concurrency):
+    """(elapsed seconds, latencies, longest loop stall) for one burst"""
+    latencies = []
+    stalls = [0.0]
+    done = asyncio.Event()
+
+    async def watch_loop():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stalls.append(time.perf_counter() - started - 0.001)
+
+    async def worker(client, count):
+        for _ in range(count):
+            started = time.perf_counter()
+            response = await client.post("/api/auth/login", json={"username": "admin", "password": "admin@123"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        watcher = asyncio.create_task(watch_loop())
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(client, logins // concurrency) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+        done.set()
+        await watcher
+    return elapsed, latencies, max(stalls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_PATH = os.path.join(tmp, "bench.db")
+        import main as app_module
+
+        print(f"{passwords.PASSWORD_WORKERS} password thread(s), {args.logins} logins, "
+              f"{args.concurrency} concurrent")
+        print(f"{'scrypt N':>9} | {'hash ms':>7} | {'logins/s':>8} | {'p50 ms':>7} {'p99 ms':>7} | {'max loop stall ms':>17}")
+        for cost in COSTS:
+            passwords.SCRYPT_N = cost
+            started = time.perf_counter()
+            stored = passwords.hash_password("admin@123")
+            hash_ms = (time.perf_counter() - started) * 1000
+            conn = database.get_db()
+            conn.execute("UPDATE users SET password = ? WHERE username = 'admin'", (stored,))
+            conn.commit()
+            conn.close()
+
+            elapsed, latencies, stall = asyncio.run(burst(app_module.app, args.logins, args.concurrency))
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(
+                f"{cost:>9} | {hash_ms:>7.1f} | {len(latencies) / elapsed:>8.1f} | "
+                f"{statistics.median(latencies) * 1000:>7.1f} {p99 * 1000:>7.1f} | {stall * 1000:>17.1f}"
+            )
+
+        database.close_writer()
+        database.close_readers()
+        passwords.close_hashing()
+        database.close_pool()
+
+
+if __name__ == "__main__":
+    main()
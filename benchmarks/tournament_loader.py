@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: queries and wall time for loading the full tournament tree.
+
+Compares the old per-tournament/per-team query loop with the bulk loader
+used by GET /api/tournaments. Runs against a throw-away database file.
+
+    python benchmarks/tournament_loader.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from loaders import load_tournament_tree  # noqa: E402
+
+TEAMS_PER_TOURNAMENT = 8
+PLAYERS_PER_TEAM = 12
+
+
+def seed(conn, tournaments):
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM tournaments")
+    for t in range(tournaments):
+        cursor.execute(
+            "INSERT INTO tournaments (name, created_by) VALUES (?, ?)",
+            (f"Tournament {t}", "admin")
+        )
+        tournament_id = cursor.lastrowid
+        for k in range(TEAMS_PER_TOURNAMENT):
+            cursor.execute(
+                """INSERT INTO teams (tournament_id, name, total_budget, remaining_budget)
+                   VALUES (?, ?, 1000, 1000)""",
+                (tournament_id, f"Team {k}")
+            )
+            team_id = cursor.lastrowid
+            cursor.executemany(
+                "INSERT OR IGNORE INTO people (emp_id, name, type) VALUES (?, ?, 'Batsman')",
+                [(f"E{k}-{p}", f"Player {k}-{p}") for p in range(PLAYERS_PER_TEAM)]
+            )
+            cursor.executemany(
+                """INSERT INTO players (tournament_id, team_id, emp_id, bid_amount, is_assigned)
+                   VALUES (?, ?, ?, 10, 1)""",
+                [(tournament_id, team_id, f"E{k}-{p}") for p in range(PLAYERS_PER_TEAM)]
+            )
+    conn.commit()
+
+
+def load_n_plus_one(cursor):
+    """The query pattern get_tournaments used before the bulk loader"""
+    cursor.execute("SELECT * FROM tournaments ORDER BY created_at DESC")
+    for tournament in cursor.fetchall():
+        cursor.execute("SELECT * FROM teams WHERE tournament_id = ?", (tournament["id"],))
+        for team in cursor.fetchall():
+            cursor.execute(
+                "SELECT * FROM player_details WHERE tournament_id = ? AND team_id = ?",
+                (tournament["id"], team["id"])
+            )
+            cursor.fetchall()
+        cursor.execute("SELECT * FROM player_details WHERE tournament_id = ?", (tournament["id"],))
+        cursor.fetchall()
+
+
+def measure(conn, loader):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    started = time.perf_counter()
+    loader(conn.cursor())
+    elapsed = time.perf_counter() - started
+    conn.set_trace_callback(None)
+    return len(statements), elapsed * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_PATH = os.path.join(tmp, "bench.db")
+        database.init_db()
+        conn = database.get_db()
+
+        print(f"{'tournaments':>12} | {'N+1 queries':>11} {'ms':>8} | {'bulk queries':>12} {'ms':>8}")
+        for tournaments in (10, 50, 100, 250, 500):
+            seed(conn, tournaments)
+            old_queries, old_ms = measure(conn, load_n_plus_one)
+            new_queries, new_ms = measure(conn, load_tournament_tree)
+            print(
+                f"{tournaments:>12} | {old_queries:>11} {old_ms:>8.1f} | "
+                f"{new_queries:>12} {new_ms:>8.1f}"
+            )
+
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
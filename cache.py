@@ -0,0 +1,260 @@
+"""
+Read-through cache for tournament views.
+
+Responses are cached as encoded JSON under a scope (one per tournament, plus
+"all" for views spanning every tournament) and a view name. Every write to a
+tournament calls invalidate(tournament_id), which bumps the scope's generation
+so older entries are never served again; a load that raced with the write is
+stored under the old generation and is therefore never read.
+
+Backends (AUCTION_CACHE_BACKEND):
+    memory  in-process LRU with TTL (default)
+    redis   any Redis-compatible server at AUCTION_CACHE_REDIS_URL, shared by
+            all workers; requires the `redis` package
+    none    caching disabled
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from compression import COMPRESS_MIN_BYTES, compress
+from serializers import encode_json
+
+CACHE_BACKEND = os.environ.get("AUCTION_CACHE_BACKEND", "memory")
+CACHE_MAX_ENTRIES = int(os.environ.get("AUCTION_CACHE_MAX_ENTRIES", "512"))
+CACHE_TTL_SECONDS = float(os.environ.get("AUCTION_CACHE_TTL_SECONDS", "60"))
+CACHE_REDIS_URL = os.environ.get("AUCTION_CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_REDIS_PREFIX = os.environ.get("AUCTION_CACHE_REDIS_PREFIX", "auction:cache:")
+
+# Scope of views that cover every tournament
+ALL_TOURNAMENTS = "all"
+
+# ==================== BACKENDS ====================
+
+class MemoryBackend:
+    """LRU of at most max_entries, each expiring ttl seconds after it is stored"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, int, bytes]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    async def generation(self, scope: str) -> int:
+        return self._generations.get(scope, 0)
+
+    async def get(self, scope: str, view: str, generation: int) -> Optional[bytes]:
+        key = (scope, view)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, entry_generation, value = entry
+            if entry_generation != generation or expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, scope: str, view: str, generation: int, value: bytes):
+        with self._lock:
+            if self._generations.get(scope, 0) != generation:
+                return
+            self._entries[(scope, view)] = (time.monotonic() + self.ttl, generation, value)
+            self._entries.move_to_end((scope, view))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def invalidate(self, scope: str):
+        with self._lock:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            for key in [key for key in self._entries if key[0] == scope]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "evictions": self.evictions
+        }
+
+class RedisBackend:
+    """
+    Entries in a Redis-compatible server, keyed by scope generation and
+    expiring after ttl seconds. Configure the server with an LRU maxmemory
+    policy (e.g. allkeys-lru) to bound its size.
+    """
+
+    name = "redis"
+
+    def __init__(self, client=None, url: str = CACHE_REDIS_URL, ttl: float = CACHE_TTL_SECONDS,
+                 prefix: str = CACHE_REDIS_PREFIX):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError(
+                    "AUCTION_CACHE_BACKEND=redis requires the redis package (pip install redis)"
+                )
+            client = redis.from_url(url)
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _generation_key(self, scope: str) -> str:
+        return f"{self.prefix}gen:{scope}"
+
+    def _key(self, scope: str, view: str, generation: int) -> str:
+        return f"{self.prefix}{scope}:{generation}:{view}"
+
+    async def generation(self, scope: str) -> int:
+        value = await self.client.get(self._generation_key(scope))
+        return int(value) if value is not None else 0
+
+    async def get(self, scope: str, view: str, generation: int) -> Optional[bytes]:
+        return await self.client.get(self._key(scope, view, generation))
+
+    async def set(self, scope: str, view: str, generation: int, value: bytes):
+        await self.client.set(self._key(scope, view, generation), value, ex=max(1, int(self.ttl)))
+
+    async def invalidate(self, scope: str):
+        await self.client.incr(self._generation_key(scope))
+
+    def stats(self) -> dict:
+        return {"ttl_seconds": self.ttl}
+
+class NullBackend:
+    """Caching disabled: every lookup misses and nothing is stored"""
+
+    name = "none"
+
+    async def generation(self, scope: str) -> int:
+        return 0
+
+    async def get(self, scope: str, view: str, generation: int) -> Optional[bytes]:
+        return None
+
+    async def set(self, scope: str, view: str, generation: int, value: bytes):
+        pass
+
+    async def invalidate(self, scope: str):
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
+BACKENDS = {
+    "memory": MemoryBackend,
+    "redis": RedisBackend,
+    "none": NullBackend,
+}
+
+# ==================== RESPONSE CACHE ====================
+
+class ResponseCache:
+    """
+    Read-through cache with hit/miss metrics. Concurrent misses for the same
+    view share one load. Use from the event loop thread.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else BACKENDS[CACHE_BACKEND]()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._loading: Dict[Tuple[str, str, int], asyncio.Future] = {}
+
+    async def get_or_load(
+        self,
+        tournament_id: Optional[int],
+        view: str,
+        load: Callable[[], Awaitable[Any]]
+    ) -> bytes:
+        """Encoded JSON for the view, from the cache or from load()"""
+        scope = ALL_TOURNAMENTS if tournament_id is None else str(tournament_id)
+        generation = await self.backend.generation(scope)
+        body = await self.backend.get(scope, view, generation)
+        if body is not None:
+            self.hits += 1
+            return body
+
+        self.misses += 1
+        flight = (scope, view, generation)
+        pending = self._loading.get(flight)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        pending = self._loading[flight] = asyncio.get_running_loop().create_future()
+        try:
+            body = encode_json(await load())
+            await self.backend.set(scope, view, generation, body)
+        except BaseException as e:
+            pending.set_exception(e)
+            # Retrieved here so an unawaited failure is not logged
+            pending.exception()
+            raise
+        else:
+            pending.set_result(body)
+            return body
+        finally:
+            del self._loading[flight]
+
+    async def get_or_load_encoded(
+        self,
+        tournament_id: Optional[int],
+        view: str,
+        load: Callable[[], Awaitable[Any]],
+        encoding: Optional[str]
+    ) -> Tuple[bytes, Optional[str]]:
+        """
+        (body, content encoding) for the view. Bodies of at least
+        AUCTION_COMPRESS_MIN_BYTES are compressed with `encoding` once and the
+        compressed bytes cached beside the plain ones.
+        """
+        if encoding is None:
+            return await self.get_or_load(tournament_id, view, load), None
+
+        scope = ALL_TOURNAMENTS if tournament_id is None else str(tournament_id)
+        encoded_view = f"{view}@{encoding}"
+        generation = await self.backend.generation(scope)
+        body = await self.backend.get(scope, encoded_view, generation)
+        if body is not None:
+            self.hits += 1
+            return body, encoding
+
+        plain = await self.get_or_load(tournament_id, view, load)
+        if len(plain) < COMPRESS_MIN_BYTES:
+            return plain, None
+        body = await asyncio.to_thread(compress, plain, encoding)
+        # Stored under the generation read above, so a body compressed from a
+        # newer load is at worst unreachable, never stale
+        await self.backend.set(scope, encoded_view, generation, body)
+        return body, encoding
+
+    async def invalidate(self, tournament_id: int):
+        """Drop cached views of a tournament and the all-tournament views"""
+        self.invalidations += 1
+        await self.backend.invalidate(str(tournament_id))
+        await self.backend.invalidate(ALL_TOURNAMENTS)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "invalidations": self.invalidations,
+            **self.backend.stats()
+        }
+
+response_cache = ResponseCache()
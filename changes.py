@@ -0,0 +1,154 @@
+"""
+Change log for incremental tournament sync.
+
+Every insert, update and delete of a tournament's teams and players (and a
+rename of the tournament) bumps tournaments.revision and appends a row to the
+changes table, both from the triggers in migration v0008. A client holding
+revision N asks for the entities changed since N and gets their current rows,
+plus the ids of deleted ones.
+
+Compaction keeps only the latest entry per entity, which loses nothing a sync
+needs, and drops delete tombstones older than the retention period. Clients
+older than the dropped tombstones are told to reload (reset).
+
+    python changes.py compact
+    python changes.py --db other.db compact
+"""
+import argparse
+import os
+import sqlite3
+import sys
+from typing import Dict, Optional
+
+import database
+
+CHANGES_RETENTION_SECONDS = float(os.environ.get("AUCTION_CHANGES_RETENTION_SECONDS", str(7 * 24 * 3600)))
+CHANGES_COMPACT_SECONDS = float(os.environ.get("AUCTION_CHANGES_COMPACT_SECONDS", "300"))
+
+def team_payload(team) -> Dict:
+    """A team as in the tournament detail view, without its players"""
+    return {
+        "id": team["id"],
+        "name": team["name"],
+        "totalBudget": team["total_budget"],
+        "remainingBudget": team["remaining_budget"],
+        "captain_id": team["captain_id"],
+        "vice_captain_id": team["vice_captain_id"],
+        "version": team["version"]
+    }
+
+def _id_list(ids) -> str:
+    """Ids as a JSON array, bound as one parameter however many there are"""
+    return "[" + ",".join(str(int(i)) for i in ids) + "]"
+
+def _missing(ids, rows):
+    present = {row["id"] for row in rows}
+    return sorted(set(ids) - present)
+
+def load_changes(conn: sqlite3.Connection, tournament_id: int, since: int) -> Optional[Dict]:
+    """Rows changed after revision `since`, or None if the tournament does not exist"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM tournaments WHERE id = ?", (tournament_id,))
+    tournament = cursor.fetchone()
+    if tournament is None:
+        return None
+
+    result = {
+        "tournament_id": tournament_id,
+        "since": since,
+        "revision": tournament["revision"],
+        "reset": False,
+        "tournament": None,
+        "teams": [],
+        "players": [],
+        "deleted": {"teams": [], "players": []}
+    }
+
+    cursor.execute("SELECT revision FROM change_floors WHERE tournament_id = ?", (tournament_id,))
+    floor = cursor.fetchone()
+    if since > tournament["revision"] or (floor is not None and since < floor["revision"]):
+        # Ahead of the server or behind compacted history: reload in full
+        result["reset"] = True
+        return result
+    if since == tournament["revision"]:
+        return result
+
+    cursor.execute(
+        "SELECT DISTINCT entity, entity_id FROM changes WHERE tournament_id = ? AND revision > ?",
+        (tournament_id, since)
+    )
+    changed = {"tournament": [], "team": [], "player": []}
+    for row in cursor.fetchall():
+        changed[row["entity"]].append(row["entity_id"])
+
+    if changed["tournament"]:
+        result["tournament"] = {
+            "id": tournament["id"],
+            "name": tournament["name"],
+            "createdAt": tournament["created_at"]
+        }
+
+    if changed["team"]:
+        cursor.execute(
+            "SELECT * FROM teams WHERE tournament_id = ? AND id IN (SELECT value FROM json_each(?)) ORDER BY id",
+            (tournament_id, _id_list(changed["team"]))
+        )
+        rows = cursor.fetchall()
+        result["teams"] = [team_payload(row) for row in rows]
+        result["deleted"]["teams"] = _missing(changed["team"], rows)
+
+    if changed["player"]:
+        cursor.execute(
+            "SELECT * FROM player_details WHERE tournament_id = ? AND id IN (SELECT value FROM json_each(?)) ORDER BY id",
+            (tournament_id, _id_list(changed["player"]))
+        )
+        rows = cursor.fetchall()
+        result["players"] = [dict(row) for row in rows]
+        result["deleted"]["players"] = _missing(changed["player"], rows)
+
+    return result
+
+def compact_changes(conn: sqlite3.Connection, retention_seconds: float = CHANGES_RETENTION_SECONDS) -> int:
+    """Compact the change log and return how many rows were removed (caller commits)"""
+    # Superseded entries: only the latest change per entity matters to a sync
+    removed = conn.execute("""
+        DELETE FROM changes
+         WHERE id NOT IN (SELECT MAX(id) FROM changes GROUP BY tournament_id, entity, entity_id)
+    """).rowcount
+    # Expired tombstones raise the floor clients can sync from
+    cutoff = f"{-int(retention_seconds)} seconds"
+    conn.execute("""
+        INSERT INTO change_floors (tournament_id, revision)
+        SELECT tournament_id, MAX(revision) FROM changes
+         WHERE op = 'delete' AND changed_at < datetime('now', ?)
+         GROUP BY tournament_id
+        ON CONFLICT(tournament_id) DO UPDATE SET revision = MAX(revision, excluded.revision)
+    """, (cutoff,))
+    removed += conn.execute(
+        "DELETE FROM changes WHERE op = 'delete' AND changed_at < datetime('now', ?)", (cutoff,)
+    ).rowcount
+    # The app's deletes clean up through a trigger; this covers manual edits
+    removed += conn.execute(
+        "DELETE FROM changes WHERE tournament_id NOT IN (SELECT id FROM tournaments)"
+    ).rowcount
+    return removed
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python changes.py", description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--db", default=database.DATABASE_PATH, help="database file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    conn = database._connect(args.db)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        removed = compact_changes(conn)
+        conn.commit()
+        print(f"✅ Change log compacted ({removed} entries removed)")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Response compression.
+
+CompressionMiddleware compresses whole responses of a compressible type once
+they reach AUCTION_COMPRESS_MIN_BYTES, using brotli when the client accepts it
+and the `brotli` package is installed, gzip otherwise. Streaming responses
+(server-sent events, image files) and responses that already carry a
+Content-Encoding, such as precompressed cached views, pass through untouched.
+A compressed response's ETag is suffixed with its coding (encoded_etag).
+"""
+import asyncio
+import gzip
+import os
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.environ.get("AUCTION_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("AUCTION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("AUCTION_BROTLI_QUALITY", "5"))
+
+# Every content-coding this server may produce, most preferred first
+ENCODINGS = ("br", "gzip")
+
+def supported_encodings() -> tuple:
+    """Encodings this server can produce, most preferred first"""
+    return ENCODINGS if brotli is not None else ("gzip",)
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """
+    The ETag of a body sent with `encoding`. A strong validator names one
+    byte sequence, so each content-coding gets its own: "v-r5" -> "v-r5-gzip".
+    """
+    if encoding is None or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported encoding allowed by an Accept-Encoding header, or None"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        # mtime=0 keeps the output identical for identical bodies
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding {encoding!r}")
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type == "text/event-stream":
+        return False
+    return (
+        content_type.startswith("text/")
+        or content_type.endswith(("json", "javascript", "xml"))
+    )
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            passthrough = True
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if (
+                not message.get("more_body", False)
+                and "content-encoding" not in headers
+                and is_compressible(headers.get("content-type", ""))
+            ):
+                if "accept-encoding" not in headers.get("vary", "").lower():
+                    headers.add_vary_header("Accept-Encoding")
+                if len(body) >= self.minimum_size:
+                    body = await asyncio.to_thread(compress, body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    if "etag" in headers:
+                        headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                    message = {**message, "body": body}
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
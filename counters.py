@@ -0,0 +1,131 @@
+"""
+Consistency check and rebuild for the auction counters.
+
+tournament_stats and team_stats are maintained by triggers on the tournaments,
+teams and players tables (migration v0006). This module recomputes them from
+the base tables to verify or repair them.
+
+    python counters.py check      # exit 1 if any counter has drifted
+    python counters.py rebuild    # recompute every counter
+    python counters.py --db other.db check
+"""
+import argparse
+import sqlite3
+import sys
+from typing import List
+
+import database
+
+# Recomputed counters, in the column order of the stats tables
+EXPECTED_TOURNAMENT_STATS = """
+    SELECT t.id AS tournament_id,
+           COUNT(p.id) AS total_players,
+           COALESCE(SUM(p.is_assigned = 1), 0) AS assigned_players,
+           COALESCE(SUM(CASE WHEN p.is_assigned = 1 THEN COALESCE(p.bid_amount, 0) ELSE 0 END), 0) AS total_bids
+      FROM tournaments t
+      LEFT JOIN players p ON p.tournament_id = t.id
+     GROUP BY t.id
+"""
+
+EXPECTED_TEAM_STATS = """
+    SELECT t.id AS team_id,
+           t.tournament_id AS tournament_id,
+           COUNT(p.id) AS roster_size,
+           COALESCE(SUM(COALESCE(p.bid_amount, 0)), 0) AS spent
+      FROM teams t
+      LEFT JOIN players p ON p.team_id = t.id
+     GROUP BY t.id
+"""
+
+# Money totals are REAL; differences below this are rounding, not drift
+TOLERANCE = 1e-6
+
+def check_counters(conn: sqlite3.Connection) -> List[str]:
+    """Describe every counter row that differs from a recount (empty if consistent)"""
+    problems = []
+
+    rows = conn.execute(f"""
+        WITH expected AS ({EXPECTED_TOURNAMENT_STATS})
+        SELECT e.tournament_id, e.total_players, e.assigned_players, e.total_bids,
+               s.total_players, s.assigned_players, s.total_bids
+          FROM expected e
+          LEFT JOIN tournament_stats s ON s.tournament_id = e.tournament_id
+         WHERE s.tournament_id IS NULL
+            OR s.total_players != e.total_players
+            OR s.assigned_players != e.assigned_players
+            OR ABS(s.total_bids - e.total_bids) > {TOLERANCE}
+        UNION ALL
+        SELECT s.tournament_id, NULL, NULL, NULL, s.total_players, s.assigned_players, s.total_bids
+          FROM tournament_stats s
+         WHERE NOT EXISTS (SELECT 1 FROM tournaments t WHERE t.id = s.tournament_id)
+    """).fetchall()
+    for row in rows:
+        problems.append(
+            f"tournament {row[0]}: expected total/assigned/bids "
+            f"{row[1]}/{row[2]}/{row[3]}, stored {row[4]}/{row[5]}/{row[6]}"
+        )
+
+    rows = conn.execute(f"""
+        WITH expected AS ({EXPECTED_TEAM_STATS})
+        SELECT e.team_id, e.roster_size, e.spent, s.roster_size, s.spent
+          FROM expected e
+          LEFT JOIN team_stats s ON s.team_id = e.team_id
+         WHERE s.team_id IS NULL
+            OR s.tournament_id != e.tournament_id
+            OR s.roster_size != e.roster_size
+            OR ABS(s.spent - e.spent) > {TOLERANCE}
+        UNION ALL
+        SELECT s.team_id, NULL, NULL, s.roster_size, s.spent
+          FROM team_stats s
+         WHERE NOT EXISTS (SELECT 1 FROM teams t WHERE t.id = s.team_id)
+    """).fetchall()
+    for row in rows:
+        problems.append(
+            f"team {row[0]}: expected roster/spent {row[1]}/{row[2]}, "
+            f"stored {row[3]}/{row[4]}"
+        )
+
+    return problems
+
+def rebuild_counters(conn: sqlite3.Connection):
+    """Recompute all counters from the base tables (caller commits)"""
+    conn.execute("DELETE FROM tournament_stats")
+    conn.execute("DELETE FROM team_stats")
+    conn.execute(f"""
+        INSERT INTO tournament_stats (tournament_id, total_players, assigned_players, total_bids)
+        {EXPECTED_TOURNAMENT_STATS}
+    """)
+    conn.execute(f"""
+        INSERT INTO team_stats (team_id, tournament_id, roster_size, spent)
+        {EXPECTED_TEAM_STATS}
+    """)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python counters.py", description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["check", "rebuild"])
+    parser.add_argument("--db", default=database.DATABASE_PATH, help="database file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    conn = database._connect(args.db)
+    try:
+        if args.command == "rebuild":
+            conn.execute("BEGIN IMMEDIATE")
+            rebuild_counters(conn)
+            conn.commit()
+            print("✅ Auction counters rebuilt")
+            return 0
+
+        problems = check_counters(conn)
+        for problem in problems:
+            print(problem)
+        if problems:
+            print(f"{len(problems)} counter row(s) out of date; run `python counters.py rebuild`")
+            return 1
+        print("✅ Auction counters are consistent")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,105 +1,330 @@
+import asyncio
+import logging
+import os
+import queue
 import sqlite3
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable
 
-DATABASE_PATH = "cricket_auction.db"
+from migrations import migrate
 
-def get_db():
-    """Get database connection"""
-    conn = sqlite3.connect(DATABASE_PATH)
+logger = logging.getLogger(__name__)
+
+DATABASE_PATH = os.environ.get("AUCTION_DB_PATH", "cricket_auction.db")
+
+# Connection pool settings
+POOL_SIZE = int(os.environ.get("AUCTION_DB_POOL_SIZE", "8"))
+POOL_TIMEOUT_SECONDS = float(os.environ.get("AUCTION_DB_POOL_TIMEOUT", "10"))
+STATEMENT_CACHE_SIZE = int(os.environ.get("AUCTION_DB_STATEMENT_CACHE", "256"))
+LEAK_TIMEOUT_SECONDS = float(os.environ.get("AUCTION_DB_LEAK_TIMEOUT", "30"))
+
+# SQLite tuning
+JOURNAL_MODE = os.environ.get("AUCTION_DB_JOURNAL_MODE", "WAL")
+SYNCHRONOUS = os.environ.get("AUCTION_DB_SYNCHRONOUS", "NORMAL")
+CACHE_SIZE = int(os.environ.get("AUCTION_DB_CACHE_SIZE", "-16000"))  # negative = KiB
+MMAP_SIZE = int(os.environ.get("AUCTION_DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+BUSY_TIMEOUT_MS = int(os.environ.get("AUCTION_DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Applied to every new connection
+CONNECTION_PRAGMAS = {
+    "foreign_keys": "ON",
+    "synchronous": SYNCHRONOUS,
+    "cache_size": CACHE_SIZE,
+    "mmap_size": MMAP_SIZE,
+    "busy_timeout": BUSY_TIMEOUT_MS,
+}
+
+def _connect(path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open a connection with the row factory and per-connection PRAGMAs applied"""
+    conn = sqlite3.connect(
+        path,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=check_same_thread
+    )
     conn.row_factory = sqlite3.Row
+    for pragma, value in CONNECTION_PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
     return conn
 
+def get_db():
+    """Get database connection"""
+    return _connect(DATABASE_PATH)
+
+# ==================== CONNECTION POOL ====================
+
+class PoolExhaustedError(RuntimeError):
+    """Raised when no pooled connection becomes free within the timeout"""
+
+class ConnectionPool:
+    """
+    Fixed-size pool of long-lived SQLite connections.
+    Connections are opened lazily up to `size` and handed out LIFO so the
+    warmest statement cache is reused first. Connections held longer than
+    `leak_timeout` seconds are reported along with the stack that took them.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int = POOL_SIZE,
+        timeout: float = POOL_TIMEOUT_SECONDS,
+        leak_timeout: float = LEAK_TIMEOUT_SECONDS
+    ):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.leak_timeout = leak_timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._checked_out = {}
+        self._closed = False
+
+    def acquire(self) -> sqlite3.Connection:
+        """Borrow a connection, opening a new one if the pool is not full yet"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open_or_wait()
+        
+        stack = traceback.format_stack(limit=8)[:-1] if self.leak_timeout > 0 else None
+        with self._lock:
+            self._checked_out[id(conn)] = (time.monotonic(), stack)
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection, rolling back anything left uncommitted"""
+        with self._lock:
+            self._checked_out.pop(id(conn), None)
+        
+        if self._closed:
+            conn.close()
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Broken connection: drop it and let the pool open a fresh one
+            with self._lock:
+                self._opened -= 1
+            conn.close()
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager around acquire/release"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def find_leaks(self) -> list:
+        """Return (held_seconds, stack) for connections held past the leak timeout"""
+        if self.leak_timeout <= 0:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            held = list(self._checked_out.values())
+        return [
+            (now - since, stack)
+            for since, stack in held
+            if now - since > self.leak_timeout
+        ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_use = len(self._checked_out)
+            opened = self._opened
+        return {"size": self.size, "opened": opened, "in_use": in_use, "idle": self._idle.qsize()}
+
+    def close(self):
+        """Close idle connections; borrowed ones are closed when released"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _open_or_wait(self) -> sqlite3.Connection:
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return _connect(self.path, check_same_thread=False)
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        
+        self._report_leaks()
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolExhaustedError(
+                f"No database connection available after {self.timeout}s "
+                f"(pool size {self.size})"
+            )
+
+    def _report_leaks(self):
+        for held_seconds, stack in self.find_leaks():
+            logger.warning(
+                "Database connection held for %.1fs, possible leak. Acquired at:\n%s",
+                held_seconds, "".join(stack or [])
+            )
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """Return the shared pool, recreating it if DATABASE_PATH has changed"""
+    global _pool
+    pool = _pool
+    if pool is None or pool.path != DATABASE_PATH:
+        with _pool_lock:
+            if _pool is None or _pool.path != DATABASE_PATH:
+                if _pool is not None:
+                    _pool.close()
+                _pool = ConnectionPool(DATABASE_PATH)
+            pool = _pool
+    return pool
+
+def close_pool():
+    """Close the shared pool (application shutdown)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+# ==================== ASYNC READS ====================
+
+_read_executor = None
+
+def _get_read_executor() -> ThreadPoolExecutor:
+    global _read_executor
+    if _read_executor is None:
+        with _pool_lock:
+            if _read_executor is None:
+                # One thread per pooled connection, so a reader never waits on the pool
+                _read_executor = ThreadPoolExecutor(
+                    max_workers=POOL_SIZE, thread_name_prefix="db-reader"
+                )
+    return _read_executor
+
+def _read(fn: Callable, args: tuple):
+    with get_pool().connection() as conn:
+        return fn(conn, *args)
+
+async def run_read(fn: Callable, *args):
+    """
+    Run fn(conn, *args) with a pooled connection on the bounded reader threads,
+    keeping sqlite3 calls off the event loop
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_read_executor(), _read, fn, args)
+
+def close_readers():
+    """Finish in-flight reads and stop the reader threads (application shutdown)"""
+    global _read_executor
+    with _pool_lock:
+        if _read_executor is not None:
+            _read_executor.shutdown(wait=True)
+            _read_executor = None
+
+# ==================== SINGLE WRITER ====================
+
+class DatabaseWriter:
+    """
+    Runs every write on one dedicated thread and connection, in submission order.
+    Each job gets the connection inside a BEGIN IMMEDIATE transaction that is
+    committed when the job returns and rolled back if it raises. With WAL,
+    pooled readers never wait for this writer, and serializing writes here
+    means handlers in this process never race each other for the write lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._conn = None
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Queue fn(conn, *args) and return a future for its result"""
+        return self._executor.submit(self._run, fn, args)
+
+    async def run(self, fn: Callable, *args):
+        """Queue fn(conn, *args) and await its result"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _run(self, fn: Callable, args: tuple):
+        if self._conn is None:
+            self._conn = _connect(self.path, check_same_thread=False)
+            self._conn.isolation_level = None
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn, *args)
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        if conn.in_transaction:
+            conn.commit()
+        return result
+
+_writer = None
+
+def get_writer() -> DatabaseWriter:
+    """Return the shared writer, recreating it if DATABASE_PATH has changed"""
+    global _writer
+    writer = _writer
+    if writer is None or writer.path != DATABASE_PATH:
+        with _pool_lock:
+            if _writer is None or _writer.path != DATABASE_PATH:
+                if _writer is not None:
+                    _writer.close()
+                _writer = DatabaseWriter(DATABASE_PATH)
+            writer = _writer
+    return writer
+
+async def run_write(fn: Callable, *args):
+    """Run fn(conn, *args) on the single writer connection"""
+    return await get_writer().run(fn, *args)
+
+def close_writer():
+    """Drain and close the shared writer (application shutdown)"""
+    global _writer
+    with _pool_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+
 def init_db():
-    """Initialize database with tables"""
+    """Initialize database schema (see migrations/)"""
     conn = get_db()
-    cursor = conn.cursor()
-    
-    # Users table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # Tournaments table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tournaments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            created_by TEXT NOT NULL
-        )
-    """)
-    
-    # Teams table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS teams (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tournament_id INTEGER NOT NULL,
-            name TEXT NOT NULL,
-            total_budget REAL NOT NULL,
-            remaining_budget REAL NOT NULL,
-            captain_id TEXT,
-            vice_captain_id TEXT,
-            FOREIGN KEY (tournament_id) REFERENCES tournaments (id) ON DELETE CASCADE,
-            UNIQUE(tournament_id, name)
-        )
-    """)
-    
-    # Players table - Check if image_filename column exists, add if not
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS players (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tournament_id INTEGER NOT NULL,
-            team_id INTEGER,
-            emp_id TEXT NOT NULL,
-            name TEXT NOT NULL,
-            type TEXT NOT NULL,
-            bid_amount REAL DEFAULT 0,
-            is_assigned BOOLEAN DEFAULT 0,
-            image_filename TEXT,
-            FOREIGN KEY (tournament_id) REFERENCES tournaments (id) ON DELETE CASCADE,
-            FOREIGN KEY (team_id) REFERENCES teams (id) ON DELETE SET NULL,
-            UNIQUE(tournament_id, emp_id)
-        )
-    """)
-    
-    # Check if image_filename column exists, if not add it
-    try:
-        cursor.execute("SELECT image_filename FROM players LIMIT 1")
-    except sqlite3.OperationalError:
-        # Column doesn't exist, add it
-        cursor.execute("ALTER TABLE players ADD COLUMN image_filename TEXT")
-        print("✅ Added image_filename column to players table")
     
-    # Check if captain columns exist in teams, if not add them
-    try:
-        cursor.execute("SELECT captain_id FROM teams LIMIT 1")
-    except sqlite3.OperationalError:
-        cursor.execute("ALTER TABLE teams ADD COLUMN captain_id TEXT")
-        cursor.execute("ALTER TABLE teams ADD COLUMN vice_captain_id TEXT")
-        print("✅ Added captain columns to teams table")
+    # WAL lets readers proceed while a write is in progress; the mode is
+    # persistent, so it only needs to be set once per database file
+    conn.execute(f"PRAGMA journal_mode = {JOURNAL_MODE}")
     
-    # Insert default users if not exists
-    try:
-        cursor.execute(
-            "INSERT INTO users (username, password, role) VALUES (?, ?, ?)", 
-            ("admin", "admin@123", "admin")
-        )
-        cursor.execute(
-            "INSERT INTO users (username, password, role) VALUES (?, ?, ?)", 
-            ("auctioneer", "auction@123", "auctioneer")
-        )
-        cursor.execute(
-            "INSERT INTO users (username, password, role) VALUES (?, ?, ?)", 
-            ("guest", "guest123", "guest")
-        )
-    except sqlite3.IntegrityError:
-        pass
+    # No-op without any DDL when the schema is already current
+    migrate(conn)
     
-    conn.commit()
     conn.close()
-    print("✅ Database initialized successfully!")
\ No newline at end of file
+    print("✅ Database initialized successfully!")
@@ -0,0 +1,216 @@
+"""
+Player image derivatives.
+
+Square avatars of each player image at AUCTION_IMAGE_SIZES pixels (default
+64,128,256,512), saved as WebP and in the original's format (PNG if it has
+transparency, JPEG otherwise) under player_images/derived/ as
+`{stem}-{size}.{ext}`. Resizing is CPU-bound, so it runs on a pool of
+AUCTION_IMAGE_WORKERS processes: after each upload, and for images already in
+player_images/ with
+
+    python derivatives.py backfill [--force]
+
+find_variant() picks the file to serve for a requested size. Making
+derivatives needs Pillow; without it uploads still work and the original is
+served at every size.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import re
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import images
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+IMAGE_SIZES = tuple(sorted(int(s) for s in os.environ.get("AUCTION_IMAGE_SIZES", "64,128,256,512").split(",")))
+IMAGE_WORKERS = int(os.environ.get("AUCTION_IMAGE_WORKERS", str(os.cpu_count() or 1)))
+WEBP_QUALITY = int(os.environ.get("AUCTION_WEBP_QUALITY", "80"))
+JPEG_QUALITY = int(os.environ.get("AUCTION_JPEG_QUALITY", "85"))
+
+SOURCE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+derived_dir = images.derived_dir
+
+# ==================== RENDERING (worker processes) ====================
+
+def _save(image, path: str, extension: str):
+    """Write to a temporary name and rename, so readers never see half a file"""
+    partial = path + ".part"
+    if extension == "webp":
+        image.save(partial, format="WEBP", quality=WEBP_QUALITY, method=4)
+    elif extension == "png":
+        image.save(partial, format="PNG", optimize=True)
+    else:
+        image.save(partial, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    os.replace(partial, path)
+
+def render_derivatives(source: str, out_dir: str, stem: str, sizes: Tuple[int, ...]) -> List[str]:
+    """Write every derivative of one image; returns the file names written"""
+    os.makedirs(out_dir, exist_ok=True)
+    with Image.open(source) as opened:
+        image = ImageOps.exif_transpose(opened)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    fallback = "png" if has_alpha else "jpg"
+
+    # No upscaling, except to the smallest size
+    smallest_side = min(image.size)
+    targets = [size for size in sizes if size <= smallest_side] or [min(sizes)]
+
+    written = []
+    for size in targets:
+        thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        for extension in ("webp", fallback):
+            name = f"{stem}-{size}.{extension}"
+            _save(thumbnail, os.path.join(out_dir, name), extension)
+            written.append(name)
+
+    # Drop derivatives of an earlier upload that this one did not replace
+    pattern = re.compile(re.escape(stem) + r"-\d+\.(webp|jpg|png)")
+    for name in os.listdir(out_dir):
+        if pattern.fullmatch(name) and name not in written:
+            os.unlink(os.path.join(out_dir, name))
+    return written
+
+# ==================== RENDERING POOL ====================
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Forking a process that runs threads can deadlock the child
+            _executor = ProcessPoolExecutor(
+                max_workers=IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+def close_derivatives():
+    """Stop the rendering processes (application shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+def queue_derivatives(filename: str) -> Optional[Future]:
+    """
+    Start rendering the derivatives of player_images/filename on the process
+    pool, from any thread. None without Pillow, or if they are already current
+    (a duplicate upload of stored content).
+    """
+    if Image is None:
+        return None
+    source = images.IMAGES_DIR / filename
+    if _is_current(source):
+        return None
+    return _get_executor().submit(
+        render_derivatives, str(source), str(derived_dir()), source.stem, IMAGE_SIZES
+    )
+
+async def make_derivatives(filename: str) -> List[str]:
+    """Render the derivatives of player_images/filename; returns their names"""
+    if Image is None:
+        return []
+    future = await asyncio.to_thread(queue_derivatives, filename)
+    if future is None:
+        return await asyncio.to_thread(existing_derivatives, Path(filename).stem)
+    return await asyncio.wrap_future(future)
+
+# ==================== SELECTION ====================
+
+def find_variant(filename: str, size: Optional[int], accept_webp: bool) -> Path:
+    """
+    Smallest derivative at least `size` pixels wide, WebP first if accepted;
+    the original when no size is given or no derivative is large enough.
+    """
+    # Stored names come from uploads and imports; never leave player_images/
+    filename = Path(filename).name
+    if size is not None:
+        stem = Path(filename).stem
+        extensions = ("webp", "jpg", "png") if accept_webp else ("jpg", "png")
+        for candidate in IMAGE_SIZES:
+            if candidate < size:
+                continue
+            for extension in extensions:
+                path = derived_dir() / f"{stem}-{candidate}.{extension}"
+                if path.is_file():
+                    return path
+    return images.IMAGES_DIR / filename
+
+def accepts_webp(accept: Optional[str]) -> bool:
+    return bool(accept) and "image/webp" in accept
+
+# ==================== BACKFILL ====================
+
+def _is_current(source: Path) -> bool:
+    """
+    True if the source's smallest WebP derivative exists and, unless the
+    source is content-addressed (so never changes), is newer than it
+    """
+    first = derived_dir() / f"{source.stem}-{IMAGE_SIZES[0]}.webp"
+    if not first.is_file():
+        return False
+    return images.is_content_addressed(source.name) or first.stat().st_mtime >= source.stat().st_mtime
+
+def existing_derivatives(stem: str) -> List[str]:
+    pattern = re.compile(re.escape(stem) + r"-\d+\.(webp|jpg|png)")
+    if not derived_dir().is_dir():
+        return []
+    return sorted(name for name in os.listdir(derived_dir()) if pattern.fullmatch(name))
+
+def backfill(force: bool = False) -> Tuple[int, int]:
+    """Render derivatives for every image lacking current ones: (made, failed)"""
+    sources = [
+        path for path in sorted(images.IMAGES_DIR.iterdir())
+        if path.is_file() and not path.name.startswith(".")
+        and path.suffix.lower() in SOURCE_EXTENSIONS
+        and (force or not _is_current(path))
+    ]
+    made = failed = 0
+    executor = _get_executor()
+    futures = {
+        executor.submit(render_derivatives, str(path), str(derived_dir()), path.stem, IMAGE_SIZES): path
+        for path in sources
+    }
+    for future in as_completed(futures):
+        try:
+            future.result()
+            made += 1
+        except Exception as e:
+            failed += 1
+            print(f"⚠️ {futures[future].name}: {e}")
+    return made, failed
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python derivatives.py", description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--force", action="store_true", help="re-render images whose derivatives are current")
+    args = parser.parse_args(argv)
+
+    if Image is None:
+        print("⚠️ Pillow is not installed (pip install Pillow); no derivatives made")
+        return 1
+    images.IMAGES_DIR.mkdir(exist_ok=True)
+    try:
+        made, failed = backfill(force=args.force)
+    finally:
+        close_derivatives()
+    print(f"✅ Derivatives made for {made} image(s)" + (f", {failed} failed" if failed else ""))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
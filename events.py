@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+# Events kept per tournament for clients resuming from a sequence number
+HISTORY_SIZE = int(os.environ.get("AUCTION_EVENTS_HISTORY", "1000"))
+# Undelivered events a subscriber may fall behind by before it is dropped
+SUBSCRIBER_QUEUE_SIZE = int(os.environ.get("AUCTION_EVENTS_QUEUE_SIZE", "256"))
+
+# ==================== EVENTS ====================
+
+class Event:
+    """A published event, encoded once and shared by every subscriber"""
+
+    __slots__ = ("seq", "type", "json", "sse")
+
+    def __init__(self, seq: int, event_type: str, tournament_id: int, data: Dict):
+        self.seq = seq
+        self.type = event_type
+        self.json = json.dumps({
+            "seq": seq,
+            "type": event_type,
+            "tournament_id": tournament_id,
+            "data": data
+        })
+        self.sse = f"id: {seq}\nevent: {event_type}\ndata: {self.json}\n\n"
+
+class Subscriber:
+    """
+    One connected client. Events are queued without waiting; a subscriber whose
+    queue is full is dropped and receives None so its connection can be closed.
+    """
+
+    def __init__(self, tournament_id: int, queue_size: int):
+        self.tournament_id = tournament_id
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    def offer(self, event: Event) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.drop()
+            return False
+
+    def drop(self):
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[Event]:
+        return await self.queue.get()
+
+class TournamentChannel:
+    def __init__(self, history_size: int):
+        self.seq = 0
+        self.history = deque(maxlen=history_size)
+        self.subscribers = set()
+
+class EventBroker:
+    """
+    Per-tournament fan-out of mutation events with a bounded replay history.
+    Must be used from the event loop thread.
+    """
+
+    def __init__(self, history_size: int = HISTORY_SIZE, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self._channels: Dict[int, TournamentChannel] = {}
+
+    def publish(self, tournament_id: int, event_type: str, data: Dict) -> int:
+        """Broadcast an event and return its sequence number"""
+        channel = self._channel(tournament_id)
+        channel.seq += 1
+        event = Event(channel.seq, event_type, tournament_id, data)
+        channel.history.append(event)
+
+        dropped = [sub for sub in channel.subscribers if not sub.offer(event)]
+        for sub in dropped:
+            channel.subscribers.discard(sub)
+        return event.seq
+
+    def publish_many(self, tournament_id: int, events: Iterable):
+        """Publish (event_type, data) pairs in order"""
+        for event_type, data in events:
+            self.publish(tournament_id, event_type, data)
+
+    def subscribe(self, tournament_id: int, since: Optional[int] = None) -> Subscriber:
+        """
+        Register a subscriber. With `since`, events after that sequence number
+        are replayed first; if they are no longer in history a single `resync`
+        event tells the client to reload full state.
+        """
+        channel = self._channel(tournament_id)
+        sub = Subscriber(tournament_id, self.queue_size)
+        if since is not None:
+            for event in self._replay(tournament_id, channel, since):
+                if not sub.offer(event):
+                    return sub
+        channel.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        channel = self._channels.get(sub.tournament_id)
+        if channel is not None:
+            channel.subscribers.discard(sub)
+
+    def stats(self) -> Dict:
+        return {
+            "tournaments": len(self._channels),
+            "subscribers": sum(len(c.subscribers) for c in self._channels.values())
+        }
+
+    def _channel(self, tournament_id: int) -> TournamentChannel:
+        channel = self._channels.get(tournament_id)
+        if channel is None:
+            channel = self._channels[tournament_id] = TournamentChannel(self.history_size)
+        return channel
+
+    def _replay(self, tournament_id: int, channel: TournamentChannel, since: int) -> List[Event]:
+        if since == channel.seq:
+            return []
+        oldest = channel.history[0].seq if channel.history else channel.seq + 1
+        # Cursor from before the retained history, or from a previous process,
+        # or a backlog that would fill the queue, so the subscriber would be
+        # dropped straight away and reconnect with the same cursor forever
+        if since < oldest - 1 or since > channel.seq or channel.seq - since >= self.queue_size:
+            return [Event(channel.seq, "resync", tournament_id, {"seq": channel.seq})]
+        return [event for event in channel.history if event.seq > since]
+
+broker = EventBroker()
+
+def budget_changed(cursor, team_id: int):
+    """("budget-changed", data) for a team's budget as seen by this cursor"""
+    cursor.execute(
+        "SELECT id, total_budget, remaining_budget, version FROM teams WHERE id = ?",
+        (team_id,)
+    )
+    team = cursor.fetchone()
+    return ("budget-changed", {
+        "team_id": team["id"],
+        "total_budget": team["total_budget"],
+        "remaining_budget": team["remaining_budget"],
+        "version": team["version"]
+    })
@@ -0,0 +1,115 @@
+"""
+Bulk player image import from a ZIP or tar archive.
+
+The archive holds one `<emp_id>.<ext>` image per player (folders are
+ignored). unpack_archive() reads it entry by entry on a worker thread, so
+memory use stays at one chunk whatever the archive size: each entry for a
+player of the tournament is copied to a staging file under the per-image size
+cap, checked by its leading bytes and stored by content hash like a single
+upload. Derivative rendering for each stored image is queued on the
+derivatives process pool as soon as it is stored, so it overlaps with reading
+the rest of the archive. The caller then applies every image_filename update
+in one transaction.
+"""
+import os
+import tarfile
+import zipfile
+import zlib
+from concurrent.futures import Future
+from pathlib import PurePosixPath
+from typing import BinaryIO, Dict, Iterator, List, Set, Tuple
+
+from derivatives import queue_derivatives
+from images import IMAGE_MAX_BYTES, INVALID_TYPE, publish_staged, sniff_image, stage_stream
+
+ARCHIVE_MAX_BYTES = int(os.environ.get("AUCTION_IMAGE_ARCHIVE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+TOO_LARGE = f"Image too large. Maximum size is {IMAGE_MAX_BYTES // (1024 * 1024)} MB"
+
+class ArchiveError(ValueError):
+    """The upload is not a readable ZIP or tar archive"""
+
+def _entries(path: str) -> Iterator[Tuple[str, int, BinaryIO]]:
+    """(name, declared size, open stream) for each regular file in the archive"""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as stream:
+                    yield info.filename, info.file_size, stream
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path, "r:*") as archive:
+            # Links, devices and the like are never opened
+            for member in archive:
+                if not member.isfile():
+                    continue
+                with archive.extractfile(member) as stream:
+                    yield member.name, member.size, stream
+    else:
+        raise ArchiveError("Expected a ZIP or tar archive")
+
+def _check_name(name: str, emp_ids: Set[str], stored: Dict[str, str]) -> Tuple[str, str, str]:
+    """(emp_id, status, detail); status is empty when the entry should be read"""
+    base = PurePosixPath(name).name
+    stem, extension = os.path.splitext(base)
+    if name.startswith("__MACOSX/") or base.startswith("."):
+        return stem, "skipped", "Hidden or system file"
+    if extension.lower() not in IMAGE_EXTENSIONS:
+        return stem, "skipped", "Not named <emp_id>.jpg, .png or .webp"
+    if stem not in emp_ids:
+        return stem, "skipped", "No player with this emp_id in the tournament"
+    if stem in stored:
+        return stem, "failed", "An earlier image in the archive was already used for this emp_id"
+    return stem, "", ""
+
+def unpack_archive(path: str, emp_ids: Set[str]) -> Tuple[List[Dict], Dict[str, str]]:
+    """
+    Store every usable image in the archive. Returns the per-file report and
+    {emp_id: stored image filename} for the players to update.
+    """
+    report: List[Dict] = []
+    updates: Dict[str, str] = {}
+    rendering: List[Tuple[Dict, Future]] = []
+
+    try:
+        for name, declared_size, stream in _entries(path):
+            emp_id, status, detail = _check_name(name, emp_ids, updates)
+            entry = {"file": name, "emp_id": emp_id}
+            report.append(entry)
+            if not status and declared_size > IMAGE_MAX_BYTES:
+                status, detail = "failed", TOO_LARGE
+            if status:
+                entry.update(status=status, detail=detail)
+                continue
+
+            # Declared sizes can lie (compressed entries), so the cap is also
+            # enforced while copying
+            staged = stage_stream(stream, IMAGE_MAX_BYTES)
+            if staged is None:
+                entry.update(status="failed", detail=TOO_LARGE)
+                continue
+            staged.extension = sniff_image(staged.head)
+            if staged.extension is None:
+                staged.discard()
+                entry.update(status="failed", detail=INVALID_TYPE)
+                continue
+
+            filename = publish_staged(staged)
+            updates[emp_id] = filename
+            entry.update(status="imported", filename=filename)
+            future = queue_derivatives(filename)
+            if future is not None:
+                rendering.append((entry, future))
+    except (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError, RuntimeError, NotImplementedError) as e:
+        # Corrupt, truncated, encrypted or unsupported compression
+        raise ArchiveError(f"Unreadable archive: {e}")
+
+    # The images stand even where avatars could not be made, as for one upload
+    for entry, future in rendering:
+        try:
+            future.result()
+        except Exception as e:
+            entry["detail"] = f"Stored, but derivatives failed: {e}"
+    return report, updates
@@ -0,0 +1,403 @@
+"""
+Player image storage.
+
+receive_image() parses a multipart/form-data request as it arrives and
+streams the image part into a temporary file inside player_images/, so an
+upload holds one network chunk in memory at a time. Disk writes and hashing
+run on a worker thread, the size cap is enforced while streaming (413 as soon
+as it is exceeded), and the format is taken from the file's leading bytes
+rather than the declared content type or filename.
+
+Images are stored by content: publish_image() renames the file into place as
+`{sha256}.{ext}`, atomically, or drops it if identical content is already
+stored. A stored file therefore never changes, so ImageFiles serves it as
+immutable. Files no player references any more are removed by
+collect_garbage(), periodically and with
+
+    python images.py gc          # remove unreferenced images
+    python images.py migrate     # move `{emp_id}.{ext}` images to content names
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.staticfiles import StaticFiles
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+
+import database
+
+IMAGES_DIR = Path("player_images")
+IMAGE_MAX_BYTES = int(os.environ.get("AUCTION_IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+# Room for multipart boundaries and part headers around the image itself
+FORM_OVERHEAD_BYTES = 64 * 1024
+CHUNK_BYTES = 64 * 1024
+IMAGE_GC_SECONDS = float(os.environ.get("AUCTION_IMAGE_GC_SECONDS", "3600"))
+# Files younger than this are kept even if unreferenced: an upload publishes
+# its file before the player row points at it
+IMAGE_GC_GRACE_SECONDS = float(os.environ.get("AUCTION_IMAGE_GC_GRACE_SECONDS", "3600"))
+
+INVALID_TYPE = "Invalid file type. Only JPG, PNG, and WebP images are allowed"
+
+# `{sha256}.{ext}` originals and `{sha256}-{size}.{ext}` derivatives
+CONTENT_NAME = re.compile(r"[0-9a-f]{64}(-\d+)?\.(jpg|png|webp)")
+# Derivatives of any original, `{stem}-{size}.{ext}`
+DERIVED_NAME = re.compile(r"(.+)-\d+\.(webp|jpg|png)")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+def derived_dir() -> Path:
+    return IMAGES_DIR / "derived"
+
+def is_content_addressed(filename: str) -> bool:
+    return CONTENT_NAME.fullmatch(filename) is not None
+
+def sniff_image(head: bytes) -> Optional[str]:
+    """File extension for JPEG, PNG or WebP leading bytes, else None"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+@dataclass
+class StagedFile:
+    """A received file waiting in a temporary file"""
+    path: str
+    size: int = 0
+    head: bytes = b""
+    digest: str = ""
+    extension: str = ""
+
+    @property
+    def filename(self) -> str:
+        return f"{self.digest}.{self.extension}"
+
+    def discard(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+class _FilePartParser:
+    """Multipart callbacks that collect the bytes of one file field"""
+
+    def __init__(self, field: str):
+        self.field = field
+        self.header_name = b""
+        self.header_value = b""
+        self.disposition = b""
+        self.in_field = False
+        self.found = False
+        self.pending: List[bytes] = []
+
+    def on_part_begin(self):
+        self.disposition = b""
+        self.in_field = False
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self.header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        if self.header_name.lower() == b"content-disposition":
+            self.disposition = self.header_value
+        self.header_name = b""
+        self.header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.disposition)
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        # Only the first part with the field name is kept
+        self.in_field = name == self.field and b"filename" in options and not self.found
+        self.found = self.found or self.in_field
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self.in_field:
+            self.pending.append(data[start:end])
+
+    def on_part_end(self):
+        self.in_field = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+def _too_large(max_bytes: int, what: str = "Image") -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"{what} too large. Maximum size is {max_bytes // (1024 * 1024)} MB"
+    )
+
+def _write(target, hasher, data: bytes):
+    hasher.update(data)
+    target.write(data)
+
+def _finish(target):
+    target.flush()
+    os.fsync(target.fileno())
+    target.close()
+
+def _staging_file(directory: Path) -> Tuple[StagedFile, BinaryIO]:
+    directory.mkdir(exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    return StagedFile(path), os.fdopen(fd, "wb")
+
+async def receive_file(
+    request: Request,
+    field: str = "file",
+    max_bytes: int = IMAGE_MAX_BYTES,
+    directory: Optional[Path] = None,
+    what: str = "Image"
+) -> StagedFile:
+    """
+    Stream the `field` file of a multipart request into a temporary file in
+    `directory` (player_images/ by default, so publishing is a rename)
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes + FORM_OVERHEAD_BYTES:
+        raise _too_large(max_bytes, what)
+
+    staged, target = _staging_file(directory or IMAGES_DIR)
+    part = _FilePartParser(field)
+    parser = MultipartParser(params[b"boundary"], part.callbacks())
+    hasher = hashlib.sha256()
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes + FORM_OVERHEAD_BYTES:
+                raise _too_large(max_bytes, what)
+            parser.write(chunk)
+            if not part.pending:
+                continue
+            data = b"".join(part.pending)
+            part.pending.clear()
+            staged.size += len(data)
+            if staged.size > max_bytes:
+                raise _too_large(max_bytes, what)
+            if len(staged.head) < 16:
+                staged.head = (staged.head + data)[:16]
+            await asyncio.to_thread(_write, target, hasher, data)
+        parser.finalize()
+        await asyncio.to_thread(_finish, target)
+    except MultipartParseError as e:
+        target.close()
+        staged.discard()
+        raise HTTPException(status_code=400, detail=f"Malformed multipart upload: {e}")
+    except BaseException:
+        target.close()
+        staged.discard()
+        raise
+
+    if not part.found or staged.size == 0:
+        staged.discard()
+        raise HTTPException(status_code=400, detail=f"No file uploaded in the `{field}` field")
+    staged.digest = hasher.hexdigest()
+    return staged
+
+async def receive_image(request: Request, field: str = "file", max_bytes: int = IMAGE_MAX_BYTES) -> StagedFile:
+    """receive_file() for a single JPG, PNG or WebP image"""
+    staged = await receive_file(request, field, max_bytes)
+    extension = sniff_image(staged.head)
+    if extension is None:
+        staged.discard()
+        raise HTTPException(status_code=400, detail=INVALID_TYPE)
+    staged.extension = extension
+    return staged
+
+def stage_stream(source: BinaryIO, max_bytes: int = IMAGE_MAX_BYTES) -> Optional[StagedFile]:
+    """
+    Copy a readable stream (e.g. an archive member) into a staging file in
+    player_images/, a chunk at a time; None if it is over max_bytes
+    """
+    staged, target = _staging_file(IMAGES_DIR)
+    hasher = hashlib.sha256()
+    try:
+        with target:
+            while True:
+                data = source.read(CHUNK_BYTES)
+                if not data:
+                    break
+                staged.size += len(data)
+                if staged.size > max_bytes:
+                    staged.discard()
+                    return None
+                if len(staged.head) < 16:
+                    staged.head = (staged.head + data)[:16]
+                _write(target, hasher, data)
+            target.flush()
+            os.fsync(target.fileno())
+    except BaseException:
+        staged.discard()
+        raise
+    staged.digest = hasher.hexdigest()
+    return staged
+
+def publish_staged(staged: StagedFile) -> str:
+    """Store a staged image under its content name; returns that name"""
+    target = IMAGES_DIR / staged.filename
+    if target.exists():
+        # Same content already stored; refresh it so the collector's grace
+        # period covers the row about to reference it
+        os.utime(target)
+        staged.discard()
+    else:
+        os.replace(staged.path, target)
+    return staged.filename
+
+async def publish_image(staged: StagedFile) -> str:
+    return await asyncio.to_thread(publish_staged, staged)
+
+# ==================== SERVING ====================
+
+class ImageFiles(StaticFiles):
+    """
+    StaticFiles for player_images/. Content-addressed files never change, so
+    they are cacheable for a year with their name as ETag; anything else
+    (images stored before content addressing) must be revalidated.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        name = os.path.basename(full_path)
+        if is_content_addressed(name):
+            response.headers["etag"] = f'"{name}"'
+            response.headers["cache-control"] = IMMUTABLE
+        else:
+            response.headers["cache-control"] = "no-cache"
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+# ==================== GARBAGE COLLECTION ====================
+
+def referenced_images(conn: sqlite3.Connection) -> Set[str]:
+    cursor = conn.cursor()
+    cursor.execute("SELECT DISTINCT image_filename FROM people WHERE image_filename IS NOT NULL")
+    return {row[0] for row in cursor.fetchall()}
+
+def _remove_if_old(path: Path, cutoff: float) -> bool:
+    try:
+        if path.stat().st_mtime > cutoff:
+            return False
+        path.unlink()
+        return True
+    except FileNotFoundError:
+        return False
+
+def collect_garbage(referenced: Set[str], grace: float = IMAGE_GC_GRACE_SECONDS) -> int:
+    """
+    Delete images no player references, derivatives of deleted images and
+    abandoned upload files, all only once older than `grace` seconds.
+    Returns the number of files removed.
+    """
+    if not IMAGES_DIR.is_dir():
+        return 0
+    referenced = {Path(filename).name for filename in referenced}
+    cutoff = time.time() - grace
+    removed = 0
+    kept_stems = set()
+    for path in IMAGES_DIR.iterdir():
+        if not path.is_file():
+            continue
+        if path.name in referenced or not _remove_if_old(path, cutoff):
+            kept_stems.add(path.stem)
+        else:
+            removed += 1
+
+    if derived_dir().is_dir():
+        for path in derived_dir().iterdir():
+            match = DERIVED_NAME.fullmatch(path.name)
+            if match and match.group(1) in kept_stems:
+                continue
+            removed += _remove_if_old(path, cutoff)
+    return removed
+
+# ==================== LEGACY IMAGES ====================
+
+def migrate_legacy_images(conn: sqlite3.Connection) -> Tuple[int, List[str]]:
+    """
+    Copy each referenced image that is not content-addressed to its content
+    name and repoint its players; the old files are left to the collector.
+    Returns (images moved, names that could not be moved).
+    """
+    moved, skipped = 0, []
+    for filename in sorted(referenced_images(conn)):
+        if is_content_addressed(filename):
+            continue
+        path = IMAGES_DIR / Path(filename).name
+        try:
+            data = path.read_bytes()
+        except OSError:
+            skipped.append(filename)
+            continue
+        extension = sniff_image(data[:16])
+        if extension is None:
+            skipped.append(filename)
+            continue
+        target = IMAGES_DIR / f"{hashlib.sha256(data).hexdigest()}.{extension}"
+        if not target.exists():
+            fd, partial = tempfile.mkstemp(dir=IMAGES_DIR, prefix=".upload-", suffix=".part")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(partial, target)
+        conn.execute("UPDATE people SET image_filename = ? WHERE image_filename = ?", (target.name, filename))
+        moved += 1
+    return moved, skipped
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python images.py", description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["gc", "migrate"])
+    parser.add_argument("--db", default=database.DATABASE_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--grace", type=float, default=IMAGE_GC_GRACE_SECONDS,
+                        help="gc: keep unreferenced files younger than this many seconds")
+    args = parser.parse_args(argv)
+
+    conn = database._connect(args.db)
+    try:
+        if args.command == "migrate":
+            conn.execute("BEGIN IMMEDIATE")
+            moved, skipped = migrate_legacy_images(conn)
+            conn.commit()
+            print(f"✅ {moved} image(s) moved to content-addressed names")
+            for filename in skipped:
+                print(f"⚠️ {filename}: missing or not a JPG, PNG or WebP image; left as is")
+            return 0
+
+        removed = collect_garbage(referenced_images(conn), grace=args.grace)
+        print(f"✅ {removed} unreferenced image file(s) removed")
+        return 0
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""
+Streaming player import.
+
+Uploaded files are read in chunks of IMPORT_CHUNK_ROWS rows (pandas chunked
+CSV reader, openpyxl read-only mode for .xlsx) and validated with column
+operations on the calling thread. Memory stays bounded by the chunk size
+however large the file is.
+
+Only the SQL goes to the database writer: each chunk is one executemany into
+the import_rows staging table, committed on its own, so other writes (bids)
+run between chunks. A last short writer job moves the staged rows into people
+and players in one transaction, so the tournament changes all at once or,
+if the import fails or is cancelled, not at all.
+"""
+import codecs
+import os
+import sqlite3
+import time
+import uuid
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from fastapi import HTTPException
+
+from database import get_pool, get_writer
+from people import changed_tournaments, last_change, save_people
+from utils import read_uploaded_file
+
+IMPORT_CHUNK_ROWS = int(os.environ.get("AUCTION_IMPORT_CHUNK_ROWS", "5000"))
+# Staged rows older than this belong to a process that stopped mid-import
+STAGING_MAX_AGE_SECONDS = 24 * 3600
+
+REQUIRED_COLUMNS = ['emp_id', 'name', 'type']
+# Cell values treated as blank, compared case-insensitively after stripping
+MISSING_VALUES = ['', 'nan', 'none']
+# Errors listed in the report; the rest are only counted
+MAX_REPORTED_ERRORS = 10
+
+# ==================== READERS ====================
+
+def _csv_encoding(stream: BinaryIO, block_size: int = 1 << 20) -> str:
+    """utf-8 if the whole stream decodes as utf-8, otherwise latin-1"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        while True:
+            block = stream.read(block_size)
+            if not block:
+                decoder.decode(b'', final=True)
+                return 'utf-8'
+            decoder.decode(block)
+    except UnicodeDecodeError:
+        return 'latin-1'
+    finally:
+        stream.seek(0)
+
+def _stream_size(stream: BinaryIO) -> int:
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    return size
+
+def _read_csv(stream: BinaryIO, chunk_size: int) -> Iterator[Tuple[pd.DataFrame, float]]:
+    size = _stream_size(stream) or 1
+    encoding = _csv_encoding(stream)
+    for chunk in pd.read_csv(stream, encoding=encoding, dtype=str, chunksize=chunk_size):
+        # The parser reads ahead in blocks, so this is an estimate
+        yield chunk, min(stream.tell() / size, 1.0)
+
+def _read_xlsx(stream: BinaryIO, chunk_size: int) -> Iterator[Tuple[pd.DataFrame, float]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        # From the sheet's dimension record; may be missing or overstated
+        expected_rows = max((sheet.max_row or 0) - 1, 1)
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+        read = 0
+
+        chunk = []
+        blank_run = []
+        for row in rows:
+            # Trailing blank rows are not data (pandas drops them too)
+            if all(value is None for value in row):
+                blank_run.append(row)
+                continue
+            chunk.extend(blank_run)
+            blank_run = []
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                read += len(chunk)
+                yield pd.DataFrame(chunk, columns=columns, dtype=object), min(read / expected_rows, 1.0)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns, dtype=object), 1.0
+    finally:
+        workbook.close()
+
+def _read_xls(stream: BinaryIO, chunk_size: int) -> Iterator[Tuple[pd.DataFrame, float]]:
+    # xlrd has no streaming mode; legacy files are loaded whole and then chunked
+    df = read_uploaded_file(stream.read(), "upload.xls")
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size], min((start + chunk_size) / len(df), 1.0)
+
+READERS = {
+    '.csv': _read_csv,
+    '.xlsx': _read_xlsx,
+    '.xls': _read_xls,
+}
+
+def read_chunks(
+    stream: BinaryIO,
+    filename: str,
+    chunk_size: int = IMPORT_CHUNK_ROWS
+) -> Iterator[Tuple[pd.DataFrame, float]]:
+    """
+    Yield the uploaded file as DataFrames of at most chunk_size rows, each with
+    the estimated fraction of the file read so far
+    """
+    file_extension = os.path.splitext(filename)[1].lower()
+    reader = READERS.get(file_extension)
+    if reader is None:
+        raise ValueError(
+            f"Unsupported file format: {file_extension}. "
+            f"Supported formats: .csv, .xlsx, .xls"
+        )
+
+    chunks = reader(stream, chunk_size)
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        except Exception as e:
+            raise ValueError(f"Error reading {file_extension} file: {str(e)}")
+        yield chunk
+
+# ==================== IMPORT ====================
+
+class ImportCancelled(Exception):
+    """Raised from a progress callback to abandon an import"""
+
+class ImportReport:
+    """Running totals of an import; keeps only the first few error messages"""
+
+    def __init__(self):
+        self.total_rows = 0
+        self.added = 0
+        self.skipped = 0
+        self.errors: List[str] = []
+        # Every tournament the import changed; updated names and types show
+        # in other tournaments the same people play in
+        self.changed_tournaments: List[int] = []
+
+    def error_lines(self) -> List[str]:
+        """Errors as listed in the upload response"""
+        lines = list(self.errors)
+        if self.skipped > len(self.errors):
+            lines.append(f"... and {self.skipped - len(self.errors)} more errors")
+        return lines
+
+def _clean(column: pd.Series):
+    """Stripped string values and a mask of blank cells"""
+    values = column.astype(str).str.strip()
+    return values, values.str.lower().isin(MISSING_VALUES)
+
+def _validate(chunk: pd.DataFrame, first_row: int, seen: set, report: ImportReport) -> list:
+    """Return insertable (emp_id, name, type, image_filename) rows and record errors"""
+    emp_ids, no_emp_id = _clean(chunk['emp_id'])
+    names, no_name = _clean(chunk['name'])
+    types, no_type = _clean(chunk['type'])
+    if 'image_filename' in chunk.columns:
+        images, no_image = _clean(chunk['image_filename'])
+        images = images.astype(object).where(~no_image, None)
+    else:
+        images = pd.Series(None, index=chunk.index, dtype=object)
+
+    invalid = no_emp_id | no_name | no_type
+    # Already in the tournament, earlier in the file, or earlier in this chunk
+    duplicate = ~invalid & (emp_ids.isin(seen) | emp_ids.where(~invalid).duplicated())
+    rejected = invalid | duplicate
+    valid = ~rejected
+
+    problems = rejected.to_numpy().nonzero()[0]
+    report.skipped += len(problems)
+    for position in problems[:MAX_REPORTED_ERRORS - len(report.errors)]:
+        if no_emp_id.iat[position]:
+            reason = "emp_id is required"
+        elif no_name.iat[position]:
+            reason = "name is required"
+        elif no_type.iat[position]:
+            reason = "type is required"
+        else:
+            reason = f"Duplicate emp_id '{emp_ids.iat[position]}'"
+        report.errors.append(f"Row {first_row + position}: {reason}")
+
+    seen.update(emp_ids[valid])
+    return list(zip(emp_ids[valid], names[valid], types[valid], images[valid]))
+
+# ==================== STAGING (database writer) ====================
+
+def stage_rows(conn: sqlite3.Connection, job_id: str, rows: list):
+    """Writer job: stage one chunk of validated (emp_id, name, type, image_filename) rows"""
+    staged_at = time.time()
+    conn.executemany(
+        "INSERT INTO import_rows (job_id, emp_id, name, type, image_filename, staged_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [(job_id, *row, staged_at) for row in rows]
+    )
+
+def _purge_stale(cursor: sqlite3.Cursor):
+    cursor.execute(
+        "DELETE FROM import_rows WHERE staged_at < ?", (time.time() - STAGING_MAX_AGE_SECONDS,)
+    )
+
+def discard_staged(conn: sqlite3.Connection, job_id: str):
+    """Writer job: drop an abandoned import's staged rows"""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM import_rows WHERE job_id = ?", (job_id,))
+    _purge_stale(cursor)
+
+def apply_staged(conn: sqlite3.Connection, job_id: str, tournament_id: int, mode: str) -> Tuple[int, List[int]]:
+    """
+    Writer job: move an import's staged rows into people and players.
+    Returns (players added, tournaments changed).
+    """
+    cursor = conn.cursor()
+    before = last_change(cursor)
+
+    # Replace mode: delete existing players
+    if mode == "replace":
+        cursor.execute("DELETE FROM players WHERE tournament_id = ?", (tournament_id,))
+
+    staged = conn.execute(
+        "SELECT emp_id, name, type, image_filename FROM import_rows WHERE job_id = ? ORDER BY id",
+        (job_id,)
+    )
+    save_people(cursor, staged)
+    # Ignores a player added by another write since the file was validated
+    cursor.execute(
+        "INSERT OR IGNORE INTO players (tournament_id, emp_id) "
+        "SELECT ?, emp_id FROM import_rows WHERE job_id = ? ORDER BY id",
+        (tournament_id, job_id)
+    )
+    added = cursor.rowcount
+    cursor.execute("DELETE FROM import_rows WHERE job_id = ?", (job_id,))
+    _purge_stale(cursor)
+    return added, changed_tournaments(cursor, before)
+
+def _existing_emp_ids(conn: sqlite3.Connection, tournament_id: int) -> set:
+    cursor = conn.cursor()
+    cursor.execute("SELECT emp_id FROM players WHERE tournament_id = ?", (tournament_id,))
+    return {row[0] for row in cursor.fetchall()}
+
+# ==================== IMPORT ====================
+
+def import_players(
+    tournament_id: int,
+    stream: BinaryIO,
+    filename: str,
+    mode: str = "replace",
+    chunk_size: int = IMPORT_CHUNK_ROWS,
+    progress: Optional[Callable[[ImportReport, float], None]] = None,
+    job_id: Optional[str] = None
+) -> ImportReport:
+    """
+    Stream players from an uploaded CSV/Excel file into a tournament. Blocks
+    on the database writer, so call it from a worker thread, never the event
+    loop. Raises HTTPException(400) for unreadable, empty or malformed files;
+    nothing is written unless the whole file is imported. progress(report,
+    fraction) is called after each chunk and may raise ImportCancelled to
+    abandon the import.
+    """
+    try:
+        chunks = read_chunks(stream, filename, chunk_size)
+        first, fraction = next(chunks, (None, 0.0))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if first is None or first.empty:
+        raise HTTPException(status_code=400, detail="File is empty")
+
+    # Normalize column names
+    columns = first.columns.str.strip().str.lower()
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing_columns:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Missing columns: {', '.join(missing_columns)}"
+        )
+
+    # Replace mode starts from an empty tournament
+    if mode == "replace":
+        seen = set()
+    else:
+        with get_pool().connection() as conn:
+            seen = _existing_emp_ids(conn, tournament_id)
+
+    job_id = job_id or uuid.uuid4().hex
+    writer = get_writer()
+    report = ImportReport()
+    chunk: Optional[pd.DataFrame] = first
+    try:
+        while chunk is not None:
+            chunk.columns = columns
+            # Header is line 1 of the file
+            rows = _validate(chunk, report.total_rows + 2, seen, report)
+            report.total_rows += len(chunk)
+            if rows:
+                writer.submit(stage_rows, job_id, rows).result()
+                report.added += len(rows)
+            if progress is not None:
+                progress(report, fraction)
+            chunk, fraction = next(chunks, (None, 1.0))
+        report.added, report.changed_tournaments = writer.submit(
+            apply_staged, job_id, tournament_id, mode
+        ).result()
+    except BaseException as e:
+        writer.submit(discard_staged, job_id).result()
+        if isinstance(e, ValueError):
+            raise HTTPException(status_code=400, detail=str(e))
+        raise
+    return report
@@ -0,0 +1,226 @@
+"""
+Background player import jobs.
+
+An upload is copied to a temporary file and queued on a pool of
+AUCTION_IMPORT_WORKERS import threads while the HTTP request returns straight
+away. The import thread parses and validates the file and hands each chunk's
+inserts to the database writer, so the writer is only held for short
+transactions. Progress is updated after every chunk; cancelling a job makes
+the next progress update abandon the import, which discards the rows staged
+so far and leaves the tournament unchanged.
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Dict, Optional
+
+from fastapi import HTTPException
+
+from cache import response_cache
+from events import broker
+from importer import ImportCancelled, ImportReport, import_players
+
+# Seconds a finished job stays available for status requests
+JOB_RETENTION_SECONDS = float(os.environ.get("AUCTION_IMPORT_JOB_RETENTION_SECONDS", "3600"))
+# Imports parsed at the same time; their inserts still take turns on the writer
+IMPORT_WORKERS = int(os.environ.get("AUCTION_IMPORT_WORKERS", "2"))
+
+# ==================== JOBS ====================
+
+class ImportJob:
+    def __init__(self, tournament_id: int, filename: str, mode: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.tournament_id = tournament_id
+        self.filename = filename
+        self.file_type = os.path.splitext(filename)[1].lower()
+        self.mode = mode
+        self.path = path
+        self.status = "queued"
+        self.report = ImportReport()
+        self.fraction = 0.0
+        self.detail: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_requested = False
+        self.future: Optional[Future] = None
+        self.done: Optional[asyncio.Future] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def eta_seconds(self) -> Optional[float]:
+        if self.status != "running" or self.fraction <= 0:
+            return None
+        elapsed = time.time() - self.started_at
+        return round(elapsed * (1 - self.fraction) / self.fraction, 1)
+
+    def result(self) -> dict:
+        """The upload report, in the shape the synchronous upload returned"""
+        response = {
+            "success": True,
+            "message": "Players uploaded successfully",
+            "details": {
+                "file_name": self.filename,
+                "file_type": self.file_type,
+                "mode": self.mode,
+                "total_rows": self.report.total_rows,
+                "players_added": self.report.added,
+                "players_skipped": self.report.skipped
+            }
+        }
+        if self.report.errors:
+            response["errors"] = self.report.error_lines()
+        return response
+
+    def status_dict(self) -> dict:
+        status = {
+            "job_id": self.id,
+            "tournament_id": self.tournament_id,
+            "file_name": self.filename,
+            "mode": self.mode,
+            "status": self.status,
+            "rows_processed": self.report.total_rows,
+            "players_added": self.report.added,
+            "players_skipped": self.report.skipped,
+            "errors": self.report.error_lines(),
+            "progress": round(self.fraction, 3),
+            "eta_seconds": self.eta_seconds(),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "detail": self.detail
+        }
+        if self.status == "completed":
+            status["result"] = self.result()
+        return status
+
+    def _progress(self, report: ImportReport, fraction: float):
+        self.report = report
+        self.fraction = fraction
+        if self.cancel_requested:
+            raise ImportCancelled()
+
+    def _run(self) -> ImportReport:
+        """Import thread job: parse here, write through the database writer"""
+        if self.cancel_requested:
+            raise ImportCancelled()
+        self.status = "running"
+        self.started_at = time.time()
+        with open(self.path, "rb") as stream:
+            return import_players(
+                self.tournament_id, stream, self.filename, self.mode,
+                progress=self._progress, job_id=self.id
+            )
+
+class ImportJobs:
+    """Registry of import jobs for this process. Use from the event loop thread."""
+
+    def __init__(self):
+        self._jobs: Dict[str, ImportJob] = {}
+
+    async def submit(self, tournament_id: int, upload: BinaryIO, filename: str, mode: str) -> ImportJob:
+        """Copy the upload aside and queue its import on the import threads"""
+        self._prune()
+        suffix = os.path.splitext(filename)[1].lower()
+        fd, path = tempfile.mkstemp(prefix="import-", suffix=suffix)
+        with os.fdopen(fd, "wb") as target:
+            await asyncio.to_thread(shutil.copyfileobj, upload, target)
+
+        job = ImportJob(tournament_id, filename, mode, path)
+        self._jobs[job.id] = job
+        job.future = _get_executor().submit(job._run)
+        job.done = asyncio.ensure_future(self._finish(job))
+        return job
+
+    def get(self, tournament_id: int, job_id: str) -> ImportJob:
+        job = self._jobs.get(job_id)
+        if job is None or job.tournament_id != tournament_id:
+            raise HTTPException(status_code=404, detail="Import job not found")
+        return job
+
+    def cancel(self, job: ImportJob):
+        if job.finished:
+            raise HTTPException(status_code=409, detail=f"Import job already {job.status}")
+        job.cancel_requested = True
+        # Jobs still waiting for an import thread are dropped without running
+        job.future.cancel()
+
+    async def _finish(self, job: ImportJob):
+        try:
+            # Shielded: cancelling this task must not cancel a queued import
+            await asyncio.shield(asyncio.wrap_future(job.future))
+        except ImportCancelled:
+            job.status = "cancelled"
+        except asyncio.CancelledError:
+            if not job.future.cancelled():
+                # This task was cancelled (shutdown), not the import
+                raise
+            job.status = "cancelled"
+        except HTTPException as e:
+            job.status = "failed"
+            job.detail = e.detail
+        except Exception as e:
+            job.status = "failed"
+            job.detail = f"Error processing file: {str(e)}"
+        else:
+            job.report = job.future.result()
+            job.status = "completed"
+            job.fraction = 1.0
+            for changed_id in {job.tournament_id, *job.report.changed_tournaments}:
+                await response_cache.invalidate(changed_id)
+            broker.publish(job.tournament_id, "players-uploaded", {
+                "mode": job.mode,
+                "players_added": job.report.added
+            })
+        finally:
+            job.finished_at = time.time()
+            os.unlink(job.path)
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]:
+            del self._jobs[job_id]
+
+    def cancel_all(self):
+        """Ask every unfinished job to stop (application shutdown)"""
+        for job in self._jobs.values():
+            if not job.finished:
+                job.cancel_requested = True
+                job.future.cancel()
+
+import_jobs = ImportJobs()
+
+# ==================== IMPORT THREADS ====================
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix="import")
+        return _executor
+
+def close_imports():
+    """
+    Cancel unfinished imports and stop the import threads (application
+    shutdown). Call before close_writer(): a running import still needs the
+    writer to discard its staged rows.
+    """
+    global _executor
+    import_jobs.cancel_all()
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
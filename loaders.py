@@ -0,0 +1,170 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from serializers import rows_as_columns
+
+# ==================== TOURNAMENT TREE LOADER ====================
+
+def load_tournament_tree(
+    cursor,
+    tournament_id: Optional[int] = None,
+    include_players: bool = True
+) -> List[Dict]:
+    """
+    Load tournaments with their teams and players in three bulk queries.
+    Rows are grouped in memory, so the number of queries does not grow
+    with the number of tournaments or teams. Without include_players the
+    players query is skipped and every player list is empty.
+
+    Returns one entry per tournament:
+        {"tournament": row, "teams": [row, ...],
+         "players": [row, ...], "team_players": {team_id: [row, ...]}}
+    """
+    if tournament_id is None:
+        cursor.execute("SELECT * FROM tournaments ORDER BY created_at DESC")
+        tournaments = cursor.fetchall()
+        cursor.execute("SELECT * FROM teams ORDER BY id")
+        teams = cursor.fetchall()
+        players = []
+        if include_players:
+            cursor.execute("SELECT * FROM player_details ORDER BY id")
+            players = cursor.fetchall()
+    else:
+        cursor.execute("SELECT * FROM tournaments WHERE id = ?", (tournament_id,))
+        tournaments = cursor.fetchall()
+        if not tournaments:
+            return []
+        cursor.execute(
+            "SELECT * FROM teams WHERE tournament_id = ? ORDER BY id",
+            (tournament_id,)
+        )
+        teams = cursor.fetchall()
+        players = []
+        if include_players:
+            cursor.execute(
+                "SELECT * FROM player_details WHERE tournament_id = ? ORDER BY id",
+                (tournament_id,)
+            )
+            players = cursor.fetchall()
+
+    teams_by_tournament = defaultdict(list)
+    for team in teams:
+        teams_by_tournament[team["tournament_id"]].append(team)
+
+    players_by_tournament = defaultdict(list)
+    players_by_team = defaultdict(list)
+    for player in players:
+        players_by_tournament[player["tournament_id"]].append(player)
+        if player["team_id"] is not None:
+            players_by_team[player["team_id"]].append(player)
+
+    return [
+        {
+            "tournament": tournament,
+            "teams": teams_by_tournament.get(tournament["id"], []),
+            "players": players_by_tournament.get(tournament["id"], []),
+            "team_players": {
+                team["id"]: players_by_team.get(team["id"], [])
+                for team in teams_by_tournament.get(tournament["id"], [])
+            }
+        }
+        for tournament in tournaments
+    ]
+
+# ==================== PLAYER LISTINGS ====================
+
+PLAYER_FIELDS = (
+    "id", "tournament_id", "team_id", "emp_id", "name", "type",
+    "bid_amount", "is_assigned", "image_filename"
+)
+
+def load_players(
+    cursor,
+    tournament_id: int,
+    fields: Optional[List[str]] = None,
+    after: Optional[int] = None,
+    limit: Optional[int] = None,
+    type: Optional[str] = None,
+    assigned: Optional[bool] = None,
+    team_id: Optional[int] = None,
+    name_prefix: Optional[str] = None,
+    columnar: bool = False
+) -> Tuple[Any, Optional[int]]:
+    """
+    Players of a tournament in id order, optionally filtered, projected to
+    `fields` and paged by keyset (ids greater than `after`, at most `limit`).
+    Players are read through indexes that yield them in id order, so a page
+    never sorts: a type is checked against the (type, emp_id) index of people
+    as each player is read, and a name prefix first finds the few matching
+    ids through the people name index.
+
+    Returns (players, next_after); next_after is the `after` for the next
+    page, or None when this page is the last. With columnar, players is
+    {"columns": [...], "rows": [tuple, ...]} (columns always include id) and
+    no per-player dict is built.
+    """
+    selected = list(fields) if fields else list(PLAYER_FIELDS)
+    columns = selected if "id" in selected else ["id"] + selected
+    if name_prefix:
+        # Case-insensitive prefix. The subquery runs first, from the name
+        # index to each person's player in this tournament; its id list is
+        # kept sorted, so the outer query reads only those rows, in order.
+        conditions = [
+            "id IN (SELECT s.id FROM people n CROSS JOIN players s"
+            " ON s.tournament_id = ? AND s.emp_id = n.emp_id"
+            " WHERE n.name >= ? COLLATE NOCASE AND n.name < ? COLLATE NOCASE)"
+        ]
+        params: List = [tournament_id, name_prefix, name_prefix + "\U0010ffff"]
+    else:
+        conditions = ["tournament_id = ?"]
+        params = [tournament_id]
+    if type is not None:
+        conditions.append("type = ?")
+        params.append(type)
+    if assigned is not None:
+        conditions.append("is_assigned = ?")
+        params.append(1 if assigned else 0)
+    if team_id is not None:
+        conditions.append("team_id = ?")
+        params.append(team_id)
+    if after is not None:
+        conditions.append("id > ?")
+        params.append(after)
+
+    sql = "SELECT " + ", ".join(columns) + " FROM player_details WHERE " + " AND ".join(conditions) + " ORDER BY id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    if columnar:
+        cursor.row_factory = None
+        cursor.execute(sql, params)
+        players = rows_as_columns(cursor)
+        rows = players["rows"]
+        last_id = rows[-1][columns.index("id")] if rows else None
+    else:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        players = [{field: row[field] for field in selected} for row in rows]
+        last_id = rows[-1]["id"] if rows else None
+
+    next_after = last_id if limit is not None and len(rows) == limit else None
+    return players, next_after
+
+# ==================== REVISIONS ====================
+
+def tournament_etag(cursor, tournament_id: int, view: str) -> Optional[str]:
+    """ETag for a view of one tournament, or None if it does not exist"""
+    cursor.execute("SELECT revision FROM tournaments WHERE id = ?", (tournament_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return f'"{view}-{tournament_id}-r{row["revision"]}"'
+
+def tournaments_etag(cursor, view: str = "tournaments") -> str:
+    """
+    ETag for a view spanning every tournament. Revisions only grow and ids are
+    never reused, so any change alters the count, the highest id or the sum.
+    """
+    cursor.execute("SELECT COUNT(*), MAX(id), SUM(revision) FROM tournaments")
+    count, max_id, revisions = cursor.fetchone()
+    return f'"{view}-{count}-{max_id or 0}-{revisions or 0}"'
@@ -1,28 +1,84 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from pathlib import Path
-from database import init_db, get_db, DATABASE_PATH
+import database
+from cache import response_cache
+from compression import CompressionMiddleware
+from changes import CHANGES_COMPACT_SECONDS, compact_changes
+from database import init_db, close_pool, close_readers, close_writer
+from derivatives import close_derivatives
+from images import IMAGE_GC_SECONDS, IMAGES_DIR, ImageFiles, collect_garbage, referenced_images
+from jobs import close_imports
+from passwords import close_hashing
+from utils import REVOCATION_REFRESH_SECONDS, revoked_tokens, token_cache
 
 # Import routers
-from routers import auth, players, tournaments, teams, auction
+from routers import auth, players, tournaments, teams, auction, events
 
 # Initialize database
 init_db()
 
+async def compact_change_log():
+    """Compact the change log every AUCTION_CHANGES_COMPACT_SECONDS"""
+    while True:
+        await asyncio.sleep(CHANGES_COMPACT_SECONDS)
+        try:
+            await database.run_write(compact_changes)
+        except Exception as e:
+            print(f"⚠️ Change log compaction failed: {e}")
+
+async def refresh_revoked_tokens():
+    """Pick up tokens revoked by other workers every AUCTION_REVOCATION_REFRESH_SECONDS"""
+    while True:
+        await asyncio.sleep(REVOCATION_REFRESH_SECONDS)
+        try:
+            await database.run_read(revoked_tokens.load)
+        except Exception as e:
+            print(f"⚠️ Revoked token refresh failed: {e}")
+
+async def collect_image_garbage():
+    """Remove unreferenced player images every AUCTION_IMAGE_GC_SECONDS"""
+    while True:
+        await asyncio.sleep(IMAGE_GC_SECONDS)
+        try:
+            referenced = await database.run_read(referenced_images)
+            await asyncio.to_thread(collect_garbage, referenced)
+        except Exception as e:
+            print(f"⚠️ Image garbage collection failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await database.run_read(revoked_tokens.load)
+    background = [
+        asyncio.create_task(compact_change_log()),
+        asyncio.create_task(refresh_revoked_tokens()),
+        asyncio.create_task(collect_image_garbage())
+    ]
+    yield
+    for task in background:
+        task.cancel()
+    # Stop imports, finish queued writes and reads, then close pooled database connections
+    close_imports()
+    close_writer()
+    close_readers()
+    close_hashing()
+    close_derivatives()
+    close_pool()
+
 # Create FastAPI app
 app = FastAPI(
     title="Cricket Auction API",
     version="2.0.0",
-    description="Backend API for Cricket Auction Management"
+    description="Backend API for Cricket Auction Management",
+    lifespan=lifespan
 )
 
 # Create player_images directory if it doesn't exist
-IMAGES_DIR = Path("player_images")
 IMAGES_DIR.mkdir(exist_ok=True)
 
-# Mount static files for player images
-app.mount("/images", StaticFiles(directory="player_images"), name="images")
+# Mount static files for player images (content-addressed files are immutable)
+app.mount("/images", ImageFiles(directory=IMAGES_DIR), name="images")
 
 # CORS Configuration
 app.add_middleware(
@@ -37,12 +93,16 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# Compress JSON responses of AUCTION_COMPRESS_MIN_BYTES or more
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(tournaments.router)
 app.include_router(teams.router)
 app.include_router(players.router)  # No prefix - routes defined in players.py
 app.include_router(auction.router)
+app.include_router(events.router)
 
 # ==================== HEALTH CHECK ====================
 
@@ -53,23 +113,24 @@ async def root():
         "status": "online",
         "message": "Cricket Auction API",
         "version": "2.0.0",
-        "database": DATABASE_PATH
+        "database": database.DATABASE_PATH
     }
 
 @app.get("/api/health")
 async def health_check():
     """Detailed health check"""
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM tournaments")
-        tournament_count = cursor.fetchone()[0]
-        conn.close()
+        tournament_count = await database.run_read(
+            lambda conn: conn.execute("SELECT COUNT(*) FROM tournaments").fetchone()[0]
+        )
         
         return {
             "status": "healthy",
             "database": "connected",
-            "tournaments": tournament_count
+            "tournaments": tournament_count,
+            "pool": database.get_pool().stats(),
+            "cache": response_cache.stats(),
+            "tokens": {**token_cache.stats(), "revoked": len(revoked_tokens)}
         }
     except Exception as e:
         return {
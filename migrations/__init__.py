@@ -0,0 +1,131 @@
+"""
+Versioned schema migrations.
+
+Each script in SCRIPTS is a module in this package with a DESCRIPTION and an
+upgrade(conn) function. Scripts run once, in order, each in its own
+transaction, and are recorded in the schema_version table.
+
+A script that rebuilds a table sets REBUILDS_TABLES = True. Foreign key
+enforcement is then switched off around its transaction (it cannot change
+inside one), as SQLite's table-rebuild procedure requires, and
+PRAGMA foreign_key_check must come back clean before it commits.
+
+PRAGMA user_version mirrors the latest applied version. Reading it is a
+header lookup, so a database that is already current is detected without
+importing any script or touching the schema, however many scripts exist.
+"""
+import importlib
+import sqlite3
+from typing import List, Tuple
+
+# Ordered migration scripts. Append new ones; never edit or reorder applied ones.
+SCRIPTS = (
+    "v0001_baseline",
+    "v0002_image_and_captain_columns",
+    "v0003_lookup_indexes",
+    "v0004_default_users",
+    "v0005_team_version",
+    "v0006_auction_counters",
+    "v0007_tournament_revision",
+    "v0008_change_log",
+    "v0009_player_listing_indexes",
+    "v0010_revoked_tokens",
+    "v0011_hash_passwords",
+    "v0012_people",
+    "v0013_people_indexes",
+    "v0014_import_staging",
+)
+
+LATEST_VERSION = len(SCRIPTS)
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Version stamp stored in the database header"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def is_current(conn: sqlite3.Connection) -> bool:
+    return current_version(conn) == LATEST_VERSION
+
+def applied_version(conn: sqlite3.Connection) -> int:
+    """Highest version recorded in schema_version (0 if the table is missing)"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if not exists:
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def pending(conn: sqlite3.Connection) -> List[Tuple[int, str]]:
+    """(version, script) pairs not yet applied"""
+    if is_current(conn):
+        return []
+    done = applied_version(conn)
+    return [(version, SCRIPTS[version - 1]) for version in range(done + 1, LATEST_VERSION + 1)]
+
+def _check_foreign_keys(conn: sqlite3.Connection, script: str):
+    """Fail a table rebuild that left rows pointing at missing parents"""
+    problems = conn.execute("PRAGMA foreign_key_check").fetchall()
+    if problems:
+        tables = sorted({row[0] for row in problems})
+        raise RuntimeError(
+            f"Migration {script} left {len(problems)} row(s) with broken "
+            f"foreign keys in: {', '.join(tables)}"
+        )
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Apply pending migrations and return how many ran.
+    Returns immediately, without any DDL, when the schema is current.
+    """
+    if is_current(conn):
+        return 0
+
+    current = current_version(conn)
+    if current > LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema version {current} is newer than this code "
+            f"supports ({LATEST_VERSION})"
+        )
+
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        steps = pending(conn)
+        for version, script in steps:
+            module = importlib.import_module(f"{__name__}.{script}")
+            rebuild = getattr(module, "REBUILDS_TABLES", False)
+            foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+            if rebuild:
+                conn.execute("PRAGMA foreign_keys = OFF")
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    module.upgrade(conn)
+                    if rebuild:
+                        _check_foreign_keys(conn, script)
+                    conn.execute(
+                        "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                        (version, script)
+                    )
+                    conn.execute(f"PRAGMA user_version = {version}")
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            finally:
+                if rebuild:
+                    conn.execute(f"PRAGMA foreign_keys = {foreign_keys}")
+            print(f"✅ Applied migration {version}: {module.DESCRIPTION}")
+
+        # Covers a schema_version table that is ahead of a stale header stamp
+        conn.execute(f"PRAGMA user_version = {LATEST_VERSION}")
+        return len(steps)
+    finally:
+        conn.isolation_level = isolation_level
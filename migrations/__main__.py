@@ -0,0 +1,46 @@
+"""
+Apply or check schema migrations.
+
+    python -m migrations upgrade         # apply pending migrations
+    python -m migrations check           # exit 1 if any are pending
+    python -m migrations status          # list applied and pending versions
+    python -m migrations --db other.db check
+"""
+import argparse
+import sys
+
+import database
+from migrations import LATEST_VERSION, SCRIPTS, applied_version, current_version, migrate, pending
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m migrations", description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["upgrade", "check", "status"])
+    parser.add_argument("--db", default=database.DATABASE_PATH, help="database file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    conn = database._connect(args.db)
+    try:
+        if args.command == "upgrade":
+            applied = migrate(conn)
+            print(f"Schema at version {current_version(conn)} ({applied} migration(s) applied)")
+            return 0
+
+        if args.command == "status":
+            done = applied_version(conn)
+            for version, script in enumerate(SCRIPTS, start=1):
+                state = "applied" if version <= done else "pending"
+                print(f"{version:>4}  {state:<8} {script}")
+
+        steps = pending(conn)
+        if steps:
+            print(f"{len(steps)} pending migration(s); latest is {LATEST_VERSION}")
+            return 1 if args.command == "check" else 0
+        print(f"Schema is current (version {LATEST_VERSION})")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
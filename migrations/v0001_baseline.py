@@ -0,0 +1,50 @@
+DESCRIPTION = "Users, tournaments, teams and players tables"
+
+
+def upgrade(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tournaments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_by TEXT NOT NULL
+        )
+    """)
+    
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS teams (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tournament_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            total_budget REAL NOT NULL,
+            remaining_budget REAL NOT NULL,
+            FOREIGN KEY (tournament_id) REFERENCES tournaments (id) ON DELETE CASCADE,
+            UNIQUE(tournament_id, name)
+        )
+    """)
+    
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS players (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tournament_id INTEGER NOT NULL,
+            team_id INTEGER,
+            emp_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            bid_amount REAL DEFAULT 0,
+            is_assigned BOOLEAN DEFAULT 0,
+            FOREIGN KEY (tournament_id) REFERENCES tournaments (id) ON DELETE CASCADE,
+            FOREIGN KEY (team_id) REFERENCES teams (id) ON DELETE SET NULL,
+            UNIQUE(tournament_id, emp_id)
+        )
+    """)
@@ -0,0 +1,17 @@
+DESCRIPTION = "players.image_filename, teams.captain_id and teams.vice_captain_id"
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def upgrade(conn):
+    # Databases created by older releases may already have some of these
+    if "image_filename" not in _columns(conn, "players"):
+        conn.execute("ALTER TABLE players ADD COLUMN image_filename TEXT")
+    
+    team_columns = _columns(conn, "teams")
+    if "captain_id" not in team_columns:
+        conn.execute("ALTER TABLE teams ADD COLUMN captain_id TEXT")
+    if "vice_captain_id" not in team_columns:
+        conn.execute("ALTER TABLE teams ADD COLUMN vice_captain_id TEXT")
@@ -0,0 +1,16 @@
+DESCRIPTION = "Indexes for hot player and tournament lookups"
+
+
+def upgrade(conn):
+    # Team rosters: players WHERE tournament_id = ? AND team_id = ?
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_players_tournament_team ON players (tournament_id, team_id)")
+    # Unassigning a deleted team's players and the team_id foreign key check
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_players_team ON players (team_id)")
+    # Global image updates: players WHERE emp_id = ?
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_players_emp_id ON players (emp_id)")
+    # Auction status: players WHERE tournament_id = ? AND is_assigned = 1
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_players_assigned ON players (tournament_id) WHERE is_assigned = 1"
+    )
+    # Tournament list ordering
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tournaments_created_at ON tournaments (created_at)")
@@ -0,0 +1,12 @@
+DESCRIPTION = "Seed default admin, auctioneer and guest users"
+
+
+def upgrade(conn):
+    conn.executemany(
+        "INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, ?)",
+        [
+            ("admin", "admin@123", "admin"),
+            ("auctioneer", "auction@123", "auctioneer"),
+            ("guest", "guest123", "guest"),
+        ]
+    )
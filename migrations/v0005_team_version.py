@@ -0,0 +1,5 @@
+DESCRIPTION = "teams.version for optimistic concurrency on budget changes"
+
+
+def upgrade(conn):
+    conn.execute("ALTER TABLE teams ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
@@ -0,0 +1,119 @@
+DESCRIPTION = "tournament_stats and team_stats counters maintained by triggers"
+
+# A player's contribution to its tournament's counters
+ASSIGNED = "(({row}.is_assigned = 1) * 1)"
+BID = "(CASE WHEN {row}.is_assigned = 1 THEN COALESCE({row}.bid_amount, 0) ELSE 0 END)"
+
+
+def add_player(row):
+    return f"""
+        UPDATE tournament_stats
+           SET total_players = total_players + 1,
+               assigned_players = assigned_players + {ASSIGNED.format(row=row)},
+               total_bids = total_bids + {BID.format(row=row)}
+         WHERE tournament_id = {row}.tournament_id;
+        UPDATE team_stats
+           SET roster_size = roster_size + 1,
+               spent = spent + COALESCE({row}.bid_amount, 0)
+         WHERE team_id = {row}.team_id;
+    """
+
+
+def remove_player(row):
+    return f"""
+        UPDATE tournament_stats
+           SET total_players = total_players - 1,
+               assigned_players = assigned_players - {ASSIGNED.format(row=row)},
+               total_bids = total_bids - {BID.format(row=row)}
+         WHERE tournament_id = {row}.tournament_id;
+        UPDATE team_stats
+           SET roster_size = roster_size - 1,
+               spent = spent - COALESCE({row}.bid_amount, 0)
+         WHERE team_id = {row}.team_id;
+    """
+
+
+def upgrade(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tournament_stats (
+            tournament_id INTEGER PRIMARY KEY,
+            total_players INTEGER NOT NULL DEFAULT 0,
+            assigned_players INTEGER NOT NULL DEFAULT 0,
+            total_bids REAL NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS team_stats (
+            team_id INTEGER PRIMARY KEY,
+            tournament_id INTEGER NOT NULL,
+            roster_size INTEGER NOT NULL DEFAULT 0,
+            spent REAL NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_team_stats_tournament ON team_stats(tournament_id)")
+
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_tournaments_stats_insert AFTER INSERT ON tournaments
+        BEGIN
+            INSERT OR IGNORE INTO tournament_stats (tournament_id) VALUES (NEW.id);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_tournaments_stats_delete AFTER DELETE ON tournaments
+        BEGIN
+            DELETE FROM tournament_stats WHERE tournament_id = OLD.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_teams_stats_insert AFTER INSERT ON teams
+        BEGIN
+            INSERT OR IGNORE INTO team_stats (team_id, tournament_id) VALUES (NEW.id, NEW.tournament_id);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_teams_stats_delete AFTER DELETE ON teams
+        BEGIN
+            DELETE FROM team_stats WHERE team_id = OLD.id;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_players_stats_insert AFTER INSERT ON players
+        BEGIN
+            {add_player("NEW")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_players_stats_delete AFTER DELETE ON players
+        BEGIN
+            {remove_player("OLD")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_players_stats_update
+        AFTER UPDATE OF tournament_id, team_id, bid_amount, is_assigned ON players
+        BEGIN
+            {remove_player("OLD")}
+            {add_player("NEW")}
+        END
+    """)
+
+    # Backfill from the existing rows
+    conn.execute("DELETE FROM tournament_stats")
+    conn.execute("DELETE FROM team_stats")
+    conn.execute("""
+        INSERT INTO tournament_stats (tournament_id, total_players, assigned_players, total_bids)
+        SELECT t.id,
+               COUNT(p.id),
+               COALESCE(SUM(p.is_assigned = 1), 0),
+               COALESCE(SUM(CASE WHEN p.is_assigned = 1 THEN COALESCE(p.bid_amount, 0) ELSE 0 END), 0)
+          FROM tournaments t
+          LEFT JOIN players p ON p.tournament_id = t.id
+         GROUP BY t.id
+    """)
+    conn.execute("""
+        INSERT INTO team_stats (team_id, tournament_id, roster_size, spent)
+        SELECT t.id, t.tournament_id, COUNT(p.id), COALESCE(SUM(COALESCE(p.bid_amount, 0)), 0)
+          FROM teams t
+          LEFT JOIN players p ON p.team_id = t.id
+         GROUP BY t.id
+    """)
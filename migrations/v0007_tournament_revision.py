@@ -0,0 +1,26 @@
+DESCRIPTION = "tournaments.revision bumped by triggers on every tournament, team or player change"
+
+# (trigger name, event, expression giving the changed tournament's id)
+TRIGGERS = [
+    ("trg_tournaments_revision_update", "AFTER UPDATE OF name ON tournaments", "NEW.id"),
+    ("trg_teams_revision_insert", "AFTER INSERT ON teams", "NEW.tournament_id"),
+    ("trg_teams_revision_update", "AFTER UPDATE ON teams", "NEW.tournament_id"),
+    ("trg_teams_revision_delete", "AFTER DELETE ON teams", "OLD.tournament_id"),
+    ("trg_players_revision_insert", "AFTER INSERT ON players", "NEW.tournament_id"),
+    ("trg_players_revision_update", "AFTER UPDATE ON players", "NEW.tournament_id"),
+    ("trg_players_revision_delete", "AFTER DELETE ON players", "OLD.tournament_id"),
+]
+
+
+def upgrade(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(tournaments)")}
+    if "revision" not in columns:
+        conn.execute("ALTER TABLE tournaments ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+
+    for name, event, tournament_id in TRIGGERS:
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name} {event}
+            BEGIN
+                UPDATE tournaments SET revision = revision + 1 WHERE id = {tournament_id};
+            END
+        """)
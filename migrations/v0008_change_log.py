@@ -0,0 +1,85 @@
+DESCRIPTION = "changes log appended by the revision triggers, for incremental sync"
+
+# Triggers from v0007; the change-log triggers below take over the revision bump
+# so the bump and the logged revision happen in one trigger body
+REVISION_TRIGGERS = [
+    "trg_tournaments_revision_update",
+    "trg_teams_revision_insert",
+    "trg_teams_revision_update",
+    "trg_teams_revision_delete",
+    "trg_players_revision_insert",
+    "trg_players_revision_update",
+    "trg_players_revision_delete",
+]
+
+# (trigger name, event, changed tournament id, entity, entity id, op)
+TRIGGERS = [
+    ("trg_tournaments_changes_update", "AFTER UPDATE OF name ON tournaments",
+     "NEW.id", "tournament", "NEW.id", "upsert"),
+    ("trg_teams_changes_insert", "AFTER INSERT ON teams",
+     "NEW.tournament_id", "team", "NEW.id", "upsert"),
+    ("trg_teams_changes_update", "AFTER UPDATE ON teams",
+     "NEW.tournament_id", "team", "NEW.id", "upsert"),
+    ("trg_teams_changes_delete", "AFTER DELETE ON teams",
+     "OLD.tournament_id", "team", "OLD.id", "delete"),
+    ("trg_players_changes_insert", "AFTER INSERT ON players",
+     "NEW.tournament_id", "player", "NEW.id", "upsert"),
+    ("trg_players_changes_update", "AFTER UPDATE ON players",
+     "NEW.tournament_id", "player", "NEW.id", "upsert"),
+    ("trg_players_changes_delete", "AFTER DELETE ON players",
+     "OLD.tournament_id", "player", "OLD.id", "delete"),
+]
+
+
+def upgrade(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tournament_id INTEGER NOT NULL,
+            revision INTEGER NOT NULL,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_changes_tournament_revision ON changes(tournament_id, revision)"
+    )
+    # Oldest revision a client can sync from after compaction dropped tombstones
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_floors (
+            tournament_id INTEGER PRIMARY KEY,
+            revision INTEGER NOT NULL
+        )
+    """)
+
+    for name in REVISION_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    for name, event, tournament_id, entity, entity_id, op in TRIGGERS:
+        # Logged through a SELECT so nothing is written for a tournament
+        # that is being deleted
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name} {event}
+            BEGIN
+                UPDATE tournaments SET revision = revision + 1 WHERE id = {tournament_id};
+                INSERT INTO changes (tournament_id, revision, entity, entity_id, op)
+                SELECT id, revision, '{entity}', {entity_id}, '{op}'
+                  FROM tournaments WHERE id = {tournament_id};
+            END
+        """)
+
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_tournaments_changes_delete AFTER DELETE ON tournaments
+        BEGIN
+            DELETE FROM changes WHERE tournament_id = OLD.id;
+            DELETE FROM change_floors WHERE tournament_id = OLD.id;
+        END
+    """)
+
+    # Changes before this migration were not logged
+    conn.execute("""
+        INSERT OR REPLACE INTO change_floors (tournament_id, revision)
+        SELECT id, revision FROM tournaments
+    """)
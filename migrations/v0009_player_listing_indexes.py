@@ -0,0 +1,15 @@
+DESCRIPTION = "Indexes for paged and filtered player listings"
+
+
+def upgrade(conn):
+    # Every index ends in the implicit rowid, so equality on its columns
+    # yields players in id order for keyset pages (id > ? ORDER BY id)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_players_tournament ON players (tournament_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_players_tournament_type ON players (tournament_id, type)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_players_tournament_is_assigned ON players (tournament_id, is_assigned)"
+    )
+    # Case-insensitive name prefix search
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_players_tournament_name ON players (tournament_id, name COLLATE NOCASE)"
+    )
@@ -0,0 +1,13 @@
+DESCRIPTION = "revoked_tokens for logout, kept until each token expires"
+
+
+def upgrade(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS revoked_tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            token_hash TEXT NOT NULL UNIQUE,
+            expires_at REAL NOT NULL
+        )
+    """)
+    # Pruning expired rows on logout
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens (expires_at)")
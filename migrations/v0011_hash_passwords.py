@@ -0,0 +1,11 @@
+from passwords import hash_password, is_hashed
+
+DESCRIPTION = "Replace plaintext user passwords with scrypt hashes"
+
+
+def upgrade(conn):
+    rows = conn.execute("SELECT id, password FROM users").fetchall()
+    conn.executemany(
+        "UPDATE users SET password = ? WHERE id = ?",
+        [(hash_password(password), user_id) for user_id, password in rows if not is_hashed(password)]
+    )
@@ -0,0 +1,152 @@
+from migrations.v0006_auction_counters import add_player, remove_player
+from migrations.v0008_change_log import TRIGGERS as CHANGE_TRIGGERS
+
+DESCRIPTION = "people master table; players keep tournament membership and auction state"
+
+# players is rebuilt; see migrations/__init__.py
+REBUILDS_TABLES = True
+
+
+def remove_orphans(conn):
+    """
+    Rows left behind when tournaments were deleted with foreign keys off.
+    Players and teams of a missing tournament are deleted; a player whose
+    team is missing becomes unassigned to a team. Returns rows changed.
+    """
+    changed = conn.execute(
+        "DELETE FROM players WHERE tournament_id NOT IN (SELECT id FROM tournaments)"
+    ).rowcount
+    changed += conn.execute(
+        "DELETE FROM teams WHERE tournament_id NOT IN (SELECT id FROM tournaments)"
+    ).rowcount
+    changed += conn.execute(
+        "UPDATE players SET team_id = NULL "
+        "WHERE team_id IS NOT NULL AND team_id NOT IN (SELECT id FROM teams)"
+    ).rowcount
+    return changed
+
+
+def upgrade(conn):
+    # The rebuilt table enforces its foreign keys, so orphans go first, on purpose
+    removed = remove_orphans(conn)
+    if removed:
+        print(f"⚠️ Removed or repaired {removed} player/team row(s) of deleted tournaments")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS people (
+            emp_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            image_filename TEXT
+        )
+    """)
+    # Name and type from each employee's latest player row, and the latest
+    # image any tournament had for them
+    conn.execute("""
+        INSERT OR IGNORE INTO people (emp_id, name, type, image_filename)
+        SELECT p.emp_id, p.name, p.type,
+               (SELECT i.image_filename FROM players i
+                 WHERE i.emp_id = p.emp_id AND i.image_filename IS NOT NULL
+                 ORDER BY i.id DESC LIMIT 1)
+          FROM players p
+         WHERE p.id = (SELECT MAX(l.id) FROM players l WHERE l.emp_id = p.emp_id)
+    """)
+
+    # Rebuild players without the per-person columns. Ids are kept, and so is
+    # the AUTOINCREMENT high-water mark, so the change log's ids stay valid.
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'players'").fetchone()
+    sequence = row[0] if row else 0
+    conn.execute("""
+        CREATE TABLE players_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tournament_id INTEGER NOT NULL,
+            team_id INTEGER,
+            emp_id TEXT NOT NULL,
+            bid_amount REAL DEFAULT 0,
+            is_assigned BOOLEAN DEFAULT 0,
+            FOREIGN KEY (tournament_id) REFERENCES tournaments (id) ON DELETE CASCADE,
+            FOREIGN KEY (team_id) REFERENCES teams (id) ON DELETE SET NULL,
+            FOREIGN KEY (emp_id) REFERENCES people (emp_id),
+            UNIQUE(tournament_id, emp_id)
+        )
+    """)
+    conn.execute("""
+        INSERT INTO players_new (id, tournament_id, team_id, emp_id, bid_amount, is_assigned)
+        SELECT id, tournament_id, team_id, emp_id, bid_amount, is_assigned FROM players
+    """)
+    # Drops the old table's indexes and triggers too; recreated below
+    conn.execute("DROP TABLE players")
+    conn.execute("ALTER TABLE players_new RENAME TO players")
+    conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'players'", (sequence,))
+
+    # Indexes from v0003 and v0009; type and name filters now go through people
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_players_tournament_team ON players (tournament_id, team_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_players_team ON players (team_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_players_emp_id ON players (emp_id)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_players_assigned ON players (tournament_id) WHERE is_assigned = 1"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_players_tournament ON players (tournament_id)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_players_tournament_is_assigned ON players (tournament_id, is_assigned)"
+    )
+
+    # Counter triggers from v0006
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_players_stats_insert AFTER INSERT ON players
+        BEGIN
+            {add_player("NEW")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_players_stats_delete AFTER DELETE ON players
+        BEGIN
+            {remove_player("OLD")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_players_stats_update
+        AFTER UPDATE OF tournament_id, team_id, bid_amount, is_assigned ON players
+        BEGIN
+            {remove_player("OLD")}
+            {add_player("NEW")}
+        END
+    """)
+
+    # Change-log triggers from v0008
+    for name, event, tournament_id, entity, entity_id, op in CHANGE_TRIGGERS:
+        if not event.endswith(" ON players"):
+            continue
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name} {event}
+            BEGIN
+                UPDATE tournaments SET revision = revision + 1 WHERE id = {tournament_id};
+                INSERT INTO changes (tournament_id, revision, entity, entity_id, op)
+                SELECT id, revision, '{entity}', {entity_id}, '{op}'
+                  FROM tournaments WHERE id = {tournament_id};
+            END
+        """)
+
+    # A person's edit is a change to their player row in every tournament
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_people_changes_update AFTER UPDATE ON people
+        WHEN OLD.name IS NOT NEW.name OR OLD.type IS NOT NEW.type
+          OR OLD.image_filename IS NOT NEW.image_filename
+        BEGIN
+            UPDATE tournaments SET revision = revision + 1
+             WHERE id IN (SELECT tournament_id FROM players WHERE emp_id = NEW.emp_id);
+            INSERT INTO changes (tournament_id, revision, entity, entity_id, op)
+            SELECT t.id, t.revision, 'player', p.id, 'upsert'
+              FROM players p JOIN tournaments t ON t.id = p.tournament_id
+             WHERE p.emp_id = NEW.emp_id;
+        END
+    """)
+
+    # Player rows as they were before, for reads
+    conn.execute("""
+        CREATE VIEW IF NOT EXISTS player_details AS
+        SELECT p.id, p.tournament_id, p.team_id, p.emp_id, h.name, h.type,
+               p.bid_amount, p.is_assigned, h.image_filename
+          FROM players p
+          JOIN people h ON h.emp_id = p.emp_id
+    """)
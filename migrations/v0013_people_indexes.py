@@ -0,0 +1,9 @@
+DESCRIPTION = "Indexes for player listing filters on people.type and people.name"
+
+
+def upgrade(conn):
+    # Replace v0009's (tournament_id, type) and (tournament_id, name) indexes,
+    # dropped with the columns in v0012. emp_id is included so a filter is
+    # answered from the index alone.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_people_type ON people (type, emp_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_people_name ON people (name COLLATE NOCASE, emp_id)")
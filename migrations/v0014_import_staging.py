@@ -0,0 +1,20 @@
+DESCRIPTION = "import_rows staging table, so background imports write in short per-chunk transactions"
+
+
+def upgrade(conn):
+    # Validated upload rows, staged chunk by chunk and moved into people and
+    # players in one final transaction (see importer.py)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS import_rows (
+            id INTEGER PRIMARY KEY,
+            job_id TEXT NOT NULL,
+            emp_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            image_filename TEXT,
+            staged_at REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_import_rows_job ON import_rows (job_id)")
+    # Rows left by a process that stopped mid-import are purged by age
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_import_rows_staged_at ON import_rows (staged_at)")
@@ -0,0 +1,169 @@
+"""
+Password hashing and login throttling.
+
+Passwords are stored as scrypt hashes:
+
+    scrypt$<n>$<r>$<p>$<salt>$<hash>      (salt and hash base64-encoded)
+
+The cost comes from AUCTION_SCRYPT_N / _R / _P. Rows hashed with other
+parameters, or still holding a plaintext password, verify as before and are
+rehashed at the current cost on the next successful login.
+
+hashlib.scrypt releases the GIL, so hashes run on a dedicated thread pool of
+AUCTION_PASSWORD_WORKERS threads: a burst of logins uses every core and never
+stalls the event loop, and other thread pools (database reads) are not starved.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Optional
+
+SCRYPT_N = int(os.environ.get("AUCTION_SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = int(os.environ.get("AUCTION_SCRYPT_R", "8"))
+SCRYPT_P = int(os.environ.get("AUCTION_SCRYPT_P", "1"))
+PASSWORD_WORKERS = int(os.environ.get("AUCTION_PASSWORD_WORKERS", str(os.cpu_count() or 1)))
+
+LOGIN_MAX_FAILURES = int(os.environ.get("AUCTION_LOGIN_MAX_FAILURES", "5"))
+LOGIN_WINDOW_SECONDS = float(os.environ.get("AUCTION_LOGIN_WINDOW_SECONDS", "300"))
+LOGIN_THROTTLE_ENTRIES = int(os.environ.get("AUCTION_LOGIN_THROTTLE_ENTRIES", "10000"))
+
+PREFIX = "scrypt"
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+# ==================== HASHING ====================
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+        maxmem=256 * n * r, dklen=KEY_BYTES
+    )
+
+def hash_password(password: str) -> str:
+    """Hash at the configured cost"""
+    salt = secrets.token_bytes(SALT_BYTES)
+    key = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"{PREFIX}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(key)}"
+
+def is_hashed(stored: str) -> bool:
+    return stored.startswith(PREFIX + "$")
+
+def verify_password(password: str, stored: str) -> bool:
+    """Check a password against a stored hash (or a legacy plaintext value)"""
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    try:
+        _, n, r, p, salt, key = stored.split("$")
+        expected = base64.b64decode(key)
+        actual = _scrypt(password, base64.b64decode(salt), int(n), int(r), int(p))
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+def needs_rehash(stored: str) -> bool:
+    """True for plaintext rows and hashes made at another cost"""
+    if not is_hashed(stored):
+        return True
+    return stored.split("$")[1:4] != [str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
+
+# Compared against when the username does not exist, so unknown and known
+# users take as long to reject
+_DUMMY_HASH: Optional[str] = None
+
+def dummy_hash() -> str:
+    global _DUMMY_HASH
+    if _DUMMY_HASH is None or needs_rehash(_DUMMY_HASH):
+        _DUMMY_HASH = hash_password(secrets.token_urlsafe(16))
+    return _DUMMY_HASH
+
+# ==================== HASHING POOL ====================
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="password")
+        return _executor
+
+async def run_hashing(fn, *args):
+    """Run a hashing function on the password threads"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), fn, *args)
+
+def close_hashing():
+    """Stop the password threads (application shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+# ==================== LOGIN THROTTLING ====================
+
+class LoginThrottle:
+    """
+    At most max_failures failed logins per username within window seconds;
+    further attempts are refused, without hashing, until the oldest failure
+    leaves the window. Kept per worker process, for at most max_entries
+    usernames, least recently failed first out.
+    """
+
+    def __init__(
+        self,
+        max_failures: int = LOGIN_MAX_FAILURES,
+        window: float = LOGIN_WINDOW_SECONDS,
+        max_entries: int = LOGIN_THROTTLE_ENTRIES
+    ):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_entries = max_entries
+        self._failures: "OrderedDict[str, Deque[float]]" = OrderedDict()
+
+    def _recent(self, username: str, now: float) -> Optional[Deque[float]]:
+        failures = self._failures.get(username)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[username]
+            return None
+        return failures
+
+    def retry_after(self, username: str) -> Optional[float]:
+        """Seconds until username may try again, or None if it may now"""
+        now = time.monotonic()
+        failures = self._recent(username, now)
+        if failures is None or len(failures) < self.max_failures:
+            return None
+        return failures[0] + self.window - now
+
+    def failed(self, username: str):
+        now = time.monotonic()
+        self._failures.setdefault(username, deque()).append(now)
+        self._failures.move_to_end(username)
+        # Oldest last failure first: drop usernames whose failures have all
+        # left the window, then the least recent past max_entries
+        while self._failures:
+            oldest = next(iter(self._failures.values()))
+            if len(self._failures) <= self.max_entries and oldest[-1] > now - self.window:
+                break
+            self._failures.popitem(last=False)
+
+    def succeeded(self, username: str):
+        self._failures.pop(username, None)
+
+login_throttle = LoginThrottle()
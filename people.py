@@ -0,0 +1,42 @@
+"""
+Global person records behind tournament players.
+
+An employee's name, type and image are stored once in `people`, keyed by
+emp_id; a `players` row holds one tournament's membership and auction state
+for that person. Reads go through the `player_details` view, which joins the
+two into the columns a player row has always had.
+
+Editing a person changes how they appear in every tournament they play in.
+Database triggers record that in each tournament's revision and change log;
+changed_tournaments() tells handlers which cached views to drop.
+"""
+import sqlite3
+from typing import Iterable, List, Optional, Tuple
+
+# Only real changes are written, so re-importing the same roster leaves other
+# tournaments untouched. A missing image keeps the stored one.
+UPSERT_PERSON = """
+    INSERT INTO people (emp_id, name, type, image_filename) VALUES (?, ?, ?, ?)
+    ON CONFLICT (emp_id) DO UPDATE SET
+        name = excluded.name,
+        type = excluded.type,
+        image_filename = COALESCE(excluded.image_filename, people.image_filename)
+    WHERE people.name IS NOT excluded.name
+       OR people.type IS NOT excluded.type
+       OR people.image_filename IS NOT COALESCE(excluded.image_filename, people.image_filename)
+"""
+
+def save_people(cursor: sqlite3.Cursor, rows: Iterable[Tuple[str, str, str, Optional[str]]]):
+    """Insert or update (emp_id, name, type, image_filename) rows"""
+    cursor.executemany(UPSERT_PERSON, rows)
+
+def last_change(cursor: sqlite3.Cursor) -> int:
+    """Id of the newest change-log entry, to pass to changed_tournaments()"""
+    cursor.execute("SELECT MAX(id) FROM changes")
+    return cursor.fetchone()[0] or 0
+
+def changed_tournaments(cursor: sqlite3.Cursor, after: int) -> List[int]:
+    """Tournaments with change-log entries newer than `after`"""
+    # A range on the primary key; DISTINCT would make SQLite scan an index
+    cursor.execute("SELECT tournament_id FROM changes WHERE id > ?", (after,))
+    return sorted({row[0] for row in cursor.fetchall()})
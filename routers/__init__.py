@@ -1,4 +1,4 @@
 # Import all routers for easy access
-from . import auth, tournaments, teams, players, auction
+from . import auth, tournaments, teams, players, auction, events
 
-__all__ = ['auth', 'tournaments', 'teams', 'players', 'auction']
+__all__ = ['auth', 'tournaments', 'teams', 'players', 'auction', 'events']
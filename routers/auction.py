@@ -1,57 +1,169 @@
-from fastapi import APIRouter, HTTPException, Depends
-from database import get_db
-from schemas import PlayerAssign
-from utils import require_role
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
+from typing import Optional
+import sqlite3
+from cache import response_cache
+from database import run_read, run_write
+from events import broker, budget_changed
+from routers.auction_engine import AuctionEngine, Lot, DEFAULT_LOT_SECONDS
+from schemas import PlayerAssign, LotOpen, BidPlace
+from utils import require_role, verify_token
 
 router = APIRouter(prefix="/api", tags=["Auction"])
 
+def assign_player(
+    conn: sqlite3.Connection,
+    tournament_id: int,
+    team_id: int,
+    emp_id: str,
+    bid_amount: float,
+    expected_version: Optional[int] = None
+) -> dict:
+    """
+    Assign a player to a team and debit the team's budget atomically.
+    The budget check and debit are one conditional UPDATE, so concurrent bids
+    can never overdraw a team. With expected_version, the assignment is
+    rejected if the team changed since the caller last read it.
+    Runs in the caller's transaction, or in its own BEGIN IMMEDIATE one.
+    """
+    if bid_amount < 0:
+        raise HTTPException(status_code=400, detail="Bid amount cannot be negative")
+    
+    own_transaction = not conn.in_transaction
+    if own_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """UPDATE teams 
+               SET remaining_budget = remaining_budget - ?, version = version + 1 
+               WHERE id = ? AND tournament_id = ? AND remaining_budget >= ? 
+                 AND (? IS NULL OR version = ?)""",
+            (bid_amount, team_id, tournament_id, bid_amount,
+             expected_version, expected_version)
+        )
+        
+        if cursor.rowcount == 0:
+            # Nothing was changed; work out which condition failed
+            cursor.execute(
+                "SELECT remaining_budget, version FROM teams WHERE id = ? AND tournament_id = ?",
+                (team_id, tournament_id)
+            )
+            team = cursor.fetchone()
+            if not team:
+                raise HTTPException(status_code=404, detail="Team not found")
+            if expected_version is not None and team["version"] != expected_version:
+                raise HTTPException(
+                    status_code=412,
+                    detail="Team has changed since it was read",
+                    headers={"ETag": team_etag(team_id, team["version"])}
+                )
+            raise HTTPException(status_code=400, detail="Insufficient budget")
+        
+        cursor.execute(
+            """UPDATE players 
+               SET team_id = ?, bid_amount = ?, is_assigned = 1 
+               WHERE tournament_id = ? AND emp_id = ? AND is_assigned = 0""",
+            (team_id, bid_amount, tournament_id, emp_id)
+        )
+        
+        if cursor.rowcount == 0:
+            # Raising rolls back the budget debit above
+            raise HTTPException(
+                status_code=400, 
+                detail="Player not found or already assigned"
+            )
+        
+        cursor.execute(
+            "SELECT remaining_budget, version FROM teams WHERE id = ?",
+            (team_id,)
+        )
+        team = cursor.fetchone()
+    except BaseException:
+        if own_transaction:
+            conn.rollback()
+        raise
+    
+    if own_transaction:
+        conn.commit()
+    return {"remaining_budget": team["remaining_budget"], "version": team["version"]}
+
+def team_etag(team_id: int, version: int) -> str:
+    return f'"team-{team_id}-v{version}"'
+
+def parse_if_match(if_match: Optional[str], team_id: int) -> Optional[int]:
+    """Version from an If-Match header produced by team_etag, if any"""
+    if not if_match or if_match.strip() == "*":
+        return None
+    prefix = f'"team-{team_id}-v'
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    if not (value.startswith(prefix) and value.endswith('"') and value[len(prefix):-1].isdigit()):
+        raise HTTPException(status_code=412, detail="If-Match does not match this team")
+    return int(value[len(prefix):-1])
+
+async def record_assignment(
+    tournament_id: int,
+    team_id: int,
+    emp_id: str,
+    bid_amount: float,
+    expected_version: Optional[int] = None
+) -> dict:
+    """Run assign_player on the writer and publish the resulting events"""
+    events = []
+    
+    def write(conn):
+        team = assign_player(conn, tournament_id, team_id, emp_id, bid_amount, expected_version)
+        events.append(("player-assigned", {
+            "emp_id": emp_id,
+            "team_id": team_id,
+            "bid_amount": bid_amount
+        }))
+        events.append(budget_changed(conn.cursor(), team_id))
+        return team
+    
+    team = await run_write(write)
+    await response_cache.invalidate(tournament_id)
+    broker.publish_many(tournament_id, events)
+    return team
+
+async def settle_lot(lot: Lot):
+    """Persist the winning bid of a live lot through the regular assignment path"""
+    await record_assignment(lot.tournament_id, lot.bidder_id, lot.emp_id, lot.highest_bid)
+
+engine = AuctionEngine(settle=settle_lot)
+
 @router.post("/auction/assign")
 async def assign_player_in_auction(
     assignment: PlayerAssign,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: dict = Depends(require_role(["admin", "auctioneer"]))
 ):
-    """Assign player to team during auction"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT remaining_budget FROM teams WHERE id = ? AND tournament_id = ?",
-        (assignment.team_id, assignment.tournament_id)
-    )
-    team = cursor.fetchone()
-    
-    if not team:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Team not found")
-    
-    if team["remaining_budget"] < assignment.bid_amount:
-        conn.close()
-        raise HTTPException(status_code=400, detail="Insufficient budget")
-    
-    cursor.execute(
-        """UPDATE players 
-           SET team_id = ?, bid_amount = ?, is_assigned = 1 
-           WHERE tournament_id = ? AND emp_id = ? AND is_assigned = 0""",
-        (assignment.team_id, assignment.bid_amount, 
-         assignment.tournament_id, assignment.emp_id)
-    )
-    
-    if cursor.rowcount == 0:
-        conn.close()
-        raise HTTPException(
-            status_code=400, 
-            detail="Player not found or already assigned"
-        )
+    """
+    Assign player to team during auction.
+    Send the team's version as `expected_version` or an If-Match ETag to have
+    the bid rejected with 412 if the team changed in the meantime.
+    """
+    expected_version = assignment.expected_version
+    if expected_version is None:
+        expected_version = parse_if_match(if_match, assignment.team_id)
     
-    cursor.execute(
-        "UPDATE teams SET remaining_budget = remaining_budget - ? WHERE id = ?",
-        (assignment.bid_amount, assignment.team_id)
+    team = await record_assignment(
+        assignment.tournament_id,
+        assignment.team_id,
+        assignment.emp_id,
+        assignment.bid_amount,
+        expected_version
     )
     
-    conn.commit()
-    conn.close()
-    
-    return {"message": "Player assigned successfully"}
+    response.headers["ETag"] = team_etag(assignment.team_id, team["version"])
+    return {
+        "message": "Player assigned successfully",
+        "remaining_budget": team["remaining_budget"],
+        "team_version": team["version"]
+    }
 
 @router.get("/tournaments/{tournament_id}/auction/status")
 async def get_auction_status(
@@ -59,28 +171,120 @@ async def get_auction_status(
     current_user: dict = Depends(require_role(["admin", "auctioneer"]))
 ):
     """Get auction status for tournament"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT COUNT(*) as total FROM players WHERE tournament_id = ?",
-        (tournament_id,)
-    )
-    total = cursor.fetchone()["total"]
-    
-    cursor.execute(
-        """SELECT COUNT(*) as assigned 
-           FROM players 
-           WHERE tournament_id = ? AND is_assigned = 1""",
-        (tournament_id,)
-    )
-    assigned = cursor.fetchone()["assigned"]
+    def read(conn):
+        # Counters kept current by triggers (see counters.py)
+        cursor = conn.cursor()
+        cursor.execute(
+            """SELECT total_players, assigned_players, total_bids 
+               FROM tournament_stats WHERE tournament_id = ?""",
+            (tournament_id,)
+        )
+        return cursor.fetchone()
     
-    conn.close()
+    stats = await run_read(read)
+    total = stats["total_players"] if stats else 0
+    assigned = stats["assigned_players"] if stats else 0
     
     return {
         "total_players": total,
         "assigned_players": assigned,
         "remaining_players": total - assigned,
+        "total_bids": stats["total_bids"] if stats else 0,
         "is_complete": total == assigned
     }
+
+@router.get("/tournaments/{tournament_id}/auction/teams")
+async def get_team_stats(
+    tournament_id: int,
+    current_user: dict = Depends(require_role(["admin", "auctioneer"]))
+):
+    """Amount spent and roster size per team"""
+    def read(conn):
+        cursor = conn.cursor()
+        cursor.execute(
+            """SELECT team_id, roster_size, spent 
+               FROM team_stats WHERE tournament_id = ? ORDER BY team_id""",
+            (tournament_id,)
+        )
+        return [dict(row) for row in cursor.fetchall()]
+    
+    return await run_read(read)
+
+# ==================== LIVE BIDDING ====================
+
+@router.post("/tournaments/{tournament_id}/auction/lot")
+async def open_lot(
+    tournament_id: int,
+    lot: LotOpen,
+    current_user: dict = Depends(require_role(["admin", "auctioneer"]))
+):
+    """Put a player up for live bidding"""
+    def read(conn):
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "SELECT is_assigned FROM players WHERE tournament_id = ? AND emp_id = ?",
+            (tournament_id, lot.emp_id)
+        )
+        player = cursor.fetchone()
+        
+        if not player:
+            raise HTTPException(status_code=404, detail="Player not found")
+        if player["is_assigned"]:
+            raise HTTPException(status_code=400, detail="Player already assigned")
+        
+        cursor.execute(
+            "SELECT id, remaining_budget FROM teams WHERE tournament_id = ?",
+            (tournament_id,)
+        )
+        return {team["id"]: team["remaining_budget"] for team in cursor.fetchall()}
+    
+    budgets = await run_read(read)
+    
+    if not budgets:
+        raise HTTPException(status_code=400, detail="Tournament has no teams")
+    
+    return engine.open_lot(
+        tournament_id,
+        lot.emp_id,
+        lot.base_price,
+        lot.increment,
+        budgets,
+        lot.duration_seconds or DEFAULT_LOT_SECONDS
+    )
+
+@router.get("/tournaments/{tournament_id}/auction/lot")
+async def get_lot(
+    tournament_id: int,
+    current_user: dict = Depends(verify_token)
+):
+    """Current (or most recent) lot with highest bid and time remaining"""
+    state = engine.state(tournament_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="No lot in progress")
+    return state
+
+@router.post("/tournaments/{tournament_id}/auction/lot/bids")
+async def place_bid(
+    tournament_id: int,
+    bid: BidPlace,
+    current_user: dict = Depends(require_role(["admin", "auctioneer"]))
+):
+    """Place a bid on the open lot"""
+    return engine.place_bid(tournament_id, bid.team_id, bid.amount)
+
+@router.post("/tournaments/{tournament_id}/auction/lot/close")
+async def close_lot(
+    tournament_id: int,
+    current_user: dict = Depends(require_role(["admin", "auctioneer"]))
+):
+    """Hammer the open lot now; the winning bid is assigned before returning"""
+    return await engine.close_lot(tournament_id)
+
+@router.delete("/tournaments/{tournament_id}/auction/lot")
+async def cancel_lot(
+    tournament_id: int,
+    current_user: dict = Depends(require_role(["admin", "auctioneer"]))
+):
+    """Withdraw the open lot without selling the player"""
+    return engine.cancel_lot(tournament_id)
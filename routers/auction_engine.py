@@ -0,0 +1,206 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi import HTTPException
+from events import broker
+
+# Default seconds a lot stays open after it is opened or after each bid
+DEFAULT_LOT_SECONDS = float(os.environ.get("AUCTION_LOT_SECONDS", "30"))
+# A bid arriving with less than this many seconds left extends the lot to it
+ANTI_SNIPE_SECONDS = float(os.environ.get("AUCTION_ANTI_SNIPE_SECONDS", "10"))
+
+# ==================== LOT STATE ====================
+
+@dataclass
+class Lot:
+    tournament_id: int
+    emp_id: str
+    base_price: float
+    increment: float
+    budgets: Dict[int, float]
+    deadline: float
+    highest_bid: Optional[float] = None
+    bidder_id: Optional[int] = None
+    bid_count: int = 0
+    status: str = "open"
+    detail: Optional[str] = None
+    timer: Optional[asyncio.TimerHandle] = field(default=None, repr=False)
+    settlement: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    def minimum_bid(self) -> float:
+        if self.highest_bid is None:
+            return self.base_price
+        return self.highest_bid + self.increment
+
+    def snapshot(self, now: float) -> dict:
+        return {
+            "tournament_id": self.tournament_id,
+            "emp_id": self.emp_id,
+            "status": self.status,
+            "base_price": self.base_price,
+            "increment": self.increment,
+            "highest_bid": self.highest_bid,
+            "bidder_id": self.bidder_id,
+            "bid_count": self.bid_count,
+            "minimum_bid": self.minimum_bid(),
+            "seconds_remaining": max(0.0, self.deadline - now) if self.status == "open" else 0.0,
+            "detail": self.detail
+        }
+
+# ==================== ENGINE ====================
+
+class AuctionEngine:
+    """
+    In-memory live bidding: one open lot per tournament with its highest bid,
+    bidder and countdown. Bids are validated against increments and the team
+    budgets captured when the lot opened, in O(1) and without touching SQLite.
+    When a lot closes, `settle(lot)` persists the winning bid.
+
+    All methods must be called from the event loop thread.
+    """
+
+    def __init__(self, settle: Callable[[Lot], Awaitable[None]]):
+        self._settle = settle
+        self._lots: Dict[int, Lot] = {}
+
+    def open_lot(
+        self,
+        tournament_id: int,
+        emp_id: str,
+        base_price: float,
+        increment: float,
+        budgets: Dict[int, float],
+        duration: float = DEFAULT_LOT_SECONDS
+    ) -> dict:
+        current = self._lots.get(tournament_id)
+        if current is not None and current.status in ("open", "closing"):
+            raise HTTPException(
+                status_code=409,
+                detail=f"Lot for {current.emp_id} is still open"
+            )
+        if base_price < 0 or increment <= 0 or duration <= 0:
+            raise HTTPException(
+                status_code=400,
+                detail="base_price must be >= 0; increment and duration must be > 0"
+            )
+
+        loop = asyncio.get_running_loop()
+        lot = Lot(
+            tournament_id=tournament_id,
+            emp_id=emp_id,
+            base_price=base_price,
+            increment=increment,
+            budgets=dict(budgets),
+            deadline=loop.time() + duration
+        )
+        lot.timer = loop.call_at(lot.deadline, self._on_timer, lot)
+        self._lots[tournament_id] = lot
+
+        state = lot.snapshot(loop.time())
+        broker.publish(tournament_id, "lot-opened", state)
+        return state
+
+    def place_bid(self, tournament_id: int, team_id: int, amount: float) -> dict:
+        lot = self._open_lot(tournament_id)
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+
+        if now >= lot.deadline:
+            raise HTTPException(status_code=409, detail="Lot has closed")
+        budget = lot.budgets.get(team_id)
+        if budget is None:
+            raise HTTPException(status_code=404, detail="Team not found")
+        if team_id == lot.bidder_id:
+            raise HTTPException(status_code=400, detail="Team already holds the highest bid")
+        minimum = lot.minimum_bid()
+        if amount < minimum:
+            raise HTTPException(status_code=400, detail=f"Bid must be at least {minimum}")
+        if amount > budget:
+            raise HTTPException(status_code=400, detail="Insufficient budget")
+
+        lot.highest_bid = amount
+        lot.bidder_id = team_id
+        lot.bid_count += 1
+        # The running timer re-arms itself for a later deadline when it fires
+        lot.deadline = max(lot.deadline, now + ANTI_SNIPE_SECONDS)
+
+        state = lot.snapshot(now)
+        broker.publish(tournament_id, "bid-placed", {
+            "emp_id": lot.emp_id,
+            "team_id": team_id,
+            "amount": amount,
+            "bid_count": lot.bid_count,
+            "minimum_bid": state["minimum_bid"],
+            "seconds_remaining": state["seconds_remaining"]
+        })
+        return state
+
+    async def close_lot(self, tournament_id: int) -> dict:
+        """Hammer the lot now and wait for the result to be persisted"""
+        lot = self._lots.get(tournament_id)
+        if lot is None:
+            raise HTTPException(status_code=404, detail="No lot in progress")
+        if lot.status == "open":
+            self._close(lot)
+        if lot.settlement is not None:
+            await asyncio.shield(lot.settlement)
+        return lot.snapshot(asyncio.get_running_loop().time())
+
+    def cancel_lot(self, tournament_id: int) -> dict:
+        lot = self._open_lot(tournament_id)
+        lot.timer.cancel()
+        lot.status = "cancelled"
+        broker.publish(tournament_id, "lot-cancelled", {"emp_id": lot.emp_id})
+        return lot.snapshot(asyncio.get_running_loop().time())
+
+    def state(self, tournament_id: int) -> Optional[dict]:
+        lot = self._lots.get(tournament_id)
+        if lot is None:
+            return None
+        return lot.snapshot(asyncio.get_running_loop().time())
+
+    def _open_lot(self, tournament_id: int) -> Lot:
+        lot = self._lots.get(tournament_id)
+        if lot is None or lot.status != "open":
+            raise HTTPException(status_code=404, detail="No lot is open")
+        return lot
+
+    def _on_timer(self, lot: Lot):
+        if lot.status != "open":
+            return
+        loop = asyncio.get_running_loop()
+        if loop.time() < lot.deadline:
+            # Extended by a late bid since this timer was armed
+            lot.timer = loop.call_at(lot.deadline, self._on_timer, lot)
+            return
+        self._close(lot)
+
+    def _close(self, lot: Lot):
+        lot.timer.cancel()
+        lot.status = "closing"
+        lot.settlement = asyncio.ensure_future(self._finish(lot))
+
+    async def _finish(self, lot: Lot):
+        if lot.bidder_id is None:
+            lot.status = "unsold"
+            broker.publish(lot.tournament_id, "lot-unsold", {"emp_id": lot.emp_id})
+            return
+        try:
+            await self._settle(lot)
+        except HTTPException as e:
+            lot.status = "failed"
+            lot.detail = e.detail
+        except Exception as e:
+            lot.status = "failed"
+            lot.detail = str(e)
+        else:
+            lot.status = "sold"
+        broker.publish(lot.tournament_id, f"lot-{lot.status}", {
+            "emp_id": lot.emp_id,
+            "team_id": lot.bidder_id,
+            "amount": lot.highest_bid,
+            "detail": lot.detail,
+            "closed_at": time.time()
+        })
@@ -1,28 +1,63 @@
 from fastapi import APIRouter, HTTPException, Depends
-from database import get_db
+from fastapi.security import HTTPAuthorizationCredentials
+from typing import Optional
+import math
+import time
+from database import run_read, run_write
+from passwords import (
+    dummy_hash, hash_password, login_throttle, needs_rehash, run_hashing, verify_password
+)
 from schemas import UserLogin, UserResponse
-from utils import create_access_token, verify_token
+from utils import (
+    create_access_token, verify_token, decode_token, optional_security,
+    token_hash, token_expiry, token_cache, revoked_tokens
+)
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 @router.post("/login", response_model=UserResponse)
 async def login(user_login: UserLogin):
-    """User login endpoint"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT * FROM users WHERE username = ? AND password = ?", 
-        (user_login.username, user_login.password)
-    )
-    user = cursor.fetchone()
-    conn.close()
-    
-    if not user:
+    """
+    User login endpoint.
+    The password is checked on the password threads; a plaintext or
+    outdated hash is replaced with one at the current cost.
+    """
+    retry_after = login_throttle.retry_after(user_login.username)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many failed logins; try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+    
+    def read(conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE username = ?", (user_login.username,))
+        return cursor.fetchone()
+    
+    user = await run_read(read)
+    stored = user["password"] if user else await run_hashing(dummy_hash)
+    valid = await run_hashing(verify_password, user_login.password, stored)
+    
+    if not user or not valid:
+        login_throttle.failed(user_login.username)
         raise HTTPException(
             status_code=401, 
             detail="Invalid username or password"
         )
+    login_throttle.succeeded(user_login.username)
+    
+    if needs_rehash(stored):
+        rehashed = await run_hashing(hash_password, user_login.password)
+        
+        def write(conn):
+            # Unless the password was changed meanwhile
+            conn.execute(
+                "UPDATE users SET password = ? WHERE id = ? AND password = ?",
+                (rehashed, user["id"], stored)
+            )
+        
+        await run_write(write)
     
     token = create_access_token({
         "sub": user["username"], 
@@ -41,6 +76,30 @@ async def verify(current_user: dict = Depends(verify_token)):
     return {"valid": True, "user": current_user}
 
 @router.post("/logout")
-async def logout():
-    """Logout endpoint"""
+async def logout(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    """Logout endpoint; the bearer token, if sent, is rejected from now on"""
+    if credentials is None:
+        return {"message": "Logged out successfully"}
+    
+    token = credentials.credentials
+    try:
+        decode_token(token)
+    except HTTPException:
+        # Invalid, expired or already revoked: nothing left to revoke
+        return {"message": "Logged out successfully"}
+    
+    key = token_hash(token)
+    expires_at = token_expiry(token) or time.time() + 24 * 3600
+    
+    def write(conn):
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT OR IGNORE INTO revoked_tokens (token_hash, expires_at) VALUES (?, ?)",
+            (key, expires_at)
+        )
+        cursor.execute("DELETE FROM revoked_tokens WHERE expires_at < ?", (time.time(),))
+    
+    await run_write(write)
+    revoked_tokens.add(key, expires_at)
+    token_cache.discard(key)
     return {"message": "Logged out successfully"}
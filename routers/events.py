@@ -0,0 +1,114 @@
+from fastapi import APIRouter, HTTPException, Depends, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import sqlite3
+from database import run_read
+from events import broker
+from utils import decode_token
+
+router = APIRouter(prefix="/api/tournaments", tags=["Events"])
+
+# Seconds between SSE comments that keep idle proxies from closing the stream
+KEEPALIVE_SECONDS = 15
+
+def stream_user(request: Request, token: Optional[str] = None) -> dict:
+    """Authenticate from the Authorization header or a `token` query parameter
+    (EventSource and browser WebSockets cannot send custom headers)"""
+    header = request.headers.get("authorization", "")
+    if header.lower().startswith("bearer "):
+        token = header[7:]
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return decode_token(token)
+
+def check_tournament(conn: sqlite3.Connection, tournament_id: int) -> bool:
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM tournaments WHERE id = ?", (tournament_id,))
+    return cursor.fetchone() is not None
+
+@router.get("/{tournament_id}/events")
+async def stream_events(
+    tournament_id: int,
+    request: Request,
+    since: Optional[int] = None,
+    current_user: dict = Depends(stream_user)
+):
+    """
+    Server-Sent Events stream of tournament changes.
+    Resume with `?since=<seq>` or the Last-Event-ID header.
+    """
+    if not await run_read(check_tournament, tournament_id):
+        raise HTTPException(status_code=404, detail="Tournament not found")
+
+    last_event_id = request.headers.get("last-event-id")
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    subscriber = broker.subscribe(tournament_id, since)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    # Fell too far behind; the client reconnects with Last-Event-ID
+                    break
+                yield event.sse
+        finally:
+            broker.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/{tournament_id}/events/ws")
+async def stream_events_ws(
+    websocket: WebSocket,
+    tournament_id: int,
+    token: Optional[str] = None,
+    since: Optional[int] = None
+):
+    """WebSocket stream of tournament changes, resumable with `?since=<seq>`"""
+    try:
+        decode_token(token or "")
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    if not await run_read(check_tournament, tournament_id):
+        await websocket.close(code=1008, reason="Tournament not found")
+        return
+
+    await websocket.accept()
+    subscriber = broker.subscribe(tournament_id, since)
+
+    async def send_events():
+        while True:
+            event = await subscriber.get()
+            if event is None:
+                # Too slow to keep up: close so the client reconnects with a cursor
+                await websocket.close(code=1013)
+                return
+            await websocket.send_text(event.json)
+
+    async def wait_for_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.ensure_future(send_events()), asyncio.ensure_future(wait_for_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        broker.unsubscribe(subscriber)
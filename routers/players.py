@@ -1,34 +1,113 @@
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Response, Header, Query, Request
+from fastapi.responses import FileResponse
+from typing import Optional
+import asyncio
+import hashlib
+import json
+import logging
 import sqlite3
 import os
+import tempfile
 from pathlib import Path
-from database import get_db
+from cache import response_cache
+from compression import choose_encoding
+from database import run_read, run_write
+from derivatives import accepts_webp, find_variant, make_derivatives
+from events import broker, budget_changed
 from schemas import PlayerCreate, PlayerUpdate
-from utils import verify_token, require_role, read_uploaded_file
+from serializers import FastJSONResponse, encode_json
+from image_archive import ARCHIVE_MAX_BYTES, ArchiveError, unpack_archive
+from images import IMAGES_DIR, publish_image, receive_file, receive_image
+from jobs import import_jobs
+from loaders import PLAYER_FIELDS, load_players, tournament_etag
+from people import changed_tournaments, last_change, save_people
+from utils import verify_token, require_role, etag_matches, matching_etag, not_modified, json_with_etag
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Players"])
 
 # Create images directory if it doesn't exist
-IMAGES_DIR = Path("player_images")
 IMAGES_DIR.mkdir(exist_ok=True)
 
-@router.get("/api/tournaments/{tournament_id}/players")
+# Largest page of players one request may ask for
+PLAYERS_MAX_PAGE = int(os.environ.get("AUCTION_PLAYERS_MAX_PAGE", "1000"))
+
+def tournament_exists(conn: sqlite3.Connection, tournament_id: int) -> bool:
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM tournaments WHERE id = ?", (tournament_id,))
+    return cursor.fetchone() is not None
+
+@router.get("/api/tournaments/{tournament_id}/players", response_class=FastJSONResponse)
 async def get_players(
     tournament_id: int, 
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated player columns to return"),
+    after: Optional[int] = Query(None, ge=0, description="Return players with a greater id"),
+    limit: Optional[int] = Query(None, ge=1, le=PLAYERS_MAX_PAGE),
+    type: Optional[str] = None,
+    assigned: Optional[bool] = None,
+    team_id: Optional[int] = None,
+    name_prefix: Optional[str] = Query(None, min_length=1),
+    format: str = Query("objects", pattern="^(objects|columns)$"),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
     current_user: dict = Depends(verify_token)
 ):
-    """Get all players for a tournament"""
-    conn = get_db()
-    cursor = conn.cursor()
+    """
+    Get players for a tournament, in id order.
+    Filters on type, assignment, team and name prefix; `fields` projects columns.
+    With `limit`, pages by keyset: the Link header (rel="next") and
+    X-Next-After carry the `after` for the next page.
+    format=columns returns {"columns": [...], "rows": [[...], ...]}, which is
+    smaller and skips building a dict per player.
+    Answers 304 when If-None-Match carries the current ETag.
+    """
+    selected = None
+    if fields:
+        selected = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+        unknown = [field for field in selected if field not in PLAYER_FIELDS]
+        if unknown or not selected:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(PLAYER_FIELDS)}"
+            )
     
-    cursor.execute(
-        "SELECT * FROM players WHERE tournament_id = ?", 
-        (tournament_id,)
-    )
-    players = cursor.fetchall()
-    conn.close()
+    # Each variant of the listing gets its own ETag, as it does a cache entry
+    variant = (format, selected, after, limit, type, assigned, team_id, name_prefix)
+    view = "players"
+    if variant != ("objects", None, None, None, None, None, None, None):
+        view = f"players-{hashlib.sha1(repr(variant).encode()).hexdigest()[:16]}"
+    etag = await run_read(lambda conn: tournament_etag(conn.cursor(), tournament_id, view))
+    if etag is None:
+        # Unknown tournaments have always listed no players
+        return []
+    matched = matching_etag(if_none_match, etag)
+    if matched is not None:
+        return not_modified(matched)
+    
+    def read(conn):
+        return load_players(
+            conn.cursor(), tournament_id, fields=selected, after=after, limit=limit,
+            type=type, assigned=assigned, team_id=team_id, name_prefix=name_prefix,
+            columnar=format == "columns"
+        )
+    
+    if limit is None:
+        # Whole listings are few per tournament; pages are cheap index reads
+        body, encoding = await response_cache.get_or_load_encoded(
+            tournament_id, f"players:{etag}", lambda: run_read(lambda conn: read(conn)[0]),
+            choose_encoding(accept_encoding)
+        )
+        return json_with_etag(body, etag, encoding)
     
-    return [dict(p) for p in players]
+    players, next_after = await run_read(read)
+    response = json_with_etag(encode_json(players), etag)
+    if next_after is not None:
+        next_url = request.url.include_query_params(after=next_after)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+        response.headers["X-Next-After"] = str(next_after)
+    return response
 
 @router.post("/api/tournaments/{tournament_id}/players")
 async def create_player(
@@ -36,49 +115,67 @@ async def create_player(
     player_data: PlayerCreate,
     current_user: dict = Depends(require_role(["admin"]))
 ):
-    """Create a single player"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Check tournament exists
-    cursor.execute("SELECT * FROM tournaments WHERE id = ?", (tournament_id,))
-    if not cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="Tournament not found")
+    """
+    Create a single player. Name and type are the employee's in every
+    tournament, so they also update any other tournament they play in.
+    """
+    events = []
+    affected = [tournament_id]
     
-    try:
-        cursor.execute(
-            """INSERT INTO players (tournament_id, emp_id, name, type) 
-               VALUES (?, ?, ?, ?)""",
-            (tournament_id, player_data.emp_id, player_data.name, player_data.type)
-        )
-        player_id = cursor.lastrowid
-        conn.commit()
+    def write(conn):
+        cursor = conn.cursor()
         
-        cursor.execute("SELECT * FROM players WHERE id = ?", (player_id,))
-        player = cursor.fetchone()
-        conn.close()
+        # Check tournament exists
+        cursor.execute("SELECT * FROM tournaments WHERE id = ?", (tournament_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Tournament not found")
         
-        return dict(player)
-    except sqlite3.IntegrityError:
-        conn.rollback()
-        conn.close()
-        raise HTTPException(
-            status_code=400, 
-            detail="Player with this emp_id already exists in this tournament"
-        )
+        try:
+            before = last_change(cursor)
+            save_people(cursor, [(player_data.emp_id, player_data.name, player_data.type, None)])
+            cursor.execute(
+                "INSERT INTO players (tournament_id, emp_id) VALUES (?, ?)",
+                (tournament_id, player_data.emp_id)
+            )
+            player_id = cursor.lastrowid
+            affected.extend(changed_tournaments(cursor, before))
+            conn.commit()
+            
+            cursor.execute("SELECT * FROM player_details WHERE id = ?", (player_id,))
+            player = cursor.fetchone()
+            events.append(("player-added", dict(player)))
+            
+            return dict(player)
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            raise HTTPException(
+                status_code=400, 
+                detail="Player with this emp_id already exists in this tournament"
+            )
+    
+    result = await run_write(write)
+    for changed_id in set(affected):
+        await response_cache.invalidate(changed_id)
+    broker.publish_many(tournament_id, events)
+    return result
 
 @router.post("/api/tournaments/{tournament_id}/players/upload")
 async def upload_players(
     tournament_id: int,
+    response: Response,
     file: UploadFile = File(...),
     mode: str = "replace",
+    wait: bool = False,
     current_user: dict = Depends(require_role(["admin"]))
 ):
     """
     Upload players from CSV or Excel file
     Supports: .csv, .xlsx, .xls
     Required columns: emp_id, name, type
+    
+    The import runs in the background: the response (202) is the job status,
+    polled at /players/upload/{job_id}. With wait=true the upload report is
+    returned once the import has finished.
     """
     
     # Validate file type
@@ -91,122 +188,42 @@ async def upload_players(
             detail=f"Invalid file type. Allowed: {', '.join(allowed_extensions)}"
         )
     
-    conn = get_db()
-    cursor = conn.cursor()
-    
     # Check if tournament exists
-    cursor.execute("SELECT * FROM tournaments WHERE id = ?", (tournament_id,))
-    if not cursor.fetchone():
-        conn.close()
+    if not await run_read(tournament_exists, tournament_id):
         raise HTTPException(status_code=404, detail="Tournament not found")
     
-    try:
-        # Read file content
-        contents = await file.read()
-        
-        # Parse file into DataFrame
-        try:
-            df = read_uploaded_file(contents, file.filename)
-        except ValueError as e:
-            conn.close()
-            raise HTTPException(status_code=400, detail=str(e))
-        
-        # Check if empty
-        if df.empty:
-            conn.close()
-            raise HTTPException(status_code=400, detail="File is empty")
-        
-        # Normalize column names
-        df.columns = df.columns.str.strip().str.lower()
-        
-        # Check required columns
-        required_columns = ['emp_id', 'name', 'type']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            conn.close()
-            raise HTTPException(
-                status_code=400,
-                detail=f"Missing columns: {', '.join(missing_columns)}"
-            )
-        
-        # Replace mode: delete existing players
-        if mode == "replace":
-            cursor.execute(
-                "DELETE FROM players WHERE tournament_id = ?", 
-                (tournament_id,)
-            )
-        
-        added_count = 0
-        skipped_count = 0
-        errors = []
-        
-        # Process each row
-        for index, row in df.iterrows():
-            try:
-                # Validate data
-                emp_id = str(row['emp_id']).strip()
-                name = str(row['name']).strip()
-                player_type = str(row['type']).strip()
-                image_filename = str(row.get('image_filename', '')).strip() if 'image_filename' in row else None
-                
-                # Validate required fields
-                if not emp_id or emp_id.lower() in ['nan', 'none', '']:
-                    raise ValueError("emp_id is required")
-                if not name or name.lower() in ['nan', 'none', '']:
-                    raise ValueError("name is required")
-                if not player_type or player_type.lower() in ['nan', 'none', '']:
-                    raise ValueError("type is required")
-                
-                # Insert player
-                cursor.execute(
-                    """INSERT INTO players (tournament_id, emp_id, name, type, image_filename) 
-                       VALUES (?, ?, ?, ?, ?)""",
-                    (tournament_id, emp_id, name, player_type, image_filename)
-                )
-                added_count += 1
-                
-            except sqlite3.IntegrityError:
-                skipped_count += 1
-                errors.append(
-                    f"Row {index + 2}: Duplicate emp_id '{row.get('emp_id', 'Unknown')}'"
-                )
-            except Exception as e:
-                skipped_count += 1
-                errors.append(f"Row {index + 2}: {str(e)}")
-        
-        conn.commit()
-        conn.close()
-        
-        response = {
-            "success": True,
-            "message": "Players uploaded successfully",
-            "details": {
-                "file_name": file.filename,
-                "file_type": file_extension,
-                "mode": mode,
-                "total_rows": len(df),
-                "players_added": added_count,
-                "players_skipped": skipped_count
-            }
-        }
-        
-        if errors:
-            response["errors"] = errors[:10]
-            if len(errors) > 10:
-                response["errors"].append(f"... and {len(errors) - 10} more errors")
-        
-        return response
+    job = await import_jobs.submit(tournament_id, file.file, file.filename, mode)
     
-    except HTTPException:
-        raise
-    except Exception as e:
-        conn.rollback()
-        conn.close()
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Error processing file: {str(e)}"
-        )
+    if not wait:
+        response.status_code = 202
+        return job.status_dict()
+    
+    await asyncio.shield(job.done)
+    if job.status == "failed":
+        raise HTTPException(status_code=400, detail=job.detail)
+    if job.status == "cancelled":
+        raise HTTPException(status_code=409, detail="Import cancelled; no players were uploaded")
+    return job.result()
+
+@router.get("/api/tournaments/{tournament_id}/players/upload/{job_id}")
+async def get_upload_job(
+    tournament_id: int,
+    job_id: str,
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Progress of a background player upload: rows processed, errors and ETA"""
+    return import_jobs.get(tournament_id, job_id).status_dict()
+
+@router.delete("/api/tournaments/{tournament_id}/players/upload/{job_id}")
+async def cancel_upload_job(
+    tournament_id: int,
+    job_id: str,
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Cancel a queued or running upload; nothing it imported is kept"""
+    job = import_jobs.get(tournament_id, job_id)
+    import_jobs.cancel(job)
+    return {"message": "Import job cancellation requested", "job_id": job.id}
 
 @router.put("/api/tournaments/{tournament_id}/players/{emp_id}")
 async def update_player(
@@ -215,39 +232,52 @@ async def update_player(
     player_data: PlayerUpdate,
     current_user: dict = Depends(require_role(["admin"]))
 ):
-    """Update player details"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT * FROM players WHERE tournament_id = ? AND emp_id = ?", 
-        (tournament_id, emp_id)
-    )
-    if not cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="Player not found")
-    
-    updates = []
-    values = []
-    
-    if player_data.name is not None:
-        updates.append("name = ?")
-        values.append(player_data.name)
-    
-    if player_data.type is not None:
-        updates.append("type = ?")
-        values.append(player_data.type)
+    """Update player details (shared by every tournament the employee plays in)"""
+    events = []
+    affected = [tournament_id]
     
-    if updates:
-        values.extend([tournament_id, emp_id])
+    def write(conn):
+        cursor = conn.cursor()
+        
         cursor.execute(
-            f"UPDATE players SET {', '.join(updates)} WHERE tournament_id = ? AND emp_id = ?",
-            values
+            "SELECT * FROM players WHERE tournament_id = ? AND emp_id = ?", 
+            (tournament_id, emp_id)
         )
-        conn.commit()
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Player not found")
+        
+        updates = []
+        values = []
+        
+        if player_data.name is not None:
+            updates.append("name = ?")
+            values.append(player_data.name)
+        
+        if player_data.type is not None:
+            updates.append("type = ?")
+            values.append(player_data.type)
+        
+        if updates:
+            before = last_change(cursor)
+            values.append(emp_id)
+            cursor.execute(
+                f"UPDATE people SET {', '.join(updates)} WHERE emp_id = ?",
+                values
+            )
+            affected.extend(changed_tournaments(cursor, before))
+            events.append(("player-updated", {
+                "emp_id": emp_id,
+                **player_data.model_dump(exclude_none=True)
+            }))
+            conn.commit()
+        
+        return {"message": "Player updated successfully"}
     
-    conn.close()
-    return {"message": "Player updated successfully"}
+    result = await run_write(write)
+    for changed_id in set(affected):
+        await response_cache.invalidate(changed_id)
+        broker.publish_many(changed_id, events)
+    return result
 
 @router.delete("/api/tournaments/{tournament_id}/players/{emp_id}")
 async def delete_player(
@@ -256,95 +286,231 @@ async def delete_player(
     current_user: dict = Depends(require_role(["admin"]))
 ):
     """Delete player from tournament"""
-    conn = get_db()
-    cursor = conn.cursor()
+    events = []
     
-    cursor.execute(
-        "SELECT * FROM players WHERE tournament_id = ? AND emp_id = ?", 
-        (tournament_id, emp_id)
-    )
-    player = cursor.fetchone()
-    
-    if not player:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Player not found")
-    
-    # If assigned, restore team budget
-    if player["team_id"] and player["bid_amount"]:
+    def write(conn):
+        cursor = conn.cursor()
+        
         cursor.execute(
-            "UPDATE teams SET remaining_budget = remaining_budget + ? WHERE id = ?",
-            (player["bid_amount"], player["team_id"])
+            "SELECT * FROM players WHERE tournament_id = ? AND emp_id = ?", 
+            (tournament_id, emp_id)
         )
+        player = cursor.fetchone()
+        
+        if not player:
+            raise HTTPException(status_code=404, detail="Player not found")
+        
+        # If assigned, restore team budget
+        if player["team_id"] and player["bid_amount"]:
+            cursor.execute(
+                "UPDATE teams SET remaining_budget = remaining_budget + ?, version = version + 1 WHERE id = ?",
+                (player["bid_amount"], player["team_id"])
+            )
+        
+        cursor.execute(
+            "DELETE FROM players WHERE tournament_id = ? AND emp_id = ?", 
+            (tournament_id, emp_id)
+        )
+        events.append(("player-removed", {"emp_id": emp_id, "team_id": player["team_id"]}))
+        if player["team_id"] and player["bid_amount"]:
+            events.append(budget_changed(cursor, player["team_id"]))
+        
+        conn.commit()
+        
+        return {"message": "Player deleted successfully"}
     
-    cursor.execute(
-        "DELETE FROM players WHERE tournament_id = ? AND emp_id = ?", 
-        (tournament_id, emp_id)
-    )
-    
-    conn.commit()
-    conn.close()
-    
-    return {"message": "Player deleted successfully"}
+    result = await run_write(write)
+    await response_cache.invalidate(tournament_id)
+    broker.publish_many(tournament_id, events)
+    return result
 
 
-@router.post("/api/players/{emp_id}/image")
+@router.post(
+    "/api/players/{emp_id}/image",
+    openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {"file": {"type": "string", "format": "binary"}},
+        "required": ["file"]
+    }}}}}
+)
 async def upload_player_image(
     emp_id: str,
-    file: UploadFile = File(...),
+    request: Request,
     current_user: dict = Depends(require_role(["admin"]))
 ):
-    """Upload or update player image globally (across all tournaments)"""
-    
-    # Validate file type
-    allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp']
-    if file.content_type not in allowed_types:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid file type. Only JPG, PNG, and WebP images are allowed"
+    """
+    Upload or update player image globally (across all tournaments).
+    The `file` form field is streamed to disk as it arrives, capped at
+    AUCTION_IMAGE_MAX_BYTES, must be a JPG, PNG or WebP by content, and is
+    stored under its content hash (identical uploads share one file).
+    """
+    # Check if player exists in ANY tournament with this emp_id (global player update)
+    def read(conn):
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT tournament_id FROM players WHERE emp_id = ?",
+            (emp_id,)
         )
+        return cursor.fetchall()
     
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Check if player exists in ANY tournament with this emp_id (global player update)
-    cursor.execute(
-        "SELECT * FROM players WHERE emp_id = ?",
-        (emp_id,)
-    )
-    players = cursor.fetchall()
+    players = await run_read(read)
     
     if not players:
-        conn.close()
         raise HTTPException(status_code=404, detail="Player not found")
     
+    staged = await receive_image(request)
     try:
-        # Create filename: emp_id.extension
-        file_ext = file.filename.split('.')[-1].lower()
-        new_filename = f"{emp_id}.{file_ext}"
-        file_path = IMAGES_DIR / new_filename
+        # Stored as {sha256}.{extension}, extension from the file's content
+        new_filename = await publish_image(staged)
         
-        # Save file
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        # Avatars and WebP variants; the upload stands even if this fails
+        try:
+            derived = await make_derivatives(new_filename)
+        except Exception:
+            derived = []
+            logger.exception("Image derivatives for %s failed", new_filename)
         
-        # Update ALL players with this emp_id across all tournaments
-        cursor.execute(
-            "UPDATE players SET image_filename = ? WHERE emp_id = ?",
-            (new_filename, emp_id)
-        )
+        def write(conn):
+            # One row, shown by the player in every tournament
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE people SET image_filename = ? WHERE emp_id = ?",
+                (new_filename, emp_id)
+            )
         
-        updated_count = cursor.rowcount
-        conn.commit()
-        conn.close()
+        await run_write(write)
+        for tournament_id in {p["tournament_id"] for p in players}:
+            await response_cache.invalidate(tournament_id)
+            broker.publish(tournament_id, "player-updated", {
+                "emp_id": emp_id,
+                "image_filename": new_filename
+            })
         
         return {
             "message": "Image uploaded successfully",
             "filename": new_filename,
-            "updated_players": updated_count
+            "derivatives": derived,
+            "updated_players": len(players)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        conn.rollback()
-        conn.close()
-        raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
+    finally:
+        # No-op once published
+        staged.discard()
+
+
+@router.post(
+    "/api/tournaments/{tournament_id}/players/images",
+    openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {"file": {"type": "string", "format": "binary"}},
+        "required": ["file"]
+    }}}}}
+)
+async def upload_player_images(
+    tournament_id: int,
+    request: Request,
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """
+    Upload a ZIP or tar archive of <emp_id>.<ext> images for the players of
+    one tournament. Entries are streamed out of the archive, checked and
+    stored like single uploads, and all players are updated in one
+    transaction; as with single uploads, the image is the employee's in every
+    tournament. Returns a report line per file in the archive.
+    """
+    def read(conn):
+        if not tournament_exists(conn, tournament_id):
+            return None
+        cursor = conn.cursor()
+        cursor.execute("SELECT emp_id FROM players WHERE tournament_id = ?", (tournament_id,))
+        return {row["emp_id"] for row in cursor.fetchall()}
+    
+    emp_ids = await run_read(read)
+    if emp_ids is None:
+        raise HTTPException(status_code=404, detail="Tournament not found")
+    
+    staged = await receive_file(
+        request, max_bytes=ARCHIVE_MAX_BYTES, directory=Path(tempfile.gettempdir()), what="Archive"
+    )
+    try:
+        report, updates = await asyncio.to_thread(unpack_archive, staged.path, emp_ids)
+    except ArchiveError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        staged.discard()
+    
+    def write(conn):
+        cursor = conn.cursor()
+        cursor.executemany(
+            "UPDATE people SET image_filename = ? WHERE emp_id = ?",
+            [(filename, emp_id) for emp_id, filename in updates.items()]
+        )
+        # The new images also show in the other tournaments these people play in
+        cursor.execute(
+            "SELECT tournament_id, emp_id FROM players WHERE emp_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(updates)),)
+        )
+        return cursor.fetchall()
+    
+    members = await run_write(write) if updates else []
+    events = {}
+    for row in members:
+        emp_id = row["emp_id"]
+        events.setdefault(row["tournament_id"], []).append(
+            ("player-updated", {"emp_id": emp_id, "image_filename": updates[emp_id]})
+        )
+    for changed_id, changed in events.items():
+        await response_cache.invalidate(changed_id)
+        broker.publish_many(changed_id, changed)
+    
+    counts = {status: 0 for status in ("imported", "skipped", "failed")}
+    for entry in report:
+        counts[entry["status"]] += 1
+    return {
+        "message": "Images imported",
+        "files": len(report),
+        **counts,
+        "updated_players": len(updates),
+        "report": report
+    }
+
+@router.get("/api/players/{emp_id}/image")
+async def get_player_image(
+    emp_id: str,
+    size: Optional[int] = Query(None, ge=1, description="Displayed width in pixels"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Player image for display at `size` pixels: the smallest derivative at
+    least that large, as WebP when the client accepts it. Without `size`, or
+    when no derivative is large enough, the original upload.
+    The image behind this URL changes with each upload, so clients revalidate
+    it by ETag (the chosen file's name, which contains its content hash).
+    """
+    def read(conn):
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT image_filename FROM people WHERE emp_id = ? AND image_filename IS NOT NULL",
+            (emp_id,)
+        )
+        return cursor.fetchone()
+    
+    row = await run_read(read)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Player image not found")
+    
+    path = await asyncio.to_thread(find_variant, row["image_filename"], size, accepts_webp(accept))
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Player image not found")
+    etag = f'"{path.name}"'
+    # The chosen file depends on Accept
+    if etag_matches(if_none_match, etag):
+        response = not_modified(etag)
+        response.headers["Vary"] = "Accept"
+        return response
+    return FileResponse(path, headers={"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"})
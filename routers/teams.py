@@ -1,6 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
 import sqlite3
-from database import get_db
+from cache import response_cache
+from database import run_write
+from events import broker, budget_changed
+from people import changed_tournaments, last_change, save_people
 from schemas import TeamUpdate, PlayerCreate
 from utils import require_role
 
@@ -16,38 +19,48 @@ async def create_team(
     current_user: dict = Depends(require_role(["admin"]))
 ):
     """Create a new team in tournament"""
-    conn = get_db()
-    cursor = conn.cursor()
+    events = []
     
-    # Check tournament exists
-    cursor.execute("SELECT * FROM tournaments WHERE id = ?", (tournament_id,))
-    if not cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="Tournament not found")
-    
-    try:
-        cursor.execute(
-            """INSERT INTO teams (tournament_id, name, total_budget, remaining_budget) 
-               VALUES (?, ?, ?, ?)""",
-            (tournament_id, team_data['name'], team_data['budget'], team_data['budget'])
-        )
-        team_id = cursor.lastrowid
-        conn.commit()
+    def write(conn):
+        cursor = conn.cursor()
         
-        cursor.execute("SELECT * FROM teams WHERE id = ?", (team_id,))
-        team = cursor.fetchone()
-        conn.close()
+        # Check tournament exists
+        cursor.execute("SELECT * FROM tournaments WHERE id = ?", (tournament_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Tournament not found")
         
-        return {
-            "id": team["id"],
-            "name": team["name"],
-            "totalBudget": team["total_budget"],
-            "remainingBudget": team["remaining_budget"]
-        }
-    except sqlite3.IntegrityError:
-        conn.rollback()
-        conn.close()
-        raise HTTPException(status_code=400, detail="Team name already exists in this tournament")
+        try:
+            cursor.execute(
+                """INSERT INTO teams (tournament_id, name, total_budget, remaining_budget) 
+                   VALUES (?, ?, ?, ?)""",
+                (tournament_id, team_data['name'], team_data['budget'], team_data['budget'])
+            )
+            team_id = cursor.lastrowid
+            conn.commit()
+            
+            cursor.execute("SELECT * FROM teams WHERE id = ?", (team_id,))
+            team = cursor.fetchone()
+            events.append(("team-created", {
+                "team_id": team["id"],
+                "name": team["name"],
+                "total_budget": team["total_budget"],
+                "remaining_budget": team["remaining_budget"]
+            }))
+            
+            return {
+                "id": team["id"],
+                "name": team["name"],
+                "totalBudget": team["total_budget"],
+                "remainingBudget": team["remaining_budget"]
+            }
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            raise HTTPException(status_code=400, detail="Team name already exists in this tournament")
+    
+    result = await run_write(write)
+    await response_cache.invalidate(tournament_id)
+    broker.publish_many(tournament_id, events)
+    return result
 
 @router.put("/{team_id}")
 async def update_team(
@@ -57,38 +70,46 @@ async def update_team(
     current_user: dict = Depends(require_role(["admin"]))
 ):
     """Update team name/budget"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT * FROM teams WHERE id = ? AND tournament_id = ?", 
-        (team_id, tournament_id)
-    )
-    team = cursor.fetchone()
-    
-    if not team:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Team not found")
-    
-    # Update name
-    cursor.execute(
-        "UPDATE teams SET name = ? WHERE id = ?", 
-        (team_data.name, team_id)
-    )
+    events = []
     
-    # If budget changed, update both total and remaining
-    if team_data.total_budget is not None:
-        spent = team["total_budget"] - team["remaining_budget"]
-        new_remaining = team_data.total_budget - spent
+    def write(conn):
+        cursor = conn.cursor()
+        
         cursor.execute(
-            "UPDATE teams SET total_budget = ?, remaining_budget = ? WHERE id = ?",
-            (team_data.total_budget, new_remaining, team_id)
+            "SELECT * FROM teams WHERE id = ? AND tournament_id = ?", 
+            (team_id, tournament_id)
         )
+        team = cursor.fetchone()
+        
+        if not team:
+            raise HTTPException(status_code=404, detail="Team not found")
+        
+        # Update name
+        cursor.execute(
+            "UPDATE teams SET name = ? WHERE id = ?", 
+            (team_data.name, team_id)
+        )
+        
+        # If budget changed, update both total and remaining (keeping the amount spent)
+        if team_data.total_budget is not None:
+            cursor.execute(
+                """UPDATE teams 
+                   SET remaining_budget = remaining_budget + (? - total_budget), 
+                       total_budget = ?, version = version + 1 
+                   WHERE id = ?""",
+                (team_data.total_budget, team_data.total_budget, team_id)
+            )
+            events.append(budget_changed(cursor, team_id))
+        
+        events.append(("team-updated", {"team_id": team_id, "name": team_data.name}))
+        conn.commit()
+        
+        return {"message": "Team updated successfully"}
     
-    conn.commit()
-    conn.close()
-    
-    return {"message": "Team updated successfully"}
+    result = await run_write(write)
+    await response_cache.invalidate(tournament_id)
+    broker.publish_many(tournament_id, events)
+    return result
 
 @router.delete("/{team_id}")
 async def delete_team(
@@ -97,31 +118,37 @@ async def delete_team(
     current_user: dict = Depends(require_role(["admin"]))
 ):
     """Delete team"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT * FROM teams WHERE id = ? AND tournament_id = ?", 
-        (team_id, tournament_id)
-    )
-    if not cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="Team not found")
-    
-    # Unassign all players from this team
-    cursor.execute(
-        """UPDATE players 
-           SET team_id = NULL, is_assigned = 0, bid_amount = 0 
-           WHERE team_id = ?""",
-        (team_id,)
-    )
+    events = []
     
-    cursor.execute("DELETE FROM teams WHERE id = ?", (team_id,))
-    
-    conn.commit()
-    conn.close()
+    def write(conn):
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "SELECT * FROM teams WHERE id = ? AND tournament_id = ?", 
+            (team_id, tournament_id)
+        )
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Team not found")
+        
+        # Unassign all players from this team
+        cursor.execute(
+            """UPDATE players 
+               SET team_id = NULL, is_assigned = 0, bid_amount = 0 
+               WHERE team_id = ?""",
+            (team_id,)
+        )
+        
+        cursor.execute("DELETE FROM teams WHERE id = ?", (team_id,))
+        events.append(("team-deleted", {"team_id": team_id}))
+        
+        conn.commit()
+        
+        return {"message": "Team deleted successfully"}
     
-    return {"message": "Team deleted successfully"}
+    result = await run_write(write)
+    await response_cache.invalidate(tournament_id)
+    broker.publish_many(tournament_id, events)
+    return result
 
 @router.post("/{team_id}/players")
 async def add_player_to_team(
@@ -132,49 +159,67 @@ async def add_player_to_team(
     current_user: dict = Depends(require_role(["admin"]))
 ):
     """Manually add player to team"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT remaining_budget FROM teams WHERE id = ? AND tournament_id = ?", 
-        (team_id, tournament_id)
-    )
-    team = cursor.fetchone()
+    events = []
+    affected = [tournament_id]
     
-    if not team:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Team not found")
-    
-    if team["remaining_budget"] < bid_amount:
-        conn.close()
-        raise HTTPException(status_code=400, detail="Insufficient budget")
-    
-    try:
-        cursor.execute(
-            """INSERT INTO players 
-               (tournament_id, team_id, emp_id, name, type, bid_amount, is_assigned) 
-               VALUES (?, ?, ?, ?, ?, ?, 1)""",
-            (tournament_id, team_id, player.emp_id, player.name, 
-             player.type, bid_amount)
-        )
+    def write(conn):
+        cursor = conn.cursor()
+        
+        if bid_amount < 0:
+            raise HTTPException(status_code=400, detail="Bid amount cannot be negative")
         
+        # Check and debit the budget in one statement so it cannot be overdrawn
         cursor.execute(
-            "UPDATE teams SET remaining_budget = remaining_budget - ? WHERE id = ?",
-            (bid_amount, team_id)
+            """UPDATE teams 
+               SET remaining_budget = remaining_budget - ?, version = version + 1 
+               WHERE id = ? AND tournament_id = ? AND remaining_budget >= ?""",
+            (bid_amount, team_id, tournament_id, bid_amount)
         )
         
-        conn.commit()
-        conn.close()
+        if cursor.rowcount == 0:
+            cursor.execute(
+                "SELECT id FROM teams WHERE id = ? AND tournament_id = ?", 
+                (team_id, tournament_id)
+            )
+            if not cursor.fetchone():
+                raise HTTPException(status_code=404, detail="Team not found")
+            raise HTTPException(status_code=400, detail="Insufficient budget")
         
-        return {"message": "Player added successfully"}
-    
-    except sqlite3.IntegrityError:
-        conn.rollback()
-        conn.close()
-        raise HTTPException(
-            status_code=400, 
-            detail="Player with this emp_id already exists in tournament"
-        )
+        try:
+            before = last_change(cursor)
+            save_people(cursor, [(player.emp_id, player.name, player.type, None)])
+            cursor.execute(
+                """INSERT INTO players 
+                   (tournament_id, team_id, emp_id, bid_amount, is_assigned) 
+                   VALUES (?, ?, ?, ?, 1)""",
+                (tournament_id, team_id, player.emp_id, bid_amount)
+            )
+            affected.extend(changed_tournaments(cursor, before))
+            events.append(("player-assigned", {
+                "emp_id": player.emp_id,
+                "name": player.name,
+                "type": player.type,
+                "team_id": team_id,
+                "bid_amount": bid_amount
+            }))
+            events.append(budget_changed(cursor, team_id))
+            
+            conn.commit()
+            
+            return {"message": "Player added successfully"}
+        
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            raise HTTPException(
+                status_code=400, 
+                detail="Player with this emp_id already exists in tournament"
+            )
+    
+    result = await run_write(write)
+    for changed_id in set(affected):
+        await response_cache.invalidate(changed_id)
+    broker.publish_many(tournament_id, events)
+    return result
 
 @router.delete("/{team_id}/players/{emp_id}")
 async def remove_player_from_team(
@@ -184,35 +229,42 @@ async def remove_player_from_team(
     current_user: dict = Depends(require_role(["admin"]))
 ):
     """Remove player from team"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """SELECT * FROM players 
-           WHERE tournament_id = ? AND team_id = ? AND emp_id = ?""",
-        (tournament_id, team_id, emp_id)
-    )
-    player = cursor.fetchone()
-    
-    if not player:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Player not found")
+    events = []
     
-    cursor.execute(
-        "UPDATE teams SET remaining_budget = remaining_budget + ? WHERE id = ?",
-        (player["bid_amount"], team_id)
-    )
-    
-    cursor.execute(
-        """DELETE FROM players 
-           WHERE tournament_id = ? AND team_id = ? AND emp_id = ?""",
-        (tournament_id, team_id, emp_id)
-    )
-    
-    conn.commit()
-    conn.close()
+    def write(conn):
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """SELECT * FROM players 
+               WHERE tournament_id = ? AND team_id = ? AND emp_id = ?""",
+            (tournament_id, team_id, emp_id)
+        )
+        player = cursor.fetchone()
+        
+        if not player:
+            raise HTTPException(status_code=404, detail="Player not found")
+        
+        cursor.execute(
+            "UPDATE teams SET remaining_budget = remaining_budget + ?, version = version + 1 WHERE id = ?",
+            (player["bid_amount"], team_id)
+        )
+        
+        cursor.execute(
+            """DELETE FROM players 
+               WHERE tournament_id = ? AND team_id = ? AND emp_id = ?""",
+            (tournament_id, team_id, emp_id)
+        )
+        events.append(("player-removed", {"emp_id": emp_id, "team_id": team_id}))
+        events.append(budget_changed(cursor, team_id))
+        
+        conn.commit()
+        
+        return {"message": "Player removed successfully"}
     
-    return {"message": "Player removed successfully"}
+    result = await run_write(write)
+    await response_cache.invalidate(tournament_id)
+    broker.publish_many(tournament_id, events)
+    return result
 
 
 @router.post("/{team_id}/captain")
@@ -223,53 +275,61 @@ async def set_team_captain(
     current_user: dict = Depends(require_role(["admin"]))
 ):
     """Set captain and/or vice-captain for a team"""
-    conn = get_db()
-    cursor = conn.cursor()
+    events = []
     
-    # Check if team exists
-    cursor.execute(
-        "SELECT * FROM teams WHERE id = ? AND tournament_id = ?",
-        (team_id, tournament_id)
-    )
-    team = cursor.fetchone()
-    
-    if not team:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Team not found")
-    
-    captain_id = data.get('captain_id')
-    vice_captain_id = data.get('vice_captain_id')
-    
-    # Verify players are in this team
-    if captain_id:
+    def write(conn):
+        cursor = conn.cursor()
+        
+        # Check if team exists
         cursor.execute(
-            "SELECT * FROM players WHERE emp_id = ? AND team_id = ?",
-            (captain_id, team_id)
+            "SELECT * FROM teams WHERE id = ? AND tournament_id = ?",
+            (team_id, tournament_id)
         )
-        if not cursor.fetchone():
-            conn.close()
-            raise HTTPException(status_code=400, detail="Captain must be a member of this team")
-    
-    if vice_captain_id:
+        team = cursor.fetchone()
+        
+        if not team:
+            raise HTTPException(status_code=404, detail="Team not found")
+        
+        captain_id = data.get('captain_id')
+        vice_captain_id = data.get('vice_captain_id')
+        
+        # Verify players are in this team
+        if captain_id:
+            cursor.execute(
+                "SELECT * FROM players WHERE emp_id = ? AND team_id = ?",
+                (captain_id, team_id)
+            )
+            if not cursor.fetchone():
+                raise HTTPException(status_code=400, detail="Captain must be a member of this team")
+        
+        if vice_captain_id:
+            cursor.execute(
+                "SELECT * FROM players WHERE emp_id = ? AND team_id = ?",
+                (vice_captain_id, team_id)
+            )
+            if not cursor.fetchone():
+                raise HTTPException(status_code=400, detail="Vice-captain must be a member of this team")
+        
+        # Update team
         cursor.execute(
-            "SELECT * FROM players WHERE emp_id = ? AND team_id = ?",
-            (vice_captain_id, team_id)
+            "UPDATE teams SET captain_id = ?, vice_captain_id = ? WHERE id = ?",
+            (captain_id, vice_captain_id, team_id)
         )
-        if not cursor.fetchone():
-            conn.close()
-            raise HTTPException(status_code=400, detail="Vice-captain must be a member of this team")
-    
-    # Update team
-    cursor.execute(
-        "UPDATE teams SET captain_id = ?, vice_captain_id = ? WHERE id = ?",
-        (captain_id, vice_captain_id, team_id)
-    )
-    
-    conn.commit()
-    conn.close()
+        events.append(("captain-set", {
+            "team_id": team_id,
+            "captain_id": captain_id,
+            "vice_captain_id": vice_captain_id
+        }))
+        
+        conn.commit()
+        
+        return {
+            "message": "Captain and vice-captain updated successfully",
+            "captain_id": captain_id,
+            "vice_captain_id": vice_captain_id
+        }
     
-    return {
-        "message": "Captain and vice-captain updated successfully",
-        "captain_id": captain_id,
-        "vice_captain_id": vice_captain_id
-    }
\ No newline at end of file
+    result = await run_write(write)
+    await response_cache.invalidate(tournament_id)
+    broker.publish_many(tournament_id, events)
+    return result
\ No newline at end of file
@@ -1,65 +1,75 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, status
+from typing import Optional
 import sqlite3
-from database import get_db
+from cache import response_cache
+from changes import load_changes
+from compression import choose_encoding
+from database import run_read, run_write
+from events import broker
+from loaders import load_tournament_tree, tournament_etag, tournaments_etag
 from schemas import TournamentCreate, TournamentUpdate
-from utils import verify_token, require_role
+from serializers import FastJSONResponse
+from utils import verify_token, require_role, matching_etag, not_modified, json_with_etag
 
 router = APIRouter(prefix="/api/tournaments", tags=["Tournaments"])
 
-@router.get("/")
-async def get_tournaments(current_user: dict = Depends(verify_token)):
-    """Get all tournaments with teams and players"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM tournaments ORDER BY created_at DESC")
-    tournaments = cursor.fetchall()
+@router.get("/", response_class=FastJSONResponse)
+async def get_tournaments(
+    include_players: bool = True,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Get all tournaments with teams and players.
+    With include_players=false the player lists are left out; page through
+    GET /api/tournaments/{id}/players instead.
+    Answers 304 when If-None-Match carries the current ETag.
+    """
+    view = "tournaments" if include_players else "tournaments-summary"
+    etag = await run_read(lambda conn: tournaments_etag(conn.cursor(), view))
+    matched = matching_etag(if_none_match, etag)
+    if matched is not None:
+        return not_modified(matched)
     
-    result = []
-    for tournament in tournaments:
-        # Get teams for this tournament
-        cursor.execute(
-            "SELECT * FROM teams WHERE tournament_id = ?", 
-            (tournament["id"],)
-        )
-        teams = cursor.fetchall()
+    def read(conn):
+        tree = load_tournament_tree(conn.cursor(), include_players=include_players)
         
-        teams_data = []
-        for team in teams:
-            # Get players for this team
-            cursor.execute(
-                "SELECT * FROM players WHERE tournament_id = ? AND team_id = ?", 
-                (tournament["id"], team["id"])
-            )
-            players = cursor.fetchall()
+        result = []
+        for entry in tree:
+            tournament = entry["tournament"]
+            teams_data = []
+            for team in entry["teams"]:
+                team_data = {
+                    "id": team["id"],
+                    "name": team["name"],
+                    "totalBudget": team["total_budget"],
+                    "remainingBudget": team["remaining_budget"],
+                    "initialValue": team["total_budget"],
+                    "currentValue": team["remaining_budget"],
+                    "version": team["version"]
+                }
+                if include_players:
+                    team_data["players"] = [dict(p) for p in entry["team_players"][team["id"]]]
+                teams_data.append(team_data)
             
-            teams_data.append({
-                "id": team["id"],
-                "name": team["name"],
-                "totalBudget": team["total_budget"],
-                "remainingBudget": team["remaining_budget"],
-                "initialValue": team["total_budget"],
-                "currentValue": team["remaining_budget"],
-                "players": [dict(p) for p in players]
-            })
-        
-        # Get all players for tournament
-        cursor.execute(
-            "SELECT * FROM players WHERE tournament_id = ?", 
-            (tournament["id"],)
-        )
-        all_players = cursor.fetchall()
+            tournament_data = {
+                "id": tournament["id"],
+                "name": tournament["name"],
+                "teams": teams_data,
+                "createdAt": tournament["created_at"],
+                "revision": tournament["revision"]
+            }
+            if include_players:
+                tournament_data["players"] = [dict(p) for p in entry["players"]]
+            result.append(tournament_data)
         
-        result.append({
-            "id": tournament["id"],
-            "name": tournament["name"],
-            "teams": teams_data,
-            "players": [dict(p) for p in all_players],
-            "createdAt": tournament["created_at"]
-        })
+        return result
     
-    conn.close()
-    return result
+    body, encoding = await response_cache.get_or_load_encoded(
+        None, f"tournaments:{etag}", lambda: run_read(read), choose_encoding(accept_encoding)
+    )
+    return json_with_etag(body, etag, encoding)
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_tournament(
@@ -67,106 +77,131 @@ async def create_tournament(
     current_user: dict = Depends(require_role(["admin"]))
 ):
     """Create new tournament with teams"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    try:
-        # Insert tournament
-        cursor.execute(
-            "INSERT INTO tournaments (name, created_by) VALUES (?, ?)",
-            (tournament.name, current_user["username"])
-        )
-        tournament_id = cursor.lastrowid
+    def write(conn):
+        cursor = conn.cursor()
         
-        # Insert teams
-        for team in tournament.teams:
+        try:
+            # Insert tournament
             cursor.execute(
-                """INSERT INTO teams 
-                   (tournament_id, name, total_budget, remaining_budget) 
-                   VALUES (?, ?, ?, ?)""",
-                (tournament_id, team["name"], team["budget"], team["budget"])
+                "INSERT INTO tournaments (name, created_by) VALUES (?, ?)",
+                (tournament.name, current_user["username"])
             )
+            tournament_id = cursor.lastrowid
+            
+            # Insert teams
+            for team in tournament.teams:
+                cursor.execute(
+                    """INSERT INTO teams 
+                       (tournament_id, name, total_budget, remaining_budget) 
+                       VALUES (?, ?, ?, ?)""",
+                    (tournament_id, team["name"], team["budget"], team["budget"])
+                )
+            
+            conn.commit()
+            
+            # Fetch created tournament
+            cursor.execute("SELECT * FROM tournaments WHERE id = ?", (tournament_id,))
+            created_tournament = cursor.fetchone()
+            
+            cursor.execute("SELECT * FROM teams WHERE tournament_id = ?", (tournament_id,))
+            teams = cursor.fetchall()
+            
+            
+            return {
+                "id": created_tournament["id"],
+                "name": created_tournament["name"],
+                "teams": [
+                    {
+                        "id": t["id"],
+                        "name": t["name"],
+                        "totalBudget": t["total_budget"],
+                        "remainingBudget": t["remaining_budget"],
+                        "players": []
+                    } for t in teams
+                ],
+                "players": [],
+                "createdAt": created_tournament["created_at"]
+            }
         
-        conn.commit()
-        
-        # Fetch created tournament
-        cursor.execute("SELECT * FROM tournaments WHERE id = ?", (tournament_id,))
-        created_tournament = cursor.fetchone()
-        
-        cursor.execute("SELECT * FROM teams WHERE tournament_id = ?", (tournament_id,))
-        teams = cursor.fetchall()
-        
-        conn.close()
-        
-        return {
-            "id": created_tournament["id"],
-            "name": created_tournament["name"],
-            "teams": [
-                {
-                    "id": t["id"],
-                    "name": t["name"],
-                    "totalBudget": t["total_budget"],
-                    "remainingBudget": t["remaining_budget"],
-                    "players": []
-                } for t in teams
-            ],
-            "players": [],
-            "createdAt": created_tournament["created_at"]
-        }
+        except sqlite3.IntegrityError as e:
+            conn.rollback()
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Tournament creation failed: {str(e)}"
+            )
     
-    except sqlite3.IntegrityError as e:
-        conn.rollback()
-        conn.close()
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Tournament creation failed: {str(e)}"
-        )
+    result = await run_write(write)
+    await response_cache.invalidate(result["id"])
+    return result
 
-@router.get("/{tournament_id}")
+@router.get("/{tournament_id}", response_class=FastJSONResponse)
 async def get_tournament(
     tournament_id: int, 
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
     current_user: dict = Depends(verify_token)
 ):
-    """Get specific tournament details"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM tournaments WHERE id = ?", (tournament_id,))
-    tournament = cursor.fetchone()
-    
-    if not tournament:
-        conn.close()
+    """
+    Get specific tournament details.
+    Answers 304, without loading teams or players, when If-None-Match carries
+    the current ETag (derived from the tournament's revision).
+    """
+    etag = await run_read(lambda conn: tournament_etag(conn.cursor(), tournament_id, "tournament"))
+    if etag is None:
         raise HTTPException(status_code=404, detail="Tournament not found")
+    matched = matching_etag(if_none_match, etag)
+    if matched is not None:
+        return not_modified(matched)
     
-    cursor.execute("SELECT * FROM teams WHERE tournament_id = ?", (tournament_id,))
-    teams = cursor.fetchall()
-    
-    teams_data = []
-    for team in teams:
-        cursor.execute(
-            "SELECT * FROM players WHERE tournament_id = ? AND team_id = ?", 
-            (tournament_id, team["id"])
-        )
-        players = cursor.fetchall()
+    def read(conn):
+        tree = load_tournament_tree(conn.cursor(), tournament_id)
         
-        teams_data.append({
-            "id": team["id"],
-            "name": team["name"],
-            "totalBudget": team["total_budget"],
-            "remainingBudget": team["remaining_budget"],
-            "captain_id": team["captain_id"],
-            "vice_captain_id": team["vice_captain_id"],
-            "players": [dict(p) for p in players]
-        })
-    
-    conn.close()
+        if not tree:
+            raise HTTPException(status_code=404, detail="Tournament not found")
+        
+        entry = tree[0]
+        tournament = entry["tournament"]
+        teams_data = []
+        for team in entry["teams"]:
+            teams_data.append({
+                "id": team["id"],
+                "name": team["name"],
+                "totalBudget": team["total_budget"],
+                "remainingBudget": team["remaining_budget"],
+                "captain_id": team["captain_id"],
+                "vice_captain_id": team["vice_captain_id"],
+                "version": team["version"],
+                "players": [dict(p) for p in entry["team_players"][team["id"]]]
+            })
+        
+        return {
+            "id": tournament["id"],
+            "name": tournament["name"],
+            "teams": teams_data,
+            "createdAt": tournament["created_at"],
+            "revision": tournament["revision"]
+        }
     
-    return {
-        "id": tournament["id"],
-        "name": tournament["name"],
-        "teams": teams_data,
-        "createdAt": tournament["created_at"]
-    }
+    body, encoding = await response_cache.get_or_load_encoded(
+        tournament_id, f"tournament:{etag}", lambda: run_read(read), choose_encoding(accept_encoding)
+    )
+    return json_with_etag(body, etag, encoding)
+
+@router.get("/{tournament_id}/changes", response_class=FastJSONResponse)
+async def get_tournament_changes(
+    tournament_id: int,
+    since: int = Query(0, ge=0),
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Teams and players changed after revision `since`, with the ids of deleted
+    ones. Pass the returned revision as `since` next time. When `reset` is
+    true the history is gone; reload the tournament and sync from its revision.
+    """
+    result = await run_read(load_changes, tournament_id, since)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Tournament not found")
+    return result
 
 @router.put("/{tournament_id}")
 async def update_tournament(
@@ -175,23 +210,26 @@ async def update_tournament(
     current_user: dict = Depends(require_role(["admin"]))
 ):
     """Update tournament name"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM tournaments WHERE id = ?", (tournament_id,))
-    if not cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="Tournament not found")
-    
-    cursor.execute(
-        "UPDATE tournaments SET name = ? WHERE id = ?",
-        (tournament_data.name, tournament_id)
-    )
-    
-    conn.commit()
-    conn.close()
+    def write(conn):
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT * FROM tournaments WHERE id = ?", (tournament_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Tournament not found")
+        
+        cursor.execute(
+            "UPDATE tournaments SET name = ? WHERE id = ?",
+            (tournament_data.name, tournament_id)
+        )
+        
+        conn.commit()
+        
+        return {"message": "Tournament updated successfully"}
     
-    return {"message": "Tournament updated successfully"}
+    result = await run_write(write)
+    await response_cache.invalidate(tournament_id)
+    broker.publish(tournament_id, "tournament-updated", {"name": tournament_data.name})
+    return result
 
 @router.delete("/{tournament_id}")
 async def delete_tournament(
@@ -199,17 +237,20 @@ async def delete_tournament(
     current_user: dict = Depends(require_role(["admin"]))
 ):
     """Delete tournament"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM tournaments WHERE id = ?", (tournament_id,))
-    if not cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="Tournament not found")
-    
-    cursor.execute("DELETE FROM tournaments WHERE id = ?", (tournament_id,))
-    
-    conn.commit()
-    conn.close()
+    def write(conn):
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT * FROM tournaments WHERE id = ?", (tournament_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Tournament not found")
+        
+        cursor.execute("DELETE FROM tournaments WHERE id = ?", (tournament_id,))
+        
+        conn.commit()
+        
+        return {"message": "Tournament deleted successfully"}
     
-    return {"message": "Tournament deleted successfully"}
\ No newline at end of file
+    result = await run_write(write)
+    await response_cache.invalidate(tournament_id)
+    broker.publish(tournament_id, "tournament-deleted", {})
+    return result
\ No newline at end of file
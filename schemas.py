@@ -43,3 +43,16 @@ class PlayerAssign(BaseModel):
     team_id: int
     emp_id: str
     bid_amount: float
+    expected_version: Optional[int] = None
+
+# ==================== LIVE BIDDING SCHEMAS ====================
+
+class LotOpen(BaseModel):
+    emp_id: str
+    base_price: float = 0
+    increment: float = 1
+    duration_seconds: Optional[float] = None
+
+class BidPlace(BaseModel):
+    team_id: int
+    amount: float
@@ -0,0 +1,68 @@
+"""
+JSON encoding for responses.
+
+AUCTION_JSON_ENCODER picks the encoder behind cached views and FastJSONResponse:
+    json     standard library (default)
+    orjson   orjson, several times faster on large player lists; requires the
+             `orjson` package
+
+FastJSONResponse is set as response_class on the hot listing routes. It only
+replaces the final encoding step: FastAPI still runs jsonable_encoder over
+dicts and models a route returns. Only a handler that builds
+FastJSONResponse(content) itself skips it, so that content must already be
+plain JSON types (dicts, lists, tuples, str, numbers, None), as sqlite rows
+converted with dict() or tuple() are.
+"""
+import json
+import os
+from typing import Any, Callable
+
+from fastapi.responses import JSONResponse
+
+JSON_ENCODER = os.environ.get("AUCTION_JSON_ENCODER", "json")
+
+def _json_dumps(data: Any) -> bytes:
+    """Encode like FastAPI's default JSONResponse"""
+    return json.dumps(
+        data, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+def _orjson_dumps() -> Callable[[Any], bytes]:
+    try:
+        import orjson
+    except ImportError:
+        raise RuntimeError("AUCTION_JSON_ENCODER=orjson requires the orjson package (pip install orjson)")
+
+    def dumps(data: Any) -> bytes:
+        # Integer keys become strings, as with the json module
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+    return dumps
+
+def get_encoder(name: str) -> Callable[[Any], bytes]:
+    if name == "json":
+        return _json_dumps
+    if name == "orjson":
+        return _orjson_dumps()
+    raise ValueError(f"Unknown AUCTION_JSON_ENCODER {name!r}; use json or orjson")
+
+_encode = get_encoder(JSON_ENCODER)
+
+def encode_json(data: Any) -> bytes:
+    """Encode data with the configured encoder"""
+    return _encode(data)
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with the configured encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+def rows_as_columns(cursor) -> dict:
+    """
+    The cursor's result as {"columns": [...], "rows": [[...], ...]}.
+    Execute with cursor.row_factory = None so rows arrive as plain tuples,
+    without building a sqlite3.Row or dict per row.
+    """
+    columns = [column[0] for column in cursor.description]
+    return {"columns": columns, "rows": cursor.fetchall()}
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Cheap password hashes keep the many fresh databases fast to migrate
+os.environ.setdefault("AUCTION_SCRYPT_N", "1024")
+
+import database  # noqa: E402
+from utils import create_access_token  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Point the app at a fresh, initialized database file"""
+    path = str(tmp_path / "test_auction.db")
+    monkeypatch.setattr(database, "DATABASE_PATH", path)
+    database.init_db()
+    return path
+
+
+@pytest.fixture
+def app_client(db_path):
+    """TestClient for the app on a fresh database, lifespan started, signed out"""
+    import main
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def admin_client(app_client):
+    """app_client sending an admin token"""
+    app_client.headers["Authorization"] = "Bearer " + create_access_token({"sub": "admin", "role": "admin"})
+    return app_client
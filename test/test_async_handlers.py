@@ -0,0 +1,46 @@
+"""
+Async route handlers must not call sqlite3 directly; queries go through
+run_read/run_write so they run off the event loop.
+"""
+import ast
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUTERS = sorted(
+    name for name in os.listdir(os.path.join(ROOT, "routers")) if name.endswith(".py")
+)
+BLOCKING_CALLS = {"execute", "executemany", "executescript", "fetchone", "fetchall", "cursor"}
+
+
+def blocking_calls(handler):
+    """Blocking calls made in the handler body itself, not in nested functions"""
+    found = []
+    stack = list(handler.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            continue
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr in BLOCKING_CALLS
+        ):
+            found.append(f"{node.func.attr}() at line {node.lineno}")
+        stack.extend(ast.iter_child_nodes(node))
+    return found
+
+
+@pytest.mark.parametrize("source", ROUTERS)
+def test_async_handlers_do_not_block(source):
+    with open(os.path.join(ROOT, "routers", source)) as f:
+        tree = ast.parse(f.read())
+    offenders = {
+        node.name: calls
+        for node in ast.walk(tree)
+        if isinstance(node, ast.AsyncFunctionDef)
+        for calls in [blocking_calls(node)]
+        if calls
+    }
+    assert not offenders, offenders
@@ -0,0 +1,129 @@
+import random
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import database
+from routers.auction import assign_player
+
+TEAMS = 8
+PLAYERS = 2000
+BIDS = 4000
+THREADS = 16
+BUDGET = 1000
+
+
+def seed(conn):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO tournaments (name, created_by) VALUES ('Stress', 'admin')")
+    tournament_id = cursor.lastrowid
+    team_ids = []
+    for k in range(TEAMS):
+        cursor.execute(
+            """INSERT INTO teams (tournament_id, name, total_budget, remaining_budget)
+               VALUES (?, ?, ?, ?)""",
+            (tournament_id, f"Team {k}", BUDGET, BUDGET)
+        )
+        team_ids.append(cursor.lastrowid)
+    cursor.executemany(
+        "INSERT INTO people (emp_id, name, type) VALUES (?, ?, 'Batsman')",
+        [(f"E{p}", f"Player {p}") for p in range(PLAYERS)]
+    )
+    cursor.executemany(
+        "INSERT INTO players (tournament_id, emp_id) VALUES (?, ?)",
+        [(tournament_id, f"E{p}") for p in range(PLAYERS)]
+    )
+    conn.commit()
+    return tournament_id, team_ids
+
+
+def test_parallel_bids_never_overdraw(db_path):
+    conn = database.get_db()
+    tournament_id, team_ids = seed(conn)
+    conn.close()
+
+    outcomes = {"ok": 0, 400: 0}
+    lock = threading.Lock()
+    start = threading.Barrier(THREADS)
+
+    def bidder(seed_value):
+        rng = random.Random(seed_value)
+        conn = database.get_db()
+        start.wait()
+        for _ in range(BIDS // THREADS):
+            try:
+                assign_player(
+                    conn,
+                    tournament_id,
+                    rng.choice(team_ids),
+                    f"E{rng.randrange(PLAYERS)}",
+                    rng.randint(1, 60)
+                )
+                result = "ok"
+            except HTTPException as e:
+                result = e.status_code
+            with lock:
+                outcomes[result] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=bidder, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(outcomes.values()) == BIDS
+    # Budgets run out long before players do, so plenty of bids must be refused
+    assert outcomes["ok"] > 0 and outcomes[400] > 0
+
+    conn = database.get_db()
+    cursor = conn.cursor()
+    for team_id in team_ids:
+        cursor.execute("SELECT remaining_budget, version FROM teams WHERE id = ?", (team_id,))
+        team = cursor.fetchone()
+        cursor.execute(
+            "SELECT COUNT(*), COALESCE(SUM(bid_amount), 0) FROM players WHERE team_id = ? AND is_assigned = 1",
+            (team_id,)
+        )
+        roster, spent = cursor.fetchone()
+        assert team["remaining_budget"] >= 0
+        assert team["remaining_budget"] == BUDGET - spent
+        assert team["version"] == roster
+
+    cursor.execute("SELECT COUNT(*) FROM players WHERE is_assigned = 1")
+    assert cursor.fetchone()[0] == outcomes["ok"]
+    conn.close()
+
+
+def test_stale_version_is_rejected(db_path):
+    conn = database.get_db()
+    tournament_id, team_ids = seed(conn)
+
+    result = assign_player(conn, tournament_id, team_ids[0], "E1", 10, expected_version=0)
+    assert result == {"remaining_budget": BUDGET - 10, "version": 1}
+
+    with pytest.raises(HTTPException) as stale:
+        assign_player(conn, tournament_id, team_ids[0], "E2", 10, expected_version=0)
+    assert stale.value.status_code == 412
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT remaining_budget FROM teams WHERE id = ?", (team_ids[0],))
+    assert cursor.fetchone()[0] == BUDGET - 10
+    cursor.execute("SELECT is_assigned FROM players WHERE emp_id = 'E2'")
+    assert cursor.fetchone()[0] == 0
+    conn.close()
+
+
+def test_failed_player_update_restores_budget(db_path):
+    conn = database.get_db()
+    tournament_id, team_ids = seed(conn)
+
+    with pytest.raises(HTTPException) as missing:
+        assign_player(conn, tournament_id, team_ids[0], "NOPE", 50)
+    assert missing.value.status_code == 400
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT remaining_budget, version FROM teams WHERE id = ?", (team_ids[0],))
+    assert tuple(cursor.fetchone()) == (BUDGET, 0)
+    conn.close()
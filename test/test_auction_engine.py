@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from routers import auction_engine
+from routers.auction_engine import AuctionEngine
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_engine(settled, fail=None):
+    async def settle(lot):
+        if fail:
+            raise HTTPException(status_code=400, detail=fail)
+        settled.append((lot.tournament_id, lot.bidder_id, lot.emp_id, lot.highest_bid))
+    return AuctionEngine(settle=settle)
+
+
+def test_bids_validate_increment_and_budget():
+    async def scenario():
+        engine = make_engine([])
+        engine.open_lot(1, "E1", base_price=10, increment=5, budgets={1: 100, 2: 12})
+
+        with pytest.raises(HTTPException) as e:
+            engine.place_bid(1, 1, 9)
+        assert e.value.status_code == 400
+
+        engine.place_bid(1, 2, 10)
+        with pytest.raises(HTTPException):
+            engine.place_bid(1, 1, 14)
+        with pytest.raises(HTTPException):
+            engine.place_bid(1, 2, 15)  # already the highest bidder
+        state = engine.place_bid(1, 1, 15)
+        assert state["highest_bid"] == 15 and state["minimum_bid"] == 20
+
+        with pytest.raises(HTTPException) as e:
+            engine.place_bid(1, 2, 20)  # over budget
+        assert e.value.detail == "Insufficient budget"
+        with pytest.raises(HTTPException) as e:
+            engine.place_bid(1, 99, 20)
+        assert e.value.status_code == 404
+        engine.cancel_lot(1)
+    run(scenario())
+
+
+def test_close_settles_winner_once():
+    settled = []
+
+    async def scenario():
+        engine = make_engine(settled)
+        engine.open_lot(1, "E1", base_price=10, increment=5, budgets={1: 100, 2: 100})
+        engine.place_bid(1, 1, 10)
+        engine.place_bid(1, 2, 25)
+        first, second = await asyncio.gather(engine.close_lot(1), engine.close_lot(1))
+        assert first["status"] == second["status"] == "sold"
+        with pytest.raises(HTTPException):
+            engine.place_bid(1, 1, 30)
+    run(scenario())
+    assert settled == [(1, 2, "E1", 25)]
+
+
+def test_timer_expires_and_late_bid_extends(monkeypatch):
+    monkeypatch.setattr(auction_engine, "ANTI_SNIPE_SECONDS", 0.2)
+    settled = []
+
+    async def scenario():
+        engine = make_engine(settled)
+        engine.open_lot(1, "E1", base_price=1, increment=1, budgets={1: 10}, duration=0.05)
+        engine.place_bid(1, 1, 1)
+        await asyncio.sleep(0.1)
+        assert engine.state(1)["status"] == "open"
+        await asyncio.sleep(0.2)
+        assert engine.state(1)["status"] == "sold"
+
+        engine.open_lot(1, "E2", base_price=1, increment=1, budgets={1: 10}, duration=0.05)
+        await asyncio.sleep(0.1)
+        assert engine.state(1)["status"] == "unsold"
+    run(scenario())
+    assert settled == [(1, 1, "E1", 1)]
+
+
+def test_failed_settlement_is_reported():
+    async def scenario():
+        engine = make_engine([], fail="Player already assigned")
+        engine.open_lot(1, "E1", base_price=1, increment=1, budgets={1: 10})
+        engine.place_bid(1, 1, 5)
+        state = await engine.close_lot(1)
+        assert state["status"] == "failed"
+        assert state["detail"] == "Player already assigned"
+    run(scenario())
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+import utils
+from database import get_db
+from utils import (
+    RevocationList, TokenCache, create_access_token, decode_token, require_role, token_cache, token_hash
+)
+
+
+def login(client, username="admin", password="admin@123"):
+    response = client.post("/api/auth/login", json={"username": username, "password": password})
+    assert response.status_code == 200
+    return response.json()["token"]
+
+
+def test_verified_tokens_are_cached(monkeypatch):
+    token = create_access_token({"sub": "alice", "role": "guest"})
+    assert decode_token(token) == {"username": "alice", "role": "guest"}
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached token decoded again")
+
+    monkeypatch.setattr(utils.jwt, "decode", fail)
+    user = decode_token(token)
+    user["role"] = "admin"
+    assert decode_token(token) == {"username": "alice", "role": "guest"}
+
+    # Expiry is checked against the cached exp
+    token_cache.put(token_hash("stale"), {"username": "bob", "role": "admin"}, time.time() - 1)
+    with pytest.raises(HTTPException) as error:
+        decode_token("stale")
+    assert error.value.detail == "Token has expired"
+    assert token_cache.get(token_hash("stale")) is None
+
+
+def test_token_cache_is_bounded():
+    cache = TokenCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, {"username": key, "role": "guest"}, None)
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+
+
+def test_role_checks_are_shared():
+    assert require_role(["admin", "auctioneer"]) is require_role(["auctioneer", "admin"])
+    assert require_role(["admin"]) is not require_role(["admin", "auctioneer"])
+
+
+def test_logout_revokes_token(app_client):
+    token = login(app_client)
+    other = login(app_client)
+    assert token != other
+    headers = {"Authorization": f"Bearer {token}"}
+    assert app_client.get("/api/auth/verify", headers=headers).status_code == 200
+
+    assert app_client.post("/api/auth/logout", headers=headers).status_code == 200
+    response = app_client.get("/api/auth/verify", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+    assert app_client.get("/api/auth/verify", headers={"Authorization": f"Bearer {other}"}).status_code == 200
+    assert app_client.post("/api/auth/logout").status_code == 200
+
+    # Another worker learns of the revocation from the table
+    conn = get_db()
+    worker = RevocationList()
+    worker.load(conn)
+    conn.close()
+    assert token_hash(token) in worker and token_hash(other) not in worker
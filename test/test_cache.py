@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import pytest
+
+from cache import MemoryBackend, NullBackend, RedisBackend, ResponseCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class StandInRedis:
+    """Minimal stand-in for the redis.asyncio client calls the backend uses"""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.expiry[key] = ex
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+
+def counting_loader(value, calls):
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return value
+    return load
+
+
+@pytest.mark.parametrize("backend", [
+    lambda: MemoryBackend(),
+    lambda: RedisBackend(client=StandInRedis()),
+])
+def test_hits_until_tournament_is_invalidated(backend):
+    async def scenario():
+        cache = ResponseCache(backend())
+        calls = []
+        first = await cache.get_or_load(1, "tournament", counting_loader({"id": 1}, calls))
+        again = await cache.get_or_load(1, "tournament", counting_loader({"id": 1}, calls))
+        listing = await cache.get_or_load(None, "tournaments", counting_loader([1, 2], calls))
+        assert json.loads(listing) == [1, 2]
+        other = await cache.get_or_load(2, "tournament", counting_loader({"id": 2}, calls))
+        assert json.loads(first) == {"id": 1} and again == first
+        assert len(calls) == 3
+
+        await cache.invalidate(1)
+        await cache.get_or_load(1, "tournament", counting_loader({"id": 1}, calls))
+        await cache.get_or_load(None, "tournaments", counting_loader([1, 2], calls))
+        assert await cache.get_or_load(2, "tournament", counting_loader({}, calls)) == other
+        assert len(calls) == 5
+        return cache.stats()
+
+    stats = run(scenario())
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (2, 5, 1)
+
+
+def test_memory_lru_and_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("cache.time.monotonic", lambda: now[0])
+
+    async def scenario():
+        backend = MemoryBackend(max_entries=2, ttl=10)
+        await backend.set("1", "a", 0, b"a")
+        await backend.set("1", "b", 0, b"b")
+        assert await backend.get("1", "a", 0) == b"a"  # "b" is now least recently used
+        await backend.set("1", "c", 0, b"c")
+        assert await backend.get("1", "b", 0) is None
+        assert backend.evictions == 1
+
+        now[0] += 11
+        assert await backend.get("1", "a", 0) is None
+        assert backend.stats()["entries"] == 1
+
+    run(scenario())
+
+
+def test_load_racing_a_write_is_not_served():
+    async def scenario():
+        cache = ResponseCache(MemoryBackend())
+
+        async def load_then_write():
+            # The write commits and invalidates while this load is in flight
+            await cache.invalidate(1)
+            return {"stale": True}
+
+        await cache.get_or_load(1, "tournament", load_then_write)
+        calls = []
+        body = await cache.get_or_load(1, "tournament", counting_loader({"stale": False}, calls))
+        assert json.loads(body) == {"stale": False}
+
+    run(scenario())
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = ResponseCache(MemoryBackend())
+        calls = []
+        bodies = await asyncio.gather(*(
+            cache.get_or_load(1, "players", counting_loader([1, 2, 3], calls)) for _ in range(20)
+        ))
+        assert len(calls) == 1
+        assert len(set(bodies)) == 1
+
+    run(scenario())
+
+
+def test_failed_load_is_not_cached():
+    async def scenario():
+        cache = ResponseCache(NullBackend())
+
+        async def missing():
+            raise LookupError("Tournament not found")
+
+        with pytest.raises(LookupError):
+            await cache.get_or_load(1, "tournament", missing)
+        calls = []
+        await cache.get_or_load(1, "tournament", counting_loader({}, calls))
+        assert calls == [1]
+
+    run(scenario())
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+import changes
+from changes import compact_changes
+from database import get_db
+
+
+@pytest.fixture
+def tournament(admin_client):
+    response = admin_client.post("/api/tournaments/", json={
+        "name": "Changes", "teams": [{"name": "A", "budget": 100}, {"name": "B", "budget": 100}]
+    })
+    return response.json()
+
+
+def add_player(client, tournament_id, emp_id):
+    client.post(f"/api/tournaments/{tournament_id}/players", json={"emp_id": emp_id, "name": emp_id, "type": "Bowler"})
+
+
+def sync(client, tournament_id, since):
+    response = client.get(f"/api/tournaments/{tournament_id}/changes", params={"since": since})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_changes_carry_only_changed_rows(admin_client, tournament):
+    tournament_id = tournament["id"]
+    team_a = tournament["teams"][0]["id"]
+    for emp_id in ("E1", "E2", "E3"):
+        add_player(admin_client, tournament_id, emp_id)
+    revision = sync(admin_client, tournament_id, 0)["revision"]
+
+    assert sync(admin_client, tournament_id, revision)["players"] == []
+
+    admin_client.post("/api/auction/assign", json={
+        "tournament_id": tournament_id, "team_id": team_a, "emp_id": "E2", "bid_amount": 30
+    })
+    delta = sync(admin_client, tournament_id, revision)
+    assert delta["revision"] > revision and not delta["reset"]
+    assert [p["emp_id"] for p in delta["players"]] == ["E2"]
+    assert [t["id"] for t in delta["teams"]] == [team_a]
+    assert delta["teams"][0]["remainingBudget"] == 70
+    assert delta["tournament"] is None
+    # A bid's delta stays small
+    assert len(json.dumps(delta)) < 1000
+
+    player_id = delta["players"][0]["id"]
+    admin_client.delete(f"/api/tournaments/{tournament_id}/players/E2")
+    admin_client.put(f"/api/tournaments/{tournament_id}", json={"name": "Renamed"})
+    delta = sync(admin_client, tournament_id, delta["revision"])
+    assert delta["deleted"]["players"] == [player_id]
+    assert delta["tournament"]["name"] == "Renamed"
+
+
+def test_compaction_keeps_sync_correct(admin_client, tournament):
+    tournament_id = tournament["id"]
+    add_player(admin_client, tournament_id, "E1")
+    add_player(admin_client, tournament_id, "E2")
+    revision = sync(admin_client, tournament_id, 0)["revision"]
+    for name in ("One", "Two", "Three"):
+        admin_client.put(f"/api/tournaments/{tournament_id}/players/E1", json={"name": name})
+    admin_client.delete(f"/api/tournaments/{tournament_id}/players/E2")
+    before = sync(admin_client, tournament_id, revision)
+
+    conn = get_db()
+    assert compact_changes(conn) > 0
+    conn.commit()
+    assert conn.execute(
+        "SELECT COUNT(*) FROM changes GROUP BY entity, entity_id HAVING COUNT(*) > 1"
+    ).fetchall() == []
+    assert sync(admin_client, tournament_id, revision) == before
+
+    # Expiring the tombstone moves the floor past older clients
+    assert compact_changes(conn, retention_seconds=-60) == 1
+    conn.commit()
+    conn.close()
+    assert sync(admin_client, tournament_id, revision)["reset"] is True
+    latest = sync(admin_client, tournament_id, before["revision"])
+    assert latest["reset"] is False and latest["players"] == []
+
+
+def test_reset_and_missing(admin_client, tournament, db_path):
+    tournament_id = tournament["id"]
+    current = sync(admin_client, tournament_id, 0)["revision"]
+    assert sync(admin_client, tournament_id, current + 5)["reset"] is True
+    assert admin_client.get("/api/tournaments/999/changes").status_code == 404
+
+    admin_client.delete(f"/api/tournaments/{tournament_id}")
+    conn = get_db()
+    assert conn.execute("SELECT COUNT(*) FROM changes").fetchone()[0] == 0
+    conn.close()
+    assert changes.main(["--db", db_path, "compact"]) == 0
+
+
+def test_person_edit_reaches_every_tournament(admin_client, tournament):
+    other = admin_client.post("/api/tournaments/", json={
+        "name": "Other", "teams": [{"name": "C", "budget": 100}]
+    }).json()
+    add_player(admin_client, tournament["id"], "E1")
+    add_player(admin_client, other["id"], "E1")
+    url = f"/api/tournaments/{other['id']}/players"
+    assert admin_client.get(url).json()[0]["name"] == "E1"
+    revision = sync(admin_client, other["id"], 0)["revision"]
+
+    admin_client.put(f"/api/tournaments/{tournament['id']}/players/E1", json={"name": "Renamed"})
+    # The other tournament's cached listing is dropped and its log records the edit
+    assert admin_client.get(url).json()[0]["name"] == "Renamed"
+    delta = sync(admin_client, other["id"], revision)
+    assert [(p["emp_id"], p["name"]) for p in delta["players"]] == [("E1", "Renamed")]
+
+    # Saving the same details again changes nothing anywhere
+    admin_client.put(f"/api/tournaments/{tournament['id']}/players/E1", json={"name": "Renamed"})
+    assert sync(admin_client, other["id"], delta["revision"])["players"] == []
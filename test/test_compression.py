@@ -0,0 +1,112 @@
+import gzip
+
+import pytest
+
+import cache
+import compression
+from compression import choose_encoding, is_compressible
+from database import get_db
+
+
+@pytest.fixture
+def tournament_id(admin_client):
+    tournament_id = admin_client.post("/api/tournaments/", json={"name": "Big", "teams": []}).json()["id"]
+    conn = get_db()
+    conn.executemany(
+        "INSERT INTO people (emp_id, name, type) VALUES (?, ?, 'Batsman')",
+        [(f"E{i}", f"Player {i}") for i in range(200)]
+    )
+    conn.executemany(
+        "INSERT INTO players (tournament_id, emp_id) VALUES (?, ?)",
+        [(tournament_id, f"E{i}") for i in range(200)]
+    )
+    conn.commit()
+    conn.close()
+    return tournament_id
+
+
+def test_negotiation(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("br, gzip;q=0") is None
+    assert choose_encoding("*;q=0.5") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding(None) is None
+    assert is_compressible("application/json") and is_compressible("text/html; charset=utf-8")
+    assert not is_compressible("text/event-stream") and not is_compressible("image/jpeg")
+
+
+def test_large_responses_are_compressed(admin_client, tournament_id):
+    url = f"/api/tournaments/{tournament_id}/players"
+    plain = admin_client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    compressed = admin_client.get(url, params={"limit": 150}, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["vary"]
+    assert compressed.json() == plain.json()[:150]
+    assert int(compressed.headers["content-length"]) < len(plain.content) / 4
+
+    small = admin_client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_cached_views_are_compressed_once(admin_client, tournament_id, monkeypatch):
+    calls = []
+    real_compress = cache.compress
+
+    def counting(body, encoding):
+        calls.append(encoding)
+        return real_compress(body, encoding)
+
+    def middleware_compress(body, encoding):
+        raise AssertionError("precompressed body compressed again")
+
+    monkeypatch.setattr(cache, "compress", counting)
+    monkeypatch.setattr(compression, "compress", middleware_compress)
+
+    url = f"/api/tournaments/{tournament_id}/players"
+    bodies = []
+    for _ in range(3):
+        response = admin_client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        bodies.append(response.json())
+    assert calls == ["gzip"]
+    assert len(bodies[0]) == 200 and bodies[0] == bodies[2]
+
+    # A write moves the ETag, so the next request compresses the new snapshot
+    admin_client.post(f"/api/tournaments/{tournament_id}/players", json={
+        "emp_id": "NEW", "name": "N", "type": "Bowler"
+    })
+    assert len(admin_client.get(url, headers={"Accept-Encoding": "gzip"}).json()) == 201
+    assert calls == ["gzip", "gzip"]
+
+
+def test_brotli_when_installed(admin_client, tournament_id):
+    brotli = pytest.importorskip("brotli")
+    response = admin_client.get(f"/api/tournaments/{tournament_id}/players", headers={"Accept-Encoding": "br, gzip"})
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(compression.compress(b"x" * 2000, "br")) == b"x" * 2000
+
+
+def test_gzip_is_deterministic():
+    body = b'{"players":[' + b'{"name":"P"},' * 200 + b'{}]}'
+    assert compression.compress(body, "gzip") == compression.compress(body, "gzip")
+    assert gzip.decompress(compression.compress(body, "gzip")) == body
+
+
+def test_each_coding_has_its_own_etag(admin_client, tournament_id):
+    for url in (f"/api/tournaments/{tournament_id}/players",
+                f"/api/tournaments/{tournament_id}/players?limit=150"):
+        plain = admin_client.get(url, headers={"Accept-Encoding": "identity"}).headers["etag"]
+        # Precompressed by the cache, and compressed by the middleware
+        compressed = admin_client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.headers["etag"] == plain[:-1] + '-gzip"'
+
+        # Either form revalidates, and the 304 confirms the one the admin_client holds
+        for etag in (plain, compressed.headers["etag"]):
+            response = admin_client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+            assert response.status_code == 304 and response.headers["etag"] == etag
+
@@ -0,0 +1,84 @@
+import pytest
+
+
+
+@pytest.fixture
+def tournament_id(admin_client):
+    response = admin_client.post("/api/tournaments/", json={"name": "ETag", "teams": [{"name": "A", "budget": 100}]})
+    return response.json()["id"]
+
+
+def test_tournament_not_modified_skips_loading(admin_client, tournament_id, monkeypatch):
+    first = admin_client.get(f"/api/tournaments/{tournament_id}")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.json()["revision"] >= 0
+
+    import cache
+
+    def fail(*args):
+        raise AssertionError("tournament tree loaded for a 304")
+
+    monkeypatch.setattr(cache.response_cache, "get_or_load", fail)
+    second = admin_client.get(f"/api/tournaments/{tournament_id}", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert second.content == b""
+
+
+@pytest.mark.parametrize("path", ["/api/tournaments/{id}", "/api/tournaments/{id}/players", "/api/tournaments/"])
+def test_mutation_changes_etag(admin_client, tournament_id, path):
+    url = path.format(id=tournament_id)
+    etag = admin_client.get(url).headers["etag"]
+    assert admin_client.get(url, headers={"If-None-Match": f'W/{etag}, "other"'}).status_code == 304
+
+    admin_client.post(f"/api/tournaments/{tournament_id}/players", json={
+        "emp_id": "E1", "name": "P1", "type": "Bowler"
+    })
+
+    fresh = admin_client.get(url, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+
+
+@pytest.mark.parametrize("path, variants", [
+    ("/api/tournaments/", [{}, {"include_players": "false"}]),
+    ("/api/tournaments/{id}/players", [
+        {}, {"format": "columns"}, {"fields": "emp_id"}, {"type": "Bowler"}, {"limit": 1}, {"after": 0}
+    ]),
+])
+def test_each_variant_has_its_own_etag(admin_client, tournament_id, path, variants):
+    url = path.format(id=tournament_id)
+    etags = [admin_client.get(url, params=params).headers["etag"] for params in variants]
+    assert len(set(etags)) == len(etags)
+
+    # One variant's ETag must not answer 304 for another
+    for params, etag in zip(variants, etags):
+        assert admin_client.get(url, params=params, headers={"If-None-Match": etag}).status_code == 304
+        other = etags[0] if etag != etags[0] else etags[1]
+        assert admin_client.get(url, params=params, headers={"If-None-Match": other}).status_code == 200
+
+
+def test_revision_increases_on_every_change(admin_client, tournament_id):
+    def revision():
+        return admin_client.get(f"/api/tournaments/{tournament_id}").json()["revision"]
+
+    seen = [revision()]
+    team_id = admin_client.get(f"/api/tournaments/{tournament_id}").json()["teams"][0]["id"]
+    admin_client.put(f"/api/tournaments/{tournament_id}", json={"name": "Renamed"})
+    seen.append(revision())
+    admin_client.post(f"/api/tournaments/{tournament_id}/players", json={
+        "emp_id": "E1", "name": "P1", "type": "Bowler"
+    })
+    seen.append(revision())
+    admin_client.post("/api/auction/assign", json={
+        "tournament_id": tournament_id, "team_id": team_id, "emp_id": "E1", "bid_amount": 10
+    })
+    seen.append(revision())
+    admin_client.delete(f"/api/tournaments/{tournament_id}/players/E1")
+    seen.append(revision())
+    assert seen == sorted(set(seen))
+
+
+def test_unknown_tournament(admin_client):
+    assert admin_client.get("/api/tournaments/999").status_code == 404
+    assert admin_client.get("/api/tournaments/999/players").json() == []
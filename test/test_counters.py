@@ -0,0 +1,96 @@
+import io
+
+import counters
+from counters import check_counters, rebuild_counters
+from database import get_db
+from importer import import_players
+from routers.auction import assign_player
+
+
+def stats(conn, tournament_id):
+    row = conn.execute(
+        "SELECT total_players, assigned_players, total_bids FROM tournament_stats WHERE tournament_id = ?",
+        (tournament_id,)
+    ).fetchone()
+    return tuple(row)
+
+
+def seed(conn):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO tournaments (name, created_by) VALUES ('Counters', 'admin')")
+    tournament_id = cursor.lastrowid
+    team_ids = []
+    for name in ("A", "B"):
+        cursor.execute(
+            "INSERT INTO teams (tournament_id, name, total_budget, remaining_budget) VALUES (?, ?, 100, 100)",
+            (tournament_id, name)
+        )
+        team_ids.append(cursor.lastrowid)
+    conn.commit()
+    return tournament_id, team_ids
+
+
+def test_triggers_follow_every_mutation(db_path):
+    conn = get_db()
+    tournament_id, (team_a, team_b) = seed(conn)
+
+    csv = io.BytesIO(b"emp_id,name,type\n" + b"".join(b"E%d,P%d,Batsman\n" % (i, i) for i in range(6)))
+    import_players(tournament_id, csv, "players.csv")
+    assert stats(conn, tournament_id) == (6, 0, 0)
+
+    assign_player(conn, tournament_id, team_a, "E0", 30)
+    assign_player(conn, tournament_id, team_a, "E1", 20)
+    assign_player(conn, tournament_id, team_b, "E2", 15)
+    assert stats(conn, tournament_id) == (6, 3, 65)
+
+    conn.execute(
+        "UPDATE players SET bid_amount = 25 WHERE tournament_id = ? AND emp_id = 'E2'", (tournament_id,)
+    )
+    conn.execute("DELETE FROM players WHERE tournament_id = ? AND emp_id = 'E1'", (tournament_id,))
+    conn.execute("UPDATE people SET name = 'Renamed'")
+    conn.commit()
+    assert stats(conn, tournament_id) == (5, 2, 55)
+    teams = dict(conn.execute(
+        "SELECT team_id, roster_size FROM team_stats WHERE tournament_id = ?", (tournament_id,)
+    ).fetchall())
+    assert teams == {team_a: 1, team_b: 1}
+
+    # Unassign then delete a team, as DELETE /teams/{id} does
+    conn.execute(
+        "UPDATE players SET team_id = NULL, is_assigned = 0, bid_amount = 0 WHERE team_id = ?", (team_b,)
+    )
+    conn.execute("DELETE FROM teams WHERE id = ?", (team_b,))
+    conn.commit()
+    assert stats(conn, tournament_id) == (5, 1, 30)
+    assert check_counters(conn) == []
+
+    conn.execute("DELETE FROM tournaments WHERE id = ?", (tournament_id,))
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM tournament_stats").fetchone()[0] == 0
+    assert check_counters(conn) == []
+    conn.close()
+
+
+def test_rebuild_repairs_drift(db_path, capsys):
+    conn = get_db()
+    tournament_id, (team_a, _) = seed(conn)
+    conn.execute("INSERT INTO people (emp_id, name, type) VALUES ('E1', 'P1', 'Bowler')")
+    conn.execute(
+        "INSERT INTO players (tournament_id, team_id, emp_id, bid_amount, is_assigned) VALUES (?, ?, 'E1', 40, 1)",
+        (tournament_id, team_a)
+    )
+    conn.execute("UPDATE tournament_stats SET assigned_players = 7")
+    conn.execute("UPDATE team_stats SET spent = 0 WHERE team_id = ?", (team_a,))
+    conn.execute("DELETE FROM team_stats WHERE team_id != ?", (team_a,))
+    conn.commit()
+
+    problems = check_counters(conn)
+    assert len(problems) == 3
+    assert counters.main(["--db", db_path, "check"]) == 1
+
+    rebuild_counters(conn)
+    conn.commit()
+    assert check_counters(conn) == []
+    assert stats(conn, tournament_id) == (1, 1, 40)
+    assert counters.main(["--db", db_path, "check"]) == 0
+    conn.close()
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import database
+from database import ConnectionPool, DatabaseWriter, PoolExhaustedError, get_db, run_read
+
+
+def test_pool_reuses_connections(db_path):
+    pool = ConnectionPool(db_path, size=2)
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    assert pool.stats()["opened"] == 1
+    pool.close()
+
+
+def test_release_rolls_back_open_transaction(db_path):
+    pool = ConnectionPool(db_path, size=1)
+    conn = pool.acquire()
+    conn.execute("INSERT INTO tournaments (name, created_by) VALUES ('T', 'admin')")
+    assert conn.in_transaction
+    pool.release(conn)
+
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM tournaments").fetchone()[0] == 0
+    pool.close()
+
+
+def test_connections_have_pragmas(db_path):
+    pool = ConnectionPool(db_path, size=1)
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    pool.close()
+
+
+def test_exhausted_pool_reports_leak(db_path, caplog):
+    pool = ConnectionPool(db_path, size=1, timeout=0.05, leak_timeout=0.01)
+    pool.acquire()
+    time.sleep(0.02)
+    with pytest.raises(PoolExhaustedError):
+        pool.acquire()
+    assert len(pool.find_leaks()) == 1
+    assert "possible leak" in caplog.text
+    pool.close()
+
+
+def test_writer_rolls_back_failed_job(db_path):
+    writer = DatabaseWriter(db_path)
+
+    def failing(conn):
+        conn.execute("INSERT INTO tournaments (name, created_by) VALUES ('T', 'admin')")
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        writer.submit(failing).result()
+
+    def count(conn):
+        return conn.execute("SELECT COUNT(*) FROM tournaments").fetchone()[0]
+
+    assert writer.submit(count).result() == 0
+    writer.close()
+
+
+def test_writer_serializes_concurrent_jobs(db_path):
+    writer = DatabaseWriter(db_path)
+
+    def insert(conn, i):
+        conn.execute("INSERT INTO tournaments (name, created_by) VALUES (?, 'admin')", (f"T{i}",))
+
+    async def run_all():
+        await asyncio.gather(*(writer.run(insert, i) for i in range(200)))
+
+    asyncio.run(run_all())
+    writer.close()
+
+    conn = get_db()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("SELECT COUNT(*) FROM tournaments").fetchone()[0] == 200
+    conn.close()
+
+
+def test_reads_run_off_the_event_loop(db_path):
+    def read(conn, name):
+        conn.execute("SELECT COUNT(*) FROM tournaments").fetchone()
+        return threading.current_thread().name, name
+
+    async def run_all():
+        loop_thread = threading.current_thread().name
+        results = await asyncio.gather(*(run_read(read, i) for i in range(50)))
+        return loop_thread, results
+
+    loop_thread, results = asyncio.run(run_all())
+    assert [name for _, name in results] == list(range(50))
+    assert all(thread.startswith("db-reader") for thread, _ in results)
+    assert loop_thread not in {thread for thread, _ in results}
+    assert database.get_pool().stats()["in_use"] == 0
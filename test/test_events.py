@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from events import EventBroker, broker
+from utils import create_access_token
+
+
+def drain(subscriber):
+    items = []
+    while not subscriber.queue.empty():
+        items.append(subscriber.queue.get_nowait())
+    return items
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_fan_out_to_all_subscribers():
+    async def scenario():
+        broker = EventBroker()
+        subscribers = [broker.subscribe(1) for _ in range(1000)]
+        other = broker.subscribe(2)
+        broker.publish(1, "player-assigned", {"emp_id": "E1"})
+        assert all(len(drain(s)) == 1 for s in subscribers)
+        assert drain(other) == []
+    run(scenario())
+
+
+def test_resume_from_sequence_number():
+    async def scenario():
+        broker = EventBroker()
+        for i in range(5):
+            broker.publish(1, "budget-changed", {"i": i})
+        sub = broker.subscribe(1, since=3)
+        events = drain(sub)
+        assert [e.seq for e in events] == [4, 5]
+        assert json.loads(events[0].json)["data"] == {"i": 3}
+    run(scenario())
+
+
+def test_resync_when_cursor_is_outside_history():
+    async def scenario():
+        broker = EventBroker(history_size=2)
+        for i in range(5):
+            broker.publish(1, "budget-changed", {"i": i})
+        (event,) = drain(broker.subscribe(1, since=1))
+        assert event.type == "resync"
+        assert event.seq == 5
+        # Cursor from a previous process
+        (event,) = drain(broker.subscribe(1, since=99))
+        assert event.type == "resync"
+    run(scenario())
+
+
+def test_resync_when_backlog_exceeds_queue():
+    async def scenario():
+        broker = EventBroker(history_size=1000, queue_size=256)
+        for i in range(300):
+            broker.publish(1, "budget-changed", {"i": i})
+        sub = broker.subscribe(1, since=0)
+        assert not sub.dropped
+        (event,) = drain(sub)
+        assert event.type == "resync" and event.seq == 300
+        # A backlog that fits is replayed as before
+        assert len(drain(broker.subscribe(1, since=300 - 255))) == 255
+    run(scenario())
+
+
+def test_slow_subscriber_is_dropped():
+    async def scenario():
+        broker = EventBroker(queue_size=3)
+        slow = broker.subscribe(1)
+        fast = broker.subscribe(1)
+        for i in range(4):
+            broker.publish(1, "budget-changed", {"i": i})
+            drain(fast)
+        assert slow.dropped
+        assert drain(slow) == [None]
+        assert broker.stats()["subscribers"] == 1
+    run(scenario())
+
+
+def test_websocket_needs_an_existing_tournament(app_client):
+    token = create_access_token({"sub": "guest", "role": "guest"})
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with app_client.websocket_connect(f"/api/tournaments/999/events/ws?token={token}"):
+            pass
+    assert closed.value.code == 1008
+    assert 999 not in broker._channels
+
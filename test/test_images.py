@@ -0,0 +1,257 @@
+import hashlib
+import logging
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+
+import images
+from database import get_db
+from images import ImageFiles, collect_garbage, migrate_legacy_images, sniff_image
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 64
+WEBP = b"RIFF\x00\x00\x00\x00WEBPVP8 " + b"\x00" * 64
+
+
+@pytest.fixture
+def images_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "IMAGES_DIR", tmp_path / "player_images")
+    return tmp_path / "player_images"
+
+
+@pytest.fixture
+def client(images_dir, admin_client):
+    """admin_client with players E1 and E2 in one tournament"""
+    tournament = admin_client.post("/api/tournaments/", json={
+        "name": "Images", "teams": [{"name": "A", "budget": 1000}]
+    }).json()
+    for emp_id, name in (("E1", "alice"), ("E2", "bob")):
+        admin_client.post(f"/api/tournaments/{tournament['id']}/players", json={
+            "emp_id": emp_id, "name": name, "type": "Batsman"
+        })
+    return admin_client
+
+
+def content_name(data, extension):
+    return f"{hashlib.sha256(data).hexdigest()}.{extension}"
+
+
+def stored_filename(emp_id):
+    conn = get_db()
+    row = conn.execute("SELECT image_filename FROM people WHERE emp_id = ?", (emp_id,)).fetchone()
+    conn.close()
+    return row["image_filename"]
+
+
+def test_sniff_image():
+    assert sniff_image(PNG) == "png"
+    assert sniff_image(JPEG) == "jpg"
+    assert sniff_image(WEBP) == "webp"
+    assert sniff_image(b"GIF89a") is None
+    assert sniff_image(b"") is None
+
+
+def test_format_comes_from_content(client, images_dir):
+    # Declared type and extension are ignored in favour of the bytes
+    response = client.post("/api/players/E1/image", files={"file": ("photo.jpg", PNG, "image/jpeg")})
+    assert response.status_code == 200
+    assert response.json()["filename"] == content_name(PNG, "png")
+    assert (images_dir / content_name(PNG, "png")).read_bytes() == PNG
+    assert stored_filename("E1") == content_name(PNG, "png")
+    assert not list(images_dir.glob(".upload-*"))
+
+    response = client.post("/api/players/E1/image", files={"file": ("photo.jpg", b"not an image", "image/jpeg")})
+    assert response.status_code == 400
+    assert stored_filename("E1") == content_name(PNG, "png")
+    assert not list(images_dir.glob(".upload-*"))
+
+
+def test_oversized_upload_is_rejected(client, images_dir, monkeypatch):
+    monkeypatch.setattr(images, "FORM_OVERHEAD_BYTES", 1024)
+    receive = images.receive_image
+    monkeypatch.setattr("routers.players.receive_image", lambda request: receive(request, max_bytes=1024))
+
+    response = client.post("/api/players/E1/image", files={"file": ("big.png", PNG + b"\x00" * 1024, "image/png")})
+    assert response.status_code == 413
+    assert stored_filename("E1") is None
+    assert not list(images_dir.iterdir())
+
+    assert client.post("/api/players/E1/image", files={"file": ("small.png", PNG, "image/png")}).status_code == 200
+
+
+def test_upload_errors(client, images_dir):
+    assert client.post("/api/players/nobody/image", files={"file": ("a.png", PNG, "image/png")}).status_code == 404
+    assert client.post("/api/players/E1/image", files={"other": ("a.png", PNG, "image/png")}).status_code == 400
+    assert client.post("/api/players/E1/image", content=PNG,
+                       headers={"Content-Type": "image/png"}).status_code == 400
+    assert not list(images_dir.glob(".upload-*"))
+
+
+def test_identical_uploads_share_one_file(client, images_dir):
+    for emp_id in ("E1", "E2"):
+        response = client.post(f"/api/players/{emp_id}/image", files={"file": ("a.png", PNG, "image/png")})
+        assert response.json()["filename"] == content_name(PNG, "png")
+    assert stored_filename("E1") == stored_filename("E2")
+    # Derivatives, if Pillow made any, are under derived/
+    assert [path.name for path in images_dir.iterdir() if path.is_file()] == [content_name(PNG, "png")]
+
+
+def test_best_variant_for_size(client, images_dir):
+    client.post("/api/players/E1/image", files={"file": ("a.jpg", JPEG, "image/jpeg")})
+    stem = hashlib.sha256(JPEG).hexdigest()
+    derived = images_dir / "derived"
+    derived.mkdir(exist_ok=True)
+    for name in ("64.webp", "64.jpg", "128.webp", "128.jpg", "256.jpg"):
+        (derived / f"{stem}-{name}").write_bytes(name.encode())
+
+    def fetch(size=None, accept="image/webp,*/*"):
+        params = {"size": size} if size else {}
+        response = client.get("/api/players/E1/image", params=params, headers={"Accept": accept})
+        assert response.status_code == 200
+        assert response.headers["vary"] == "Accept"
+        assert response.headers["cache-control"] == "no-cache"
+        return response.content
+
+    assert fetch(48) == b"64.webp"
+    assert fetch(100) == b"128.webp"
+    assert fetch(100, accept="image/jpeg") == b"128.jpg"
+    assert fetch(200) == b"256.jpg"
+    # Larger than any derivative, or no size: the original
+    assert fetch(1024) == JPEG
+    assert fetch() == JPEG
+    assert client.get("/api/players/nobody/image").status_code == 404
+
+    response = client.get("/api/players/E1/image", params={"size": 100}, headers={"Accept": "image/webp"})
+    assert response.headers["etag"] == f'"{stem}-128.webp"'
+    revalidated = client.get("/api/players/E1/image", params={"size": 100},
+                             headers={"Accept": "image/webp", "If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+
+
+def test_derivatives_are_rendered(client, images_dir):
+    Image = pytest.importorskip("PIL.Image")
+    import io
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 200), "red").save(buffer, format="PNG")
+
+    response = client.post("/api/players/E1/image", files={"file": ("a.png", buffer.getvalue(), "image/png")})
+    assert response.status_code == 200
+    stem = response.json()["filename"].split(".")[0]
+    assert sorted(response.json()["derivatives"]) == [f"{stem}-{name}" for name in (
+        "128.jpg", "128.webp", "64.jpg", "64.webp")]
+    with Image.open(images_dir / "derived" / f"{stem}-128.webp") as thumbnail:
+        assert thumbnail.size == (128, 128)
+
+
+def test_derivative_failure_is_logged(client, images_dir, monkeypatch, caplog):
+    async def broken(filename):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("routers.players.make_derivatives", broken)
+    with caplog.at_level(logging.ERROR, logger="routers.players"):
+        response = client.post("/api/players/E1/image", files={"file": ("a.png", PNG, "image/png")})
+    # The upload stands without its derivatives
+    assert response.status_code == 200 and response.json()["derivatives"] == []
+    assert stored_filename("E1") == content_name(PNG, "png")
+    [record] = caplog.records
+    assert content_name(PNG, "png") in record.getMessage() and record.exc_info[1].args == ("disk full",)
+
+
+def test_static_images_cache_headers(tmp_path):
+    name = content_name(PNG, "png")
+    (tmp_path / name).write_bytes(PNG)
+    (tmp_path / "E9.png").write_bytes(PNG)
+    app = Starlette()
+    app.mount("/images", ImageFiles(directory=tmp_path))
+    with TestClient(app) as client:
+        response = client.get(f"/images/{name}")
+        assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+        assert response.headers["etag"] == f'"{name}"'
+        assert client.get(f"/images/{name}", headers={"If-None-Match": f'"{name}"'}).status_code == 304
+        assert client.get("/images/E9.png").headers["cache-control"] == "no-cache"
+
+
+def test_garbage_collection(images_dir):
+    derived = images_dir / "derived"
+    derived.mkdir(parents=True)
+    kept, dropped = content_name(PNG, "png"), content_name(JPEG, "jpg")
+    for path in (images_dir / kept, images_dir / dropped, images_dir / "young.png",
+                 images_dir / ".upload-x.part", derived / f"{dropped[:64]}-64.webp",
+                 derived / f"{kept[:64]}-64.webp"):
+        path.write_bytes(b"x")
+    old = time.time() - 7200
+    for path in list(images_dir.iterdir()) + list(derived.iterdir()):
+        if path.name != "young.png":
+            os.utime(path, (old, old))
+
+    assert collect_garbage({kept}, grace=3600) == 3
+    assert sorted(path.name for path in images_dir.iterdir()) == sorted([kept, "young.png", "derived"])
+    assert [path.name for path in derived.iterdir()] == [f"{kept[:64]}-64.webp"]
+
+
+def test_migrate_legacy_images(db_path, images_dir):
+    images_dir.mkdir()
+    (images_dir / "E1.png").write_bytes(PNG)
+    conn = get_db()
+    conn.execute("INSERT INTO tournaments (name, created_by) VALUES ('Legacy', 'admin')")
+    conn.executemany(
+        "INSERT INTO people (emp_id, name, type, image_filename) VALUES (?, ?, 'Batsman', ?)",
+        [("E1", "alice", "E1.png"), ("E2", "bob", "missing.png")]
+    )
+    conn.executemany("INSERT INTO players (tournament_id, emp_id) VALUES (1, ?)", [("E1",), ("E2",)])
+    conn.commit()
+    assert migrate_legacy_images(conn) == (1, ["missing.png"])
+    conn.commit()
+    conn.close()
+
+    assert stored_filename("E1") == content_name(PNG, "png")
+    assert (images_dir / content_name(PNG, "png")).read_bytes() == PNG
+    assert stored_filename("E2") == "missing.png"
+
+
+def test_bulk_archive_import(client, images_dir):
+    import io
+    import tarfile
+    import zipfile
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as z:
+        z.writestr("photos/E1.jpg", PNG)
+        z.writestr("photos/E2.png", b"not an image")
+        z.writestr("E3.png", PNG)
+        z.writestr("__MACOSX/photos/._E1.jpg", b"x")
+        z.writestr("notes.txt", b"x")
+        z.writestr("photos/", b"")
+    response = client.post("/api/tournaments/1/players/images",
+                           files={"file": ("photos.zip", archive.getvalue(), "application/zip")})
+    assert response.status_code == 200
+    body = response.json()
+    statuses = {entry["file"]: entry["status"] for entry in body["report"]}
+    assert statuses == {
+        "photos/E1.jpg": "imported", "photos/E2.png": "failed", "E3.png": "skipped",
+        "__MACOSX/photos/._E1.jpg": "skipped", "notes.txt": "skipped"
+    }
+    assert (body["imported"], body["skipped"], body["failed"], body["updated_players"]) == (1, 3, 1, 1)
+    assert stored_filename("E1") == content_name(PNG, "png")
+    assert stored_filename("E2") is None
+    assert not list(images_dir.glob(".upload-*"))
+
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w:gz") as t:
+        for name, data in (("E2.webp", WEBP), ("E1.jpg", JPEG), ("E1.png", PNG)):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            t.addfile(info, io.BytesIO(data))
+    response = client.post("/api/tournaments/1/players/images",
+                           files={"file": ("photos.tar.gz", archive.getvalue(), "application/gzip")})
+    assert [entry["status"] for entry in response.json()["report"]] == ["imported", "imported", "failed"]
+    assert stored_filename("E1") == content_name(JPEG, "jpg")
+    assert stored_filename("E2") == content_name(WEBP, "webp")
+
+    response = client.post("/api/tournaments/1/players/images", files={"file": ("a.zip", b"PK junk", "application/zip")})
+    assert response.status_code == 400
+    assert client.post("/api/tournaments/99/players/images",
+                       files={"file": ("a.zip", b"x", "application/zip")}).status_code == 404
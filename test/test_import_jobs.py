@@ -0,0 +1,182 @@
+import asyncio
+import io
+import threading
+
+import pytest
+
+import database
+from importer import ImportCancelled
+import jobs as import_jobs
+from jobs import ImportJob, ImportJobs
+
+
+def tournament():
+    conn = database.get_db()
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO tournaments (name, created_by) VALUES ('Jobs', 'admin')")
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid
+
+
+def player_count(tournament_id):
+    conn = database.get_db()
+    count = conn.execute(
+        "SELECT COUNT(*) FROM players WHERE tournament_id = ?", (tournament_id,)
+    ).fetchone()[0]
+    conn.close()
+    return count
+
+
+def csv_upload(rows):
+    body = "emp_id,name,type\n" + "".join(f"E{i},Player {i},Batsman\n" for i in range(rows))
+    return io.BytesIO(body.encode())
+
+
+def block_import_threads(release):
+    executor = import_jobs._get_executor()
+    return [executor.submit(release.wait) for _ in range(import_jobs.IMPORT_WORKERS)]
+
+
+def test_job_reports_result_and_progress(db_path):
+    tournament_id = tournament()
+
+    async def scenario():
+        jobs = ImportJobs()
+        job = await jobs.submit(tournament_id, csv_upload(20), "players.csv", "replace")
+        assert jobs.get(tournament_id, job.id) is job
+        await job.done
+        return job.status_dict()
+
+    status = asyncio.run(scenario())
+    assert status["status"] == "completed"
+    assert status["rows_processed"] == 20
+    assert status["progress"] == 1.0
+    assert status["result"]["details"]["players_added"] == 20
+    assert player_count(tournament_id) == 20
+
+
+def test_cancel_queued_job(db_path):
+    tournament_id = tournament()
+    release = threading.Event()
+
+    async def scenario():
+        jobs = ImportJobs()
+        blockers = block_import_threads(release)
+        job = await jobs.submit(tournament_id, csv_upload(5), "players.csv", "replace")
+        jobs.cancel(job)
+        release.set()
+        await asyncio.wait([asyncio.wrap_future(b) for b in blockers])
+        await job.done
+        return job.status
+
+    assert asyncio.run(scenario()) == "cancelled"
+    assert player_count(tournament_id) == 0
+
+
+def test_cancel_running_job_rolls_back(db_path, monkeypatch):
+    tournament_id = tournament()
+    reached = threading.Event()
+    release = threading.Event()
+    progress = ImportJob._progress
+
+    def slow_progress(self, report, fraction):
+        reached.set()
+        release.wait()
+        progress(self, report, fraction)
+
+    monkeypatch.setattr(ImportJob, "_progress", slow_progress)
+
+    async def scenario():
+        jobs = ImportJobs()
+        job = await jobs.submit(tournament_id, csv_upload(10), "players.csv", "replace")
+        await asyncio.to_thread(reached.wait)
+        assert job.status == "running"
+        jobs.cancel(job)
+        release.set()
+        await job.done
+        return job.status
+
+    assert asyncio.run(scenario()) == "cancelled"
+    assert player_count(tournament_id) == 0
+
+
+def test_writes_run_between_chunks(db_path, monkeypatch):
+    tournament_id = tournament()
+    reached = threading.Event()
+    release = threading.Event()
+    progress = ImportJob._progress
+
+    def paused_progress(self, report, fraction):
+        reached.set()
+        release.wait()
+        progress(self, report, fraction)
+
+    monkeypatch.setattr(ImportJob, "_progress", paused_progress)
+
+    async def scenario():
+        jobs = ImportJobs()
+        job = await jobs.submit(tournament_id, csv_upload(10), "players.csv", "replace")
+        try:
+            await asyncio.to_thread(reached.wait)
+            # The import is between chunks and holds no write transaction
+            await asyncio.wait_for(database.run_write(lambda conn: None), timeout=5)
+        finally:
+            release.set()
+        await job.done
+        return job.status
+
+    assert asyncio.run(scenario()) == "completed"
+    assert player_count(tournament_id) == 10
+
+
+def test_failed_job_keeps_detail(db_path):
+    tournament_id = tournament()
+
+    async def scenario():
+        jobs = ImportJobs()
+        job = await jobs.submit(tournament_id, io.BytesIO(b"emp_id,name\nE1,A\n"), "players.csv", "append")
+        await job.done
+        return job.status_dict()
+
+    status = asyncio.run(scenario())
+    assert status["status"] == "failed"
+    assert status["detail"] == "Missing columns: type"
+
+
+def test_shutdown_does_not_mark_jobs_cancelled(db_path):
+    tournament_id = tournament()
+    release = threading.Event()
+
+    async def scenario():
+        jobs = ImportJobs()
+        blockers = block_import_threads(release)
+        try:
+            job = await jobs.submit(tournament_id, csv_upload(5), "players.csv", "replace")
+            await asyncio.sleep(0)
+            # Cancelling the watcher task, as shutdown does, is not cancelling the import
+            job.done.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await job.done
+            status = job.status
+        finally:
+            release.set()
+        await asyncio.wait([asyncio.wrap_future(b) for b in blockers])
+        await asyncio.wait([asyncio.wrap_future(job.future)])
+        return status
+
+    assert asyncio.run(scenario()) == "queued"
+
+
+def test_waiting_upload_reports_cancellation(admin_client, monkeypatch):
+    def cancelled(self):
+        raise ImportCancelled()
+
+    monkeypatch.setattr(ImportJob, "_run", cancelled)
+    tournament_id = admin_client.post("/api/tournaments/", json={"name": "Wait", "teams": []}).json()["id"]
+    response = admin_client.post(
+        f"/api/tournaments/{tournament_id}/players/upload", params={"wait": "true"},
+        files={"file": ("players.csv", csv_upload(3).getvalue(), "text/csv")}
+    )
+    assert response.status_code == 409
+    assert player_count(tournament_id) == 0
@@ -0,0 +1,133 @@
+import io
+
+import pytest
+from fastapi import HTTPException
+from openpyxl import Workbook
+
+from database import get_db
+from importer import ImportCancelled, import_players
+
+
+def tournament(conn):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO tournaments (name, created_by) VALUES ('Import', 'admin')")
+    conn.commit()
+    return cursor.lastrowid
+
+
+def emp_ids(conn, tournament_id):
+    rows = conn.execute(
+        "SELECT emp_id FROM players WHERE tournament_id = ? ORDER BY id", (tournament_id,)
+    ).fetchall()
+    return [row["emp_id"] for row in rows]
+
+
+def run_import(stream, filename, mode="replace", chunk_size=2):
+    conn = get_db()
+    tournament_id = tournament(conn)
+    report = import_players(tournament_id, stream, filename, mode, chunk_size)
+    ids = emp_ids(conn, tournament_id)
+    conn.close()
+    return report, ids
+
+
+def test_csv_report_matches_row_numbers_across_chunks(db_path):
+    csv = (
+        b"Emp_ID , Name,TYPE\n"
+        b"E1,Alice,Batsman\n"
+        b"E2,Bob,Bowler\n"
+        b"E1,Again,Bowler\n"
+        b",NoId,Bowler\n"
+        b"E3,,Bowler\n"
+        b"E4,Dan,none\n"
+        b"E5,Eve,All-rounder\n"
+    )
+    report, ids = run_import(io.BytesIO(csv), "players.csv")
+
+    assert ids == ["E1", "E2", "E5"]
+    assert (report.total_rows, report.added, report.skipped) == (7, 3, 4)
+    assert report.errors == [
+        "Row 4: Duplicate emp_id 'E1'",
+        "Row 5: emp_id is required",
+        "Row 6: name is required",
+        "Row 7: type is required",
+    ]
+
+
+def test_xlsx_streams_and_drops_trailing_blank_rows(db_path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["emp_id", "name", "type", "image_filename"])
+    sheet.append([101, "Alice", "Batsman", "101.png"])
+    sheet.append([None, None, None, None])
+    sheet.append([102, "Bob", "Bowler", None])
+    sheet.append([None, None, None, None])
+    sheet.append([None, None, None, None])
+    stream = io.BytesIO()
+    workbook.save(stream)
+    stream.seek(0)
+
+    report, ids = run_import(stream, "players.xlsx")
+
+    assert ids == ["101", "102"]
+    assert (report.total_rows, report.added, report.skipped) == (3, 2, 1)
+    assert report.errors == ["Row 3: emp_id is required"]
+
+
+def test_latin1_csv_and_error_overflow(db_path):
+    rows = "".join(f",Player {i},Bowler\n" for i in range(15))
+    csv = ("emp_id,name,type\nE1,Jos\xe9,Batsman\n" + rows).encode("latin-1")
+    report, ids = run_import(io.BytesIO(csv), "players.csv", chunk_size=4)
+
+    assert ids == ["E1"]
+    assert report.skipped == 15
+    lines = report.error_lines()
+    assert len(lines) == 11
+    assert lines[-1] == "... and 5 more errors"
+
+
+def test_append_skips_existing_players(db_path):
+    conn = get_db()
+    tournament_id = tournament(conn)
+    conn.execute("INSERT INTO people (emp_id, name, type) VALUES ('E1', 'Old', 'Batsman')")
+    conn.execute("INSERT INTO players (tournament_id, emp_id) VALUES (?, 'E1')", (tournament_id,))
+    conn.commit()
+
+    csv = io.BytesIO(b"emp_id,name,type\nE1,New,Bowler\nE2,Bob,Bowler\n")
+    report = import_players(tournament_id, csv, "players.csv", "append")
+
+    assert emp_ids(conn, tournament_id) == ["E1", "E2"]
+    assert report.errors == ["Row 2: Duplicate emp_id 'E1'"]
+    conn.close()
+
+
+@pytest.mark.parametrize("content, detail", [
+    (b"", "Error reading .csv file"),
+    (b"emp_id,name,type\n", "File is empty"),
+    (b"emp_id,name\nE1,Alice\n", "Missing columns: type"),
+])
+def test_bad_files_are_rejected_before_writing(db_path, content, detail):
+    with pytest.raises(HTTPException) as e:
+        run_import(io.BytesIO(content), "players.csv")
+    assert e.value.status_code == 400
+    assert e.value.detail.startswith(detail)
+
+
+def test_failed_import_discards_staged_rows(db_path):
+    conn = get_db()
+    tournament_id = tournament(conn)
+    conn.execute("INSERT INTO people (emp_id, name, type) VALUES ('E0', 'Kept', 'Batsman')")
+    conn.execute("INSERT INTO players (tournament_id, emp_id) VALUES (?, 'E0')", (tournament_id,))
+    conn.commit()
+
+    def fail_after_first_chunk(report, fraction):
+        raise ImportCancelled()
+
+    csv = io.BytesIO(b"emp_id,name,type\nE1,A,Bowler\nE2,B,Bowler\nE3,C,Bowler\n")
+    with pytest.raises(ImportCancelled):
+        import_players(tournament_id, csv, "players.csv", chunk_size=2, progress=fail_after_first_chunk)
+
+    # Replace mode, but nothing changes until the whole file is imported
+    assert emp_ids(conn, tournament_id) == ["E0"]
+    assert conn.execute("SELECT COUNT(*) FROM import_rows").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,81 @@
+from database import get_db
+from loaders import load_tournament_tree
+
+
+def seed(conn, tournaments, teams_per_tournament=4, players_per_team=5):
+    cursor = conn.cursor()
+    for t in range(tournaments):
+        cursor.execute(
+            "INSERT INTO tournaments (name, created_by) VALUES (?, ?)",
+            (f"T{t}", "admin")
+        )
+        tournament_id = cursor.lastrowid
+        for k in range(teams_per_tournament):
+            cursor.execute(
+                """INSERT INTO teams (tournament_id, name, total_budget, remaining_budget)
+                   VALUES (?, ?, 1000, 1000)""",
+                (tournament_id, f"Team {k}")
+            )
+            team_id = cursor.lastrowid
+            for p in range(players_per_team):
+                cursor.execute(
+                    "INSERT OR IGNORE INTO people (emp_id, name, type) VALUES (?, ?, 'Batsman')",
+                    (f"E{k}-{p}", f"Player {k}-{p}")
+                )
+                cursor.execute(
+                    """INSERT INTO players
+                       (tournament_id, team_id, emp_id, bid_amount, is_assigned)
+                       VALUES (?, ?, ?, 10, 1)""",
+                    (tournament_id, team_id, f"E{k}-{p}")
+                )
+        cursor.execute("INSERT OR IGNORE INTO people (emp_id, name, type) VALUES ('FREE', 'Free', 'Bowler')")
+        cursor.execute("INSERT INTO players (tournament_id, emp_id) VALUES (?, 'FREE')", (tournament_id,))
+    conn.commit()
+
+
+def count_queries(conn, tournament_id=None):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    tree = load_tournament_tree(conn.cursor(), tournament_id)
+    conn.set_trace_callback(None)
+    return tree, len(statements)
+
+
+def test_query_count_is_constant(db_path):
+    counts = []
+    for total in (1, 10, 100):
+        conn = get_db()
+        conn.execute("DELETE FROM tournaments")
+        seed(conn, total)
+        tree, queries = count_queries(conn)
+        conn.close()
+        assert len(tree) == total
+        counts.append(queries)
+    assert counts == [3, 3, 3]
+
+
+def test_groups_players_by_team(db_path):
+    conn = get_db()
+    seed(conn, 3, teams_per_tournament=2, players_per_team=3)
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM tournaments ORDER BY id LIMIT 1")
+    tournament_id = cursor.fetchone()["id"]
+
+    tree, queries = count_queries(conn, tournament_id)
+    conn.close()
+
+    assert queries == 3
+    (entry,) = tree
+    assert entry["tournament"]["id"] == tournament_id
+    assert len(entry["teams"]) == 2
+    assert len(entry["players"]) == 7
+    for team in entry["teams"]:
+        members = entry["team_players"][team["id"]]
+        assert len(members) == 3
+        assert all(p["team_id"] == team["id"] for p in members)
+
+
+def test_missing_tournament(db_path):
+    conn = get_db()
+    assert load_tournament_tree(conn.cursor(), 999) == []
+    conn.close()
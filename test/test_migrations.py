@@ -0,0 +1,102 @@
+import sqlite3
+
+import database
+import migrations
+from passwords import verify_password
+
+
+def test_fresh_database_reaches_latest(tmp_path):
+    conn = sqlite3.connect(tmp_path / "fresh.db")
+    assert migrations.migrate(conn) == migrations.LATEST_VERSION
+    assert migrations.current_version(conn) == migrations.LATEST_VERSION
+    assert migrations.applied_version(conn) == migrations.LATEST_VERSION
+    assert migrations.pending(conn) == []
+    conn.close()
+
+
+def test_current_schema_skips_all_ddl(tmp_path):
+    conn = sqlite3.connect(tmp_path / "current.db")
+    migrations.migrate(conn)
+
+    statements = []
+    conn.set_trace_callback(statements.append)
+    assert migrations.migrate(conn) == 0
+    conn.set_trace_callback(None)
+
+    assert statements == ["PRAGMA user_version"]
+    conn.close()
+
+
+def test_upgrades_legacy_database(tmp_path):
+    conn = sqlite3.connect(tmp_path / "legacy.db")
+    # Shape of databases created before image and captain columns existed
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT UNIQUE, password TEXT, role TEXT)")
+    conn.execute("INSERT INTO users (username, password, role) VALUES ('admin', 'secret', 'admin')")
+    conn.execute("CREATE TABLE tournaments (id INTEGER PRIMARY KEY, name TEXT, created_at TIMESTAMP, created_by TEXT)")
+    conn.execute(
+        "CREATE TABLE teams (id INTEGER PRIMARY KEY, tournament_id INTEGER, name TEXT, "
+        "total_budget REAL, remaining_budget REAL)"
+    )
+    conn.execute(
+        "CREATE TABLE players (id INTEGER PRIMARY KEY, tournament_id INTEGER, team_id INTEGER, "
+        "emp_id TEXT, name TEXT, type TEXT, bid_amount REAL, is_assigned BOOLEAN)"
+    )
+    conn.execute("INSERT INTO tournaments (id, name, created_by) VALUES (1, 'Old', 'admin'), (2, 'New', 'admin')")
+    conn.execute(
+        "INSERT INTO players (id, tournament_id, emp_id, name, type, bid_amount, is_assigned) VALUES "
+        "(1, 1, 'E1', 'Old name', 'Bowler', 0, 0), (2, 2, 'E1', 'New name', 'Batsman', 0, 0)"
+    )
+    conn.commit()
+
+    migrations.migrate(conn)
+
+    player_columns = {row[1] for row in conn.execute("PRAGMA table_info(players)")}
+    team_columns = {row[1] for row in conn.execute("PRAGMA table_info(teams)")}
+    # Person details moved to people, one row per employee
+    assert not {"name", "type", "image_filename"} & player_columns
+    assert conn.execute("SELECT * FROM people").fetchall() == [("E1", "New name", "Batsman", None)]
+    assert conn.execute("SELECT id, tournament_id, name FROM player_details ORDER BY id").fetchall() == [
+        (1, 1, "New name"), (2, 2, "New name")
+    ]
+    assert conn.execute("SELECT total_players FROM tournament_stats WHERE tournament_id = 1").fetchone() == (1,)
+    assert {"captain_id", "vice_captain_id"} <= team_columns
+    # Existing users are kept as they are
+    stored = conn.execute("SELECT password FROM users WHERE username = 'admin'").fetchone()[0]
+    assert stored != "secret" and verify_password("secret", stored)
+    conn.close()
+
+
+def test_upgrades_legacy_database_with_orphans(tmp_path, monkeypatch):
+    path = str(tmp_path / "orphans.db")
+    conn = sqlite3.connect(path)
+    # Left behind by tournament deletes made with foreign keys off
+    conn.execute("CREATE TABLE tournaments (id INTEGER PRIMARY KEY, name TEXT, created_at TIMESTAMP, created_by TEXT)")
+    conn.execute(
+        "CREATE TABLE teams (id INTEGER PRIMARY KEY, tournament_id INTEGER, name TEXT, "
+        "total_budget REAL, remaining_budget REAL)"
+    )
+    conn.execute(
+        "CREATE TABLE players (id INTEGER PRIMARY KEY, tournament_id INTEGER, team_id INTEGER, "
+        "emp_id TEXT, name TEXT, type TEXT, bid_amount REAL, is_assigned BOOLEAN)"
+    )
+    conn.execute("INSERT INTO tournaments (id, name, created_by) VALUES (1, 'Kept', 'admin')")
+    conn.execute("INSERT INTO teams (id, tournament_id, name) VALUES (1, 1, 'A'), (2, 9, 'Gone')")
+    conn.execute(
+        "INSERT INTO players (id, tournament_id, team_id, emp_id, name, type, bid_amount, is_assigned) VALUES "
+        "(1, 1, 1, 'E1', 'Kept', 'Bowler', 0, 0), (2, 1, 7, 'E2', 'No team', 'Bowler', 0, 0), "
+        "(3, 9, 2, 'E3', 'Gone', 'Bowler', 0, 0)"
+    )
+    conn.commit()
+    conn.close()
+
+    # The app's connections enforce foreign keys
+    monkeypatch.setattr(database, "DATABASE_PATH", path)
+    database.init_db()
+
+    conn = database.get_db()
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    assert migrations.current_version(conn) == migrations.LATEST_VERSION
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    assert [tuple(row) for row in conn.execute("SELECT id, team_id FROM players ORDER BY id")] == [(1, 1), (2, None)]
+    assert [row[0] for row in conn.execute("SELECT id FROM teams")] == [1]
+    conn.close()
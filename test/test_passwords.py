@@ -0,0 +1,102 @@
+import asyncio
+import threading
+
+import pytest
+
+import passwords
+from database import get_db
+from passwords import LoginThrottle, hash_password, needs_rehash, run_hashing, verify_password
+
+
+@pytest.fixture(autouse=True)
+def throttle(monkeypatch):
+    monkeypatch.setattr("routers.auth.login_throttle", LoginThrottle(max_failures=3, window=60))
+
+
+def stored_password(username):
+    conn = get_db()
+    row = conn.execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()
+    conn.close()
+    return row["password"]
+
+
+def test_hash_and_verify(monkeypatch):
+    stored = hash_password("s3cret")
+    assert stored.startswith(f"scrypt${passwords.SCRYPT_N}$")
+    assert stored != hash_password("s3cret")
+    assert verify_password("s3cret", stored)
+    assert not verify_password("s3cret!", stored)
+    assert not verify_password("s3cret", "scrypt$corrupt")
+
+    assert verify_password("plain", "plain") and needs_rehash("plain")
+    assert not needs_rehash(stored)
+    monkeypatch.setattr(passwords, "SCRYPT_N", passwords.SCRYPT_N * 2)
+    assert needs_rehash(stored) and verify_password("s3cret", stored)
+
+
+def test_hashing_runs_off_the_event_loop():
+    async def main():
+        return await run_hashing(lambda: threading.current_thread().name)
+
+    assert asyncio.run(main()).startswith("password")
+
+
+def test_seeded_passwords_are_hashed(app_client):
+    assert verify_password("admin@123", stored_password("admin"))
+    response = app_client.post("/api/auth/login", json={"username": "admin", "password": "admin@123"})
+    assert response.status_code == 200
+
+
+def test_login_rehashes_plaintext_and_old_cost(app_client, monkeypatch):
+    conn = get_db()
+    conn.execute("UPDATE users SET password = 'guest123' WHERE username = 'guest'")
+    conn.commit()
+    conn.close()
+
+    login = {"username": "guest", "password": "guest123"}
+    assert app_client.post("/api/auth/login", json=login).status_code == 200
+    rehashed = stored_password("guest")
+    assert rehashed.startswith("scrypt$") and verify_password("guest123", rehashed)
+
+    monkeypatch.setattr(passwords, "SCRYPT_N", passwords.SCRYPT_N * 2)
+    assert app_client.post("/api/auth/login", json=login).status_code == 200
+    assert stored_password("guest").startswith(f"scrypt${passwords.SCRYPT_N}$")
+    assert app_client.post("/api/auth/login", json=login).status_code == 200
+
+
+def test_failed_logins_are_throttled_per_user(app_client):
+    wrong = {"username": "auctioneer", "password": "nope"}
+    assert [app_client.post("/api/auth/login", json=wrong).status_code for _ in range(3)] == [401] * 3
+
+    blocked = app_client.post("/api/auth/login", json={"username": "auctioneer", "password": "auction@123"})
+    assert blocked.status_code == 429
+    assert 0 < int(blocked.headers["retry-after"]) <= 60
+
+    # Other users are unaffected, and unknown users are rejected the same way
+    assert app_client.post("/api/auth/login", json={"username": "guest", "password": "guest123"}).status_code == 200
+    assert app_client.post("/api/auth/login", json={"username": "ghost", "password": "x"}).status_code == 401
+
+
+def test_throttle_window():
+    throttle = LoginThrottle(max_failures=2, window=60)
+    throttle.failed("a")
+    assert throttle.retry_after("a") is None
+    throttle.failed("a")
+    assert 59 < throttle.retry_after("a") <= 60
+    throttle.succeeded("a")
+    assert throttle.retry_after("a") is None
+
+
+def test_throttle_is_bounded(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(passwords.time, "monotonic", lambda: clock[0])
+    throttle = LoginThrottle(max_failures=1, window=60, max_entries=3)
+    for name in "abcd":
+        throttle.failed(name)
+    # A spray of usernames evicts the least recently failed
+    assert list(throttle._failures) == ["b", "c", "d"]
+    assert throttle.retry_after("a") is None and throttle.retry_after("d") == 60
+
+    clock[0] += 61
+    throttle.failed("e")
+    assert list(throttle._failures) == ["e"]
@@ -0,0 +1,90 @@
+import pytest
+
+from database import get_db
+from loaders import load_players
+
+
+@pytest.fixture
+def tournament(admin_client):
+    tournament = admin_client.post("/api/tournaments/", json={
+        "name": "Listing", "teams": [{"name": "A", "budget": 1000}]
+    }).json()
+    names = ["alice", "Albert", "bob", "Carol", "alfred", "dave", "Eve"]
+    for i, name in enumerate(names):
+        admin_client.post(f"/api/tournaments/{tournament['id']}/players", json={
+            "emp_id": f"E{i}", "name": name, "type": "Bowler" if i % 2 else "Batsman"
+        })
+    for emp_id in ("E1", "E4"):
+        admin_client.post("/api/auction/assign", json={
+            "tournament_id": tournament["id"], "team_id": tournament["teams"][0]["id"],
+            "emp_id": emp_id, "bid_amount": 10
+        })
+    return tournament
+
+
+def test_keyset_pages_cover_every_player(admin_client, tournament):
+    url = f"/api/tournaments/{tournament['id']}/players"
+    everything = admin_client.get(url).json()
+    assert len(everything) == 7
+
+    seen, pages = [], 0
+    response = admin_client.get(url, params={"limit": 3, "fields": "emp_id"})
+    while True:
+        pages += 1
+        assert response.status_code == 200
+        seen += [p["emp_id"] for p in response.json()]
+        if "link" not in response.headers:
+            break
+        assert response.headers["link"].endswith('rel="next"')
+        response = admin_client.get(url, params={"limit": 3, "fields": "emp_id",
+                                           "after": response.headers["x-next-after"]})
+    assert seen == [p["emp_id"] for p in everything]
+    assert pages == 3
+
+
+def test_filters_and_projection(admin_client, tournament):
+    url = f"/api/tournaments/{tournament['id']}/players"
+    team_id = tournament["teams"][0]["id"]
+
+    def emp_ids(**params):
+        response = admin_client.get(url, params={"fields": "emp_id", **params})
+        assert all(list(p) == ["emp_id"] for p in response.json())
+        return [p["emp_id"] for p in response.json()]
+
+    assert emp_ids(type="Bowler") == ["E1", "E3", "E5"]
+    assert emp_ids(assigned="true") == ["E1", "E4"]
+    assert emp_ids(assigned="false", type="Batsman") == ["E0", "E2", "E6"]
+    assert emp_ids(team_id=team_id) == ["E1", "E4"]
+    assert emp_ids(name_prefix="al") == ["E0", "E1", "E4"]
+    assert emp_ids(name_prefix="AL", limit=2, after=0) == ["E0", "E1"]
+
+    assert admin_client.get(url, params={"fields": "name,password"}).status_code == 400
+    assert admin_client.get(url, params={"limit": 0}).status_code == 422
+
+
+def test_tournaments_without_players(admin_client, tournament):
+    full = admin_client.get("/api/tournaments/").json()[0]
+    slim = admin_client.get("/api/tournaments/", params={"include_players": "false"}).json()[0]
+    assert len(full["players"]) == 7
+    assert "players" not in slim and "players" not in slim["teams"][0]
+    assert slim["teams"][0]["remainingBudget"] == full["teams"][0]["remainingBudget"]
+
+
+@pytest.mark.parametrize("filters, index", [
+    ({}, "idx_players_tournament"),
+    ({"type": "Bowler"}, "idx_people_type"),
+    ({"assigned": True}, "idx_players_tournament_is_assigned"),
+    ({"team_id": 1}, "idx_players_tournament_team"),
+    ({"name_prefix": "al"}, "idx_people_name"),
+])
+def test_pages_use_indexes(db_path, filters, index):
+    conn = get_db()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    load_players(conn.cursor(), 1, fields=["name"], after=0, limit=50, **filters)
+    conn.set_trace_callback(None)
+
+    plan = [row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {statements[-1]}")]
+    conn.close()
+    assert not [step for step in plan if step.startswith("SCAN ") or "TEMP B-TREE" in step], plan
+    assert any(f"INDEX {index} " in step for step in plan), plan
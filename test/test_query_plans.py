@@ -0,0 +1,99 @@
+"""
+Run EXPLAIN QUERY PLAN on every SQL statement passed to execute()/executemany()
+in routers/ (and the helper modules they call) and fail on full table scans.
+"""
+import ast
+import os
+import re
+
+import pytest
+
+from database import get_db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCES = [
+    os.path.join("routers", name)
+    for name in sorted(os.listdir(os.path.join(ROOT, "routers")))
+    if name.endswith(".py")
+] + ["loaders.py", "events.py", "importer.py", "changes.py", "people.py"]
+
+# Statements that read a whole table on purpose
+WHOLE_TABLE_READS = {
+    "SELECT * FROM tournaments ORDER BY created_at DESC",
+    "SELECT * FROM teams ORDER BY id",
+    "SELECT * FROM player_details ORDER BY id",
+    # Aggregate over the (small) tournaments table for the list ETag
+    "SELECT COUNT(*), MAX(id), SUM(revision) FROM tournaments",
+    # Change-log compaction, a periodic maintenance pass over the whole log
+    "DELETE FROM changes WHERE id NOT IN (SELECT MAX(id) FROM changes GROUP BY tournament_id, entity, entity_id)",
+    "INSERT INTO change_floors (tournament_id, revision) SELECT tournament_id, MAX(revision) FROM changes "
+    "WHERE op = 'delete' AND changed_at < datetime('now', ?) GROUP BY tournament_id "
+    "ON CONFLICT(tournament_id) DO UPDATE SET revision = MAX(revision, excluded.revision)",
+    "DELETE FROM changes WHERE op = 'delete' AND changed_at < datetime('now', ?)",
+    "DELETE FROM changes WHERE tournament_id NOT IN (SELECT id FROM tournaments)",
+}
+
+
+def normalize(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def render_fstring(node):
+    """Render an f-string query, standing in a SET clause for interpolated parts"""
+    parts = []
+    for value in node.values:
+        if isinstance(value, ast.Constant):
+            parts.append(value.value)
+        else:
+            parts.append("name = ?")
+    return "".join(parts)
+
+
+def collect_statements():
+    statements = []
+    for source in SOURCES:
+        with open(os.path.join(ROOT, source)) as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if not (
+                isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Attribute)
+                and node.func.attr in ("execute", "executemany")
+                and node.args
+            ):
+                continue
+            arg = node.args[0]
+            if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                sql = arg.value
+            elif isinstance(arg, ast.JoinedStr):
+                sql = render_fstring(arg)
+            else:
+                continue
+            sql = normalize(sql)
+            if sql.upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE")):
+                statements.append(pytest.param(sql, id=f"{source}:{node.lineno}"))
+    return statements
+
+
+STATEMENTS = collect_statements()
+
+
+def test_statements_found():
+    assert len(STATEMENTS) > 30
+
+
+@pytest.mark.parametrize("sql", STATEMENTS)
+def test_no_full_table_scan(db_path, sql):
+    conn = get_db()
+    params = (None,) * sql.count("?")
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    conn.close()
+
+    # Scanning json_each walks a bound parameter, not a stored table
+    scans = [
+        row["detail"] for row in plan
+        if row["detail"].startswith("SCAN ") and "VIRTUAL TABLE" not in row["detail"]
+    ]
+    if sql in WHOLE_TABLE_READS:
+        return
+    assert not scans, f"Full table scan in {sql!r}: {scans}"
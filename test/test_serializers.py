@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from database import get_db
+from loaders import load_players
+from serializers import FastJSONResponse, get_encoder
+
+PLAYERS = [
+    {"id": 1, "emp_id": "E1", "name": "Zoë \"Z\" Ñ", "type": "Bowler", "bid_amount": 12.5, "team_id": None},
+    {"id": 2, "emp_id": "E2", "name": "Ravi", "type": "Batsman", "bid_amount": 0, "team_id": 3},
+]
+
+
+@pytest.mark.parametrize("name", ["json", "orjson"])
+def test_encoders_agree(name):
+    pytest.importorskip(name)
+    encode = get_encoder(name)
+    body = encode({"players": PLAYERS, "rows": [(1, "E1"), (2, None)], 7: True})
+    assert json.loads(body) == {"players": PLAYERS, "rows": [[1, "E1"], [2, None]], "7": True}
+    assert FastJSONResponse(PLAYERS).body == get_encoder("json")(PLAYERS)
+
+    with pytest.raises(ValueError):
+        get_encoder("yaml")
+
+
+def test_columnar_players(db_path):
+    conn = get_db()
+    conn.execute("INSERT INTO tournaments (name, created_by) VALUES ('T', 'admin')")
+    conn.executemany(
+        "INSERT INTO people (emp_id, name, type) VALUES (?, ?, 'Bowler')",
+        [(f"E{i}", f"P{i}") for i in range(5)]
+    )
+    conn.executemany("INSERT INTO players (tournament_id, emp_id) VALUES (1, ?)", [(f"E{i}",) for i in range(5)])
+    conn.commit()
+
+    objects, _ = load_players(conn.cursor(), 1, fields=["emp_id", "name"])
+    columns, next_after = load_players(conn.cursor(), 1, fields=["emp_id", "name"], limit=3, columnar=True)
+    conn.close()
+    assert columns["columns"] == ["id", "emp_id", "name"]
+    assert all(type(row) is tuple for row in columns["rows"])
+    assert [dict(zip(columns["columns"][1:], row[1:])) for row in columns["rows"]] == objects[:3]
+    assert next_after == columns["rows"][-1][0]
+
+
+def test_players_format_columns(admin_client):
+    tournament_id = admin_client.post("/api/tournaments/", json={"name": "T", "teams": []}).json()["id"]
+    admin_client.post(f"/api/tournaments/{tournament_id}/players", json={
+        "emp_id": "E1", "name": "P1", "type": "Bowler"
+    })
+
+    objects = admin_client.get(f"/api/tournaments/{tournament_id}/players").json()
+    columnar = admin_client.get(f"/api/tournaments/{tournament_id}/players", params={"format": "columns"}).json()
+    assert [dict(zip(columnar["columns"], row)) for row in columnar["rows"]] == objects
+    assert admin_client.get(f"/api/tournaments/{tournament_id}/players", params={"format": "xml"}).status_code == 422
+
+
+def test_fast_json_only_on_hot_routes():
+    from main import app
+
+    classes = {
+        (route.path, method): route.response_class
+        for route in app.routes if hasattr(route, "response_class") for method in route.methods
+    }
+    for path in ("/api/tournaments/", "/api/tournaments/{tournament_id}",
+                 "/api/tournaments/{tournament_id}/changes", "/api/tournaments/{tournament_id}/players"):
+        assert classes[(path, "GET")] is FastJSONResponse
+    assert classes[("/api/auth/login", "POST")] is not FastJSONResponse
@@ -1,18 +1,31 @@
 import pandas as pd
 import io
 import os
-from typing import Dict
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 import jwt
-from fastapi import HTTPException, Depends
+from fastapi import HTTPException, Depends, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+from compression import ENCODINGS, encoded_etag
+
 # Configuration
 SECRET_KEY = "your-secret-key-change-this-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
 
+# Verified tokens kept in memory, so repeat requests skip the HMAC check
+TOKEN_CACHE_SIZE = int(os.environ.get("AUCTION_TOKEN_CACHE_SIZE", "4096"))
+# How often each worker reloads tokens revoked by other workers
+REVOCATION_REFRESH_SECONDS = float(os.environ.get("AUCTION_REVOCATION_REFRESH_SECONDS", "5"))
+
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 # ==================== FILE PROCESSING ====================
 
@@ -56,14 +69,114 @@ def create_access_token(data: dict) -> str:
     """Create JWT token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # jti makes every token distinct, so logging out one session revokes only it
+    to_encode.update({"exp": expire, "jti": secrets.token_urlsafe(12)})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict:
-    """Verify JWT token"""
+def token_hash(token: str) -> str:
+    """Cache and revocation key for a token (the token itself is never stored)"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def token_expiry(token: str) -> Optional[float]:
+    """`exp` of a token already verified by decode_token"""
+    exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    return float(exp) if exp is not None else None
+
+class TokenCache:
+    """LRU of verified tokens: token hash -> (user, exp)"""
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Dict, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[Dict, Optional[float]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, user: Dict, exp: Optional[float]):
+        with self._lock:
+            self._entries[key] = (user, exp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "max_entries": self.max_entries,
+                "hits": self.hits, "misses": self.misses}
+
+class RevocationList:
+    """
+    Hashes of logged-out tokens, held until the tokens expire. Logout records
+    them in the revoked_tokens table; load() picks up rows written by other
+    workers, so checking a token never touches the database.
+    """
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._revoked
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def add(self, key: str, expires_at: float):
+        with self._lock:
+            self._revoked[key] = expires_at
+
+    def load(self, conn):
+        """Add rows revoked since the last load and forget expired tokens"""
+        rows = conn.execute(
+            "SELECT id, token_hash, expires_at FROM revoked_tokens WHERE id > ? ORDER BY id",
+            (self._last_id,)
+        ).fetchall()
+        now = time.time()
+        with self._lock:
+            for row in rows:
+                self._revoked[row["token_hash"]] = row["expires_at"]
+            if rows:
+                self._last_id = rows[-1]["id"]
+            for key in [key for key, expires_at in self._revoked.items() if expires_at <= now]:
+                del self._revoked[key]
+
+token_cache = TokenCache()
+revoked_tokens = RevocationList()
+
+def decode_token(token: str) -> Dict:
+    """Decode and validate a JWT, returning the current user"""
+    key = token_hash(token)
+    if key in revoked_tokens:
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+
+    cached = token_cache.get(key)
+    if cached is not None:
+        user, exp = cached
+        if exp is not None and exp <= time.time():
+            token_cache.discard(key)
+            raise HTTPException(status_code=401, detail="Token has expired")
+        return dict(user)
+
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         role: str = payload.get("role")
@@ -72,16 +185,67 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
                 status_code=401, 
                 detail="Invalid authentication credentials"
             )
-        return {"username": username, "role": role}
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Could not validate credentials")
 
+    user = {"username": username, "role": role}
+    exp = payload.get("exp")
+    token_cache.put(key, user, float(exp) if exp is not None else None)
+    return dict(user)
+
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict:
+    """Verify JWT token (async: a cached token is checked without a thread hop)"""
+    return decode_token(credentials.credentials)
+
+# One dependency per distinct role set, shared by every route that uses it
+_role_checkers: Dict[frozenset, Callable] = {}
+
 def require_role(allowed_roles: list):
     """Dependency to check user role"""
-    def role_checker(current_user: dict = Depends(verify_token)):
-        if current_user["role"] not in allowed_roles:
-            raise HTTPException(status_code=403, detail="Insufficient permissions")
-        return current_user
-    return role_checker
+    allowed = frozenset(allowed_roles)
+    checker = _role_checkers.get(allowed)
+    if checker is None:
+        async def role_checker(current_user: dict = Depends(verify_token)):
+            if current_user["role"] not in allowed:
+                raise HTTPException(status_code=403, detail="Insufficient permissions")
+            return current_user
+        checker = _role_checkers[allowed] = role_checker
+    return checker
+
+# ==================== CONDITIONAL REQUESTS ====================
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    The tag in an If-None-Match header that matches etag (weak comparison),
+    in its plain or any content-coded form; None if none does
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    forms = {etag, *(encoded_etag(etag, encoding) for encoding in ENCODINGS)}
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag in forms:
+            return tag
+    return None
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header matches etag (weak comparison)"""
+    return matching_etag(if_none_match, etag) is not None
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+def json_with_etag(body: bytes, etag: str, encoding: Optional[str] = None) -> Response:
+    """
+    Encoded JSON carrying an ETag; clients must revalidate before reusing it.
+    `encoding` names the Content-Encoding of an already compressed body, whose
+    ETag then carries the coding too.
+    """
+    headers = {"ETag": encoded_etag(etag, encoding), "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)